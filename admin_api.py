@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Admin API for the chatbot
+Lets the content team push new Q&A pairs into running servers without a restart
+"""
+
+import hmac
+import os
+
+from flask import Blueprint, request, jsonify
+
+admin_api = Blueprint('admin_api', __name__)
+
+def is_authorized():
+    """Check the X-Admin-Token header against the ADMIN_TOKEN environment variable"""
+    expected = os.environ.get('ADMIN_TOKEN')
+    if not expected:
+        # Admin API stays disabled until a token is configured
+        return False
+    provided = request.headers.get('X-Admin-Token', '')
+    return hmac.compare_digest(provided, expected)
+
+@admin_api.route("/api/admin/qa", methods=["POST"])
+def add_qa_pairs():
+    """
+    Add Q&A pairs to the live index; a pair for an existing question replaces its answer.
+    Body: {"question": "...", "answer": "..."} or {"pairs": [{"question": ..., "answer": ...}]}
+    """
+    if not is_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Body must be a JSON object'}), 400
+    items = data.get('pairs', [data])
+    if not isinstance(items, list):
+        return jsonify({'error': "'pairs' must be a list"}), 400
+
+    pairs = []
+    for item in items:
+        if not isinstance(item, dict):
+            return jsonify({'error': 'Each pair must be an object'}), 400
+        question, answer = item.get('question'), item.get('answer')
+        if not isinstance(question, str) or not isinstance(answer, str):
+            return jsonify({'error': 'question and answer must be strings'}), 400
+        question, answer = question.strip(), answer.strip()
+        if not question or not answer:
+            return jsonify({'error': 'Each pair needs a question and an answer'}), 400
+        pairs.append((question, answer))
+
+    from chatbot import trainer, sync_dataset_updates
+
+    # Pairs for questions that are already indexed replace their answer
+    updated = sum(1 for question, _ in pairs if trainer.find_question(question) is not None)
+
+    # The journal is shared, so the other workers apply the same pairs on their next request;
+    # syncing through chatbot also drops this worker's cached dataset answers
+    trainer.append_to_journal(pairs)
+    sync_dataset_updates()
+    if trainer.needs_compaction():
+        # Fold the journal into a new compiled index so it stops growing
+        trainer.compact_in_background()
+
+    return jsonify({
+        'added': len(pairs) - updated,
+        'updated': updated,
+        'total_questions': len(trainer.questions),
+        'pending_idf_refresh': trainer.pending_refresh
+    })
+
+@admin_api.route("/api/admin/reindex", methods=["POST"])
+def refresh_index_weights():
+    """
+    Compact the journal into a new compiled index with fresh IDF weights;
+    every worker switches to it on its next request
+    """
+    if not is_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    from chatbot import trainer
+    if not trainer.compact():
+        return jsonify({'error': 'Another worker is already compacting'}), 409
+
+    return jsonify({'total_questions': len(trainer.questions)})
+
+@admin_api.route("/api/admin/stats", methods=["GET"])
+def index_stats():
+    """Exact-match and cache counters for this worker"""
+    if not is_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    from chatbot import get_match_stats, get_cache_stats
+    from web_search_helper import wikipedia_cache_stats
+    from aws_bedrock_integration import semantic_cache, bedrock_clients
+    return jsonify({
+        'exact_match': get_match_stats(),
+        'response_cache': get_cache_stats(),
+        'wikipedia_cache': wikipedia_cache_stats(),
+        'bedrock_cache': semantic_cache.stats(),
+        'bedrock_clients': bedrock_clients.stats()
+    })
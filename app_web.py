@@ -1,7 +1,9 @@
 from flask import Flask, render_template, request
 from chatbot import get_response
+from admin_api import admin_api
 
 app = Flask(__name__)
+app.register_blueprint(admin_api)
 
 @app.route("/", methods=["GET", "POST"])
 def home():
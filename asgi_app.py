@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+ASGI Chat App
+Serves POST /api/chat on asyncio, so questions that fall through to web
+search wait on sockets instead of tying up a worker each. Every other
+route is passed to the Flask app in enhanced_web_app (needs asgiref).
+
+Run with:
+    gunicorn -k uvicorn.workers.UvicornWorker --workers 3 --preload --bind 0.0.0.0:5000 asgi_app:app
+"""
+
+import json
+from datetime import datetime
+
+from chatbot import get_response_async
+from enhanced_web_app import app as flask_app
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    flask_asgi = WsgiToAsgi(flask_app)
+except ImportError:
+    flask_asgi = None
+    print("⚠️ asgiref not installed - only /api/chat is served by the ASGI app")
+
+# Requests larger than this are rejected before parsing
+MAX_BODY_BYTES = 64 * 1024
+
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        if not message.get("more_body"):
+            return body
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def api_chat(scope, receive, send):
+    """Async twin of enhanced_web_app.api_chat with the same request and response format"""
+    try:
+        data = json.loads(await _read_body(receive) or b"{}")
+    except ValueError:
+        await _send_json(send, 400, {'error': 'Invalid JSON'})
+        return
+
+    user_input = data.get('message', '') if isinstance(data, dict) else None
+    if not isinstance(user_input, str):
+        await _send_json(send, 400, {'error': "Body must be a JSON object with a string 'message'"})
+        return
+
+    if not user_input.strip():
+        await _send_json(send, 400, {'error': 'Empty message'})
+        return
+
+    try:
+        response = await get_response_async(user_input)
+        await _send_json(send, 200, {
+            'response': response,
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        await _send_json(send, 500, {'error': str(e)})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            from async_web_search import close_sessions
+            await close_sessions()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    if scope["type"] == "http" and scope["path"] == "/api/chat" and scope["method"] == "POST":
+        await api_chat(scope, receive, send)
+        return
+
+    if flask_asgi is None:
+        await _send_json(send, 404, {'error': 'Not found'})
+        return
+
+    await flask_asgi(scope, receive, send)
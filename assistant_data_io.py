@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Assistant Data Import / Export
+Bulk loads expenses, study sessions and schedule items into smart_assistant.db
+from CSV, JSONL or a desktop app's assistant_data.json, and streams them back
+out. Records are validated one at a time and inserted with executemany() in
+batched transactions that also fold the batch into the rollup tables, so a
+whole history loads in one pass and never sits in memory all at once.
+
+Usage:
+    python assistant_data_io.py import expenses history.csv
+    python assistant_data_io.py import all assistant_data.json
+    python assistant_data_io.py export study_sessions sessions.jsonl
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+from datetime import date, datetime
+
+from assistant_repository import (
+    DatabaseManager,
+    EXPENSE_CATEGORIES,
+    EXPENSE_ROLLUP_UPSERTS,
+    STUDY_ROLLUP_UPSERTS,
+    normalize_expense_category,
+)
+
+BATCH_SIZE = 50000
+
+# Page cache for the import connection (KiB); index pages of big tables stay hot
+BULK_CACHE_KB = 64 * 1024
+
+# Validation errors kept for the report (the rest are only counted)
+MAX_REPORTED_ERRORS = 20
+
+
+def _text(record, field, required=False):
+    value = record.get(field)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f"missing {field}")
+    return value
+
+
+def _date(record):
+    value = _text(record, 'date', required=True)
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"invalid date {value!r}, expected YYYY-MM-DD")
+
+
+TIMESTAMP_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2})?')
+
+
+def _timestamp(value):
+    """'YYYY-MM-DD HH:MM[:SS]' (or ISO 'T' form) in the format SQLite stores"""
+    match = TIMESTAMP_PATTERN.fullmatch(value)
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        match = None
+    if not match:
+        raise ValueError(f"invalid timestamp {value!r}, expected YYYY-MM-DD HH:MM")
+    # Slicing is several times faster than strftime on millions of rows
+    return f"{value[:10]} {value[11:16]}{match.group(1) or ':00'}"
+
+
+def _created_at(record, day):
+    # Exports carry created_at; desktop data has a separate HH:MM time
+    created_at = _text(record, 'created_at')
+    if created_at:
+        return _timestamp(created_at)
+    time_of_day = _text(record, 'time')
+    return _timestamp(f"{day} {time_of_day}") if time_of_day else f"{day} 00:00:00"
+
+
+def _positive_number(record, field, convert):
+    value = record.get(field)
+    if isinstance(value, str):
+        # The desktop apps store durations as e.g. "60 minutes"
+        match = re.match(r'\s*(\d+(?:\.\d+)?)', value)
+        value = match.group(1) if match else value
+    try:
+        number = convert(float(value))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid {field} {record.get(field)!r}")
+    if not math.isfinite(number) or number <= 0:
+        raise ValueError(f"{field} must be positive, got {record.get(field)!r}")
+    return number
+
+
+def validate_expense(record):
+    category = _text(record, 'category', required=True).lower()
+    if category not in EXPENSE_CATEGORIES:
+        raise ValueError(f"unknown category {category!r}")
+    day = _date(record)
+    return {
+        'amount': _positive_number(record, 'amount', float),
+        'category': category,
+        'description': _text(record, 'description'),
+        'date': day,
+        'created_at': _created_at(record, day),
+    }
+
+
+def validate_study_session(record):
+    day = _date(record)
+    return {
+        'subject': _text(record, 'subject', required=True),
+        'duration': _positive_number(record, 'duration', int),
+        'date': day,
+        'notes': _text(record, 'notes'),
+        'created_at': _created_at(record, day),
+    }
+
+
+def validate_schedule_item(record):
+    created_at = _text(record, 'created_at')
+    date_time = _text(record, 'date_time')
+    if not date_time:
+        # Desktop format: separate date and time
+        date_time = f"{_date(record)} {_text(record, 'time') or '00:00'}"
+    date_time = _timestamp(date_time)
+
+    completed = _text(record, 'completed').lower() in ('1', 'true', 'yes')
+    try:
+        priority = int(record.get('priority') or 1)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid priority {record.get('priority')!r}")
+
+    return {
+        'title': _text(record, 'title', required=True),
+        'description': _text(record, 'description'),
+        'date_time': date_time,
+        'category': _text(record, 'category') or "general",
+        'priority': priority,
+        'completed': completed,
+        'created_at': _timestamp(created_at) if created_at else date_time,
+    }
+
+
+def expense_rollups(rows):
+    """Batch folded into one row per (date, category) for the rollup upserts"""
+    totals = {}
+    for row in rows:
+        key = (row['date'], row['category'])
+        rollup = totals.get(key)
+        if rollup is None:
+            rollup = totals[key] = {'date': row['date'], 'month': row['date'][:7],
+                                    'category': row['category'], 'amount': 0.0, 'entries': 0}
+        rollup['amount'] += row['amount']
+        rollup['entries'] += 1
+    return list(totals.values())
+
+
+def study_rollups(rows):
+    """Batch folded into one row per (date, subject) for the rollup upserts"""
+    totals = {}
+    for row in rows:
+        key = (row['date'], row['subject'])
+        rollup = totals.get(key)
+        if rollup is None:
+            rollup = totals[key] = {'date': row['date'], 'subject': row['subject'], 'duration': 0, 'entries': 0}
+        rollup['duration'] += row['duration']
+        rollup['entries'] += 1
+    return list(totals.values())
+
+
+class DataKind:
+    """How one kind of record is validated, stored and rolled up"""
+
+    def __init__(self, table, columns, validate, rollup_statements=(), rollups=None):
+        self.table = table
+        self.columns = columns
+        self.validate = validate
+        self.rollup_statements = rollup_statements
+        self.rollups = rollups
+        self.insert_sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + column for column in columns)})"
+        )
+
+
+KINDS = {
+    'expenses': DataKind(
+        'expenses',
+        ('amount', 'category', 'description', 'date', 'created_at'),
+        validate_expense, EXPENSE_ROLLUP_UPSERTS, expense_rollups
+    ),
+    'study_sessions': DataKind(
+        'study_sessions',
+        ('subject', 'duration', 'date', 'notes', 'created_at'),
+        validate_study_session, STUDY_ROLLUP_UPSERTS, study_rollups
+    ),
+    'schedule': DataKind(
+        'schedule',
+        ('title', 'description', 'date_time', 'category', 'priority', 'completed', 'created_at'),
+        validate_schedule_item
+    ),
+}
+
+
+class ImportReport:
+    """Counts and the first few validation errors of one import"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.inserted = 0
+        self.skipped = 0
+        self.errors = []
+
+    def reject(self, number, error):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"record {number}: {error}")
+
+    def __str__(self):
+        text = f"📥 {self.kind}: {self.inserted} imported, {self.skipped} skipped"
+        for error in self.errors:
+            text += f"\n   ⚠️ {error}"
+        if self.skipped > len(self.errors):
+            text += f"\n   ... and {self.skipped - len(self.errors)} more"
+        return text
+
+
+def read_records(path, kind=None):
+    """
+    Yield records (dicts) from a .csv or .jsonl file one at a time, or the
+    kind's list from a desktop assistant_data.json
+    """
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f).get(kind, [])
+    elif path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith('.csv'):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+    else:
+        raise ValueError(f"Unsupported file type: {path} (use .csv, .jsonl or .json)")
+
+
+def _insert_rows(conn, kind, rows):
+    """Insert validated rows and fold them into the rollups (inside the caller's transaction)"""
+    conn.executemany(kind.insert_sql, rows)
+    if kind.rollups:
+        rollups = kind.rollups(rows)
+        for statement in kind.rollup_statements:
+            conn.executemany(statement, rollups)
+
+
+def _write_batch(conn, kind, rows):
+    """Insert one batch and fold it into the rollups as a single transaction"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _insert_rows(conn, kind, rows)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _validate(kind, record):
+    if not isinstance(record, dict):
+        raise ValueError("not an object")
+    return kind.validate(record)
+
+
+def import_records(db, kind_name, records, batch_size=BATCH_SIZE, strict=False):
+    """
+    Validate and insert records, batch_size rows per transaction. Invalid
+    records are skipped and reported; with strict=True the first one raises
+    ValueError (batches already written stay committed).
+    """
+    kind = KINDS[kind_name]
+    report = ImportReport(kind_name)
+    batch = []
+
+    # One pooled connection for the whole import, with a bigger cache while it runs
+    with db.connection() as conn:
+        cache_size = conn.execute("PRAGMA cache_size").fetchone()[0]
+        conn.execute(f"PRAGMA cache_size = {-BULK_CACHE_KB}")
+        try:
+            for number, record in enumerate(records, start=1):
+                try:
+                    batch.append(_validate(kind, record))
+                except ValueError as e:
+                    if strict:
+                        raise ValueError(f"{kind_name} record {number}: {e}")
+                    report.reject(number, e)
+                    continue
+
+                if len(batch) >= batch_size:
+                    _write_batch(conn, kind, batch)
+                    report.inserted += len(batch)
+                    batch = []
+
+            if batch:
+                _write_batch(conn, kind, batch)
+                report.inserted += len(batch)
+        finally:
+            conn.execute(f"PRAGMA cache_size = {cache_size}")
+
+    return report
+
+
+def import_file(db, kind_name, path, batch_size=BATCH_SIZE, strict=False):
+    """Import one file; kind_name 'all' imports every section of a desktop assistant_data.json"""
+    if kind_name == 'all':
+        if not path.endswith('.json'):
+            raise ValueError("'all' is only supported for assistant_data.json files")
+        return [import_file(db, name, path, batch_size, strict) for name in KINDS]
+
+    return import_records(db, kind_name, read_records(path, kind_name), batch_size, strict)
+
+
+def _desktop_expense(record):
+    # The desktop apps accepted any category word
+    if not isinstance(record, dict):
+        return record
+    category, description = normalize_expense_category(record.get('category'), record.get('description') or "")
+    return dict(record, category=category, description=description)
+
+
+def migrate_desktop_data(db, path="assistant_data.json"):
+    """
+    One-time move of a desktop app's assistant_data.json (and its journals)
+    into the database. Free-text expense categories are mapped onto
+    EXPENSE_CATEGORIES. Every record is validated first; if any is invalid
+    nothing is imported and the files stay where they are, so they can be
+    fixed and migrated on the next start. Otherwise all kinds are inserted in
+    one transaction that also records the data's digest (a crash before the
+    files are renamed to *.migrated cannot import them twice).
+    Returns the import reports, or [] if there was nothing to migrate.
+    """
+    from assistant_store import load_legacy_data
+
+    data, files = load_legacy_data(path)
+    if not files:
+        return []
+
+    records = {name: list(data[name]) for name in KINDS}
+    records['expenses'] = [_desktop_expense(record) for record in records['expenses']]
+    digest = hashlib.sha256(json.dumps(records, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    reports = []
+    rows = {}
+    for name, kind in KINDS.items():
+        report = ImportReport(name)
+        rows[name] = []
+        for number, record in enumerate(records[name], start=1):
+            try:
+                rows[name].append(_validate(kind, record))
+            except ValueError as e:
+                report.reject(number, e)
+        reports.append(report)
+
+    if any(report.skipped for report in reports):
+        print(f"⚠️ {path} not migrated: {sum(report.skipped for report in reports)} invalid records")
+        return reports
+
+    with db.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = conn.execute('SELECT 1 FROM desktop_migrations WHERE digest = ?', (digest,)).fetchone()
+            if not done:
+                for report in reports:
+                    _insert_rows(conn, KINDS[report.kind], rows[report.kind])
+                    report.inserted = len(rows[report.kind])
+                conn.execute(
+                    'INSERT INTO desktop_migrations (digest, source) VALUES (?, ?)',
+                    (digest, os.path.abspath(path))
+                )
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    for migrated in files:
+        os.replace(migrated, f"{migrated}.migrated")
+    print(f"📦 Desktop data from {path} moved into {db.db_path}")
+    return reports
+
+
+def export_records(db, kind_name, out, fmt='jsonl', fetch_size=BATCH_SIZE):
+    """Stream every row of kind_name to the open text file out as CSV or JSONL; returns the row count"""
+    kind = KINDS[kind_name]
+    columns = ('id',) + kind.columns
+    count = 0
+
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(columns)
+
+    with db.connection() as conn:
+        cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {kind.table} ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            if writer:
+                writer.writerows(rows)
+            else:
+                out.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows)
+            count += len(rows)
+
+    return count
+
+
+def export_file(db, kind_name, path):
+    """Export kind_name to path ('.csv' or '.jsonl'; '-' writes JSONL to stdout)"""
+    if path == '-':
+        return export_records(db, kind_name, sys.stdout)
+
+    fmt = 'csv' if path.endswith('.csv') else 'jsonl'
+    with open(path, 'w', encoding='utf-8', newline='') as out:
+        return export_records(db, kind_name, out, fmt)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export of smart assistant data")
+    parser.add_argument('--db', default="smart_assistant.db", help="SQLite database (default: smart_assistant.db)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    importer = commands.add_parser('import', help="load records from .csv, .jsonl or assistant_data.json")
+    importer.add_argument('kind', choices=list(KINDS) + ['all'])
+    importer.add_argument('path')
+    importer.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    importer.add_argument('--strict', action='store_true', help="stop at the first invalid record")
+
+    exporter = commands.add_parser('export', help="write every record to .csv or .jsonl ('-' for stdout)")
+    exporter.add_argument('kind', choices=list(KINDS))
+    exporter.add_argument('path')
+
+    args = parser.parse_args(argv)
+    db = DatabaseManager(args.db)
+
+    if args.command == 'import':
+        reports = import_file(db, args.kind, args.path, args.batch_size, args.strict)
+        for report in reports if isinstance(reports, list) else [reports]:
+            print(report)
+    else:
+        count = export_file(db, args.kind, args.path)
+        if args.path != '-':
+            print(f"📤 {args.kind}: {count} exported to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
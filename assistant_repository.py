@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Assistant Repository
+The one store for expenses, schedule items and study sessions, shared by the
+web app (smart_assistant), the desktop apps and the bulk import/export tool.
+DatabaseManager owns the SQLite schema and connection pool; AssistantRepository
+is the API the front ends use: add records, query them by date range, and read
+per-category / per-subject totals from the rollup tables. Every query is
+served by an index or a rollup, never by scanning the whole history.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_DB_PATH = "smart_assistant.db"
+
+EXPENSE_CATEGORIES = [
+    "food", "transport", "entertainment", "study",
+    "shopping", "bills", "health", "other"
+]
+
+# Rollups kept in step with the raw rows: every insert upserts its day's (and
+# month's) totals in the same transaction, so reports read O(days), not O(rows).
+# Parameters are named so bulk loaders can executemany() the same statements
+# with rows pre-aggregated per day (entries = number of raw rows folded in).
+EXPENSE_ROLLUP_UPSERTS = (
+    '''
+    INSERT INTO expense_daily (date, category, total, entries) VALUES (:date, :category, :amount, :entries)
+    ON CONFLICT (date, category) DO UPDATE SET total = total + excluded.total, entries = entries + excluded.entries
+    ''',
+    '''
+    INSERT INTO expense_monthly (month, category, total, entries) VALUES (:month, :category, :amount, :entries)
+    ON CONFLICT (month, category) DO UPDATE SET total = total + excluded.total, entries = entries + excluded.entries
+    ''',
+)
+
+STUDY_ROLLUP_UPSERTS = (
+    '''
+    INSERT INTO study_daily (date, subject, minutes, sessions) VALUES (:date, :subject, :duration, :entries)
+    ON CONFLICT (date, subject) DO UPDATE SET minutes = minutes + excluded.minutes, sessions = sessions + excluded.sessions
+    ''',
+)
+
+# Recompute every rollup from the raw tables (used by migration 3 and --rebuild-rollups)
+ROLLUP_REBUILD = (
+    'DELETE FROM expense_daily',
+    'DELETE FROM expense_monthly',
+    'DELETE FROM study_daily',
+    '''
+    INSERT INTO expense_daily (date, category, total, entries)
+    SELECT date, category, SUM(amount), COUNT(*) FROM expenses GROUP BY date, category
+    ''',
+    '''
+    INSERT INTO expense_monthly (month, category, total, entries)
+    SELECT substr(date, 1, 7), category, SUM(amount), COUNT(*) FROM expenses GROUP BY substr(date, 1, 7), category
+    ''',
+    '''
+    INSERT INTO study_daily (date, subject, minutes, sessions)
+    SELECT date, subject, SUM(duration), COUNT(*) FROM study_sessions GROUP BY date, subject
+    ''',
+)
+
+# Schema migrations in order; PRAGMA user_version records how many have been applied.
+# Never edit a released migration, append a new one instead.
+MIGRATIONS = [
+    # 1: base tables
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS schedule (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            date_time DATETIME NOT NULL,
+            category TEXT,
+            priority INTEGER DEFAULT 1,
+            completed BOOLEAN DEFAULT FALSE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            description TEXT,
+            date DATE NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS study_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject TEXT NOT NULL,
+            duration INTEGER NOT NULL,
+            date DATE NOT NULL,
+            notes TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ),
+    # 2: indexes for the date-range reports; the category/subject breakdowns
+    # are answered from the index alone (covering), without touching the table
+    (
+        'CREATE INDEX IF NOT EXISTS idx_expenses_date_category ON expenses (date, category, amount)',
+        'CREATE INDEX IF NOT EXISTS idx_schedule_date_time ON schedule (date_time)',
+        'CREATE INDEX IF NOT EXISTS idx_study_sessions_date_subject ON study_sessions (date, subject, duration)',
+    ),
+    # 3: rollup tables, backfilled from the existing rows
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS expense_daily (
+            date DATE NOT NULL,
+            category TEXT NOT NULL,
+            total REAL NOT NULL,
+            entries INTEGER NOT NULL,
+            PRIMARY KEY (date, category)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS expense_monthly (
+            month TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total REAL NOT NULL,
+            entries INTEGER NOT NULL,
+            PRIMARY KEY (month, category)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS study_daily (
+            date DATE NOT NULL,
+            subject TEXT NOT NULL,
+            minutes INTEGER NOT NULL,
+            sessions INTEGER NOT NULL,
+            PRIMARY KEY (date, subject)
+        ) WITHOUT ROWID
+        ''',
+        *ROLLUP_REBUILD,
+    ),
+    # 4: desktop data files already moved into the database, by content digest
+    # (written in the same transaction as their rows; see assistant_data_io)
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS desktop_migrations (
+            digest TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            migrated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ),
+]
+
+
+class DatabaseManager:
+    """
+    Manages SQLite database for persistent storage
+    Owns a small pool of connections (WAL mode, tuned pragmas) that the managers
+    borrow through connection(), so each request reuses an open connection and
+    its prepared statement cache instead of connecting again
+    """
+
+    # Applied to every new connection; journal_mode=WAL persists in the file itself
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",      # readers never block the writer
+        "PRAGMA synchronous=NORMAL",    # safe with WAL, avoids an fsync per commit
+        "PRAGMA cache_size=-8000",      # 8 MB page cache per connection
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=5000",
+    )
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, pool_size=4, statement_cache_size=128):
+        self.db_path = db_path
+        # Every connection to ":memory:" is a separate database, so keep just one
+        self.pool_size = 1 if db_path == ":memory:" else pool_size
+        self.statement_cache_size = statement_cache_size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.init_database()
+
+    def _connect(self):
+        # Connections move between threads, but the pool hands each to one thread at a time
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=5,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _borrow(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's connections must not be used here
+                self._idle = queue.LifoQueue()
+                self._opened = 0
+                self._pid = os.getpid()
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._opened < self.pool_size:
+                self._opened += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        # Pool exhausted: wait for another thread to return a connection
+        return self._idle.get(timeout=10)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection; commits on success and rolls back on error"""
+        conn = self._borrow()
+        pid = self._pid
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            if pid == os.getpid():
+                self._idle.put(conn)
+
+    def close(self):
+        """Close the idle connections (borrowed ones are closed when returned later)"""
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._opened -= 1
+
+    def init_database(self):
+        """Bring the schema up to date by running any migrations not yet applied"""
+        with self.connection() as conn:
+            # IMMEDIATE takes the write lock first, so concurrent workers migrate one at a time
+            conn.execute("BEGIN IMMEDIATE")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+            for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+
+            if version < len(MIGRATIONS):
+                print(f"🗄️ Database schema migrated to version {len(MIGRATIONS)}")
+
+    def rebuild_rollups(self):
+        """Recompute the expense and study rollups from the raw rows in one transaction"""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for statement in ROLLUP_REBUILD:
+                conn.execute(statement)
+        print("🗄️ Rollups rebuilt from raw expenses and study sessions")
+
+
+def _day(value):
+    """date, datetime or 'YYYY-MM-DD' as the TEXT stored in date columns"""
+    if isinstance(value, datetime):
+        value = value.date()
+    return str(value)
+
+
+def _timestamp(value):
+    """datetime or 'YYYY-MM-DD HH:MM[:SS]' as the TEXT stored in datetime columns"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return datetime.fromisoformat(str(value)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _records(cursor, **derived):
+    """Rows as dicts, plus derived fields computed from each dict"""
+    columns = [column[0] for column in cursor.description]
+    records = []
+    for row in cursor:
+        record = dict(zip(columns, row))
+        for name, compute in derived.items():
+            record[name] = compute(record)
+        records.append(record)
+    return records
+
+
+def normalize_expense_category(category, description=""):
+    """
+    Map free-text categories (the desktop apps accept any word) onto
+    EXPENSE_CATEGORIES so every front end reports the same buckets; an
+    unknown word becomes 'other' and is kept in the description
+    """
+    category = (category or "").strip().lower()
+    if category in EXPENSE_CATEGORIES:
+        return category, description
+    if not category:
+        return "other", description
+    return "other", f"{category} - {description}" if description else category
+
+
+class AssistantRepository:
+    """
+    Add, range-query and aggregate assistant data. Ranges are half-open
+    [start, end); dates may be date objects or 'YYYY-MM-DD' strings.
+    Records come back as dicts with the table's columns plus 'time' (HH:MM).
+    """
+
+    def __init__(self, db=None):
+        self.db = db or DatabaseManager()
+
+    # Adding
+
+    def add_expense(self, amount, category, description="", when=None):
+        """Store one expense and update its daily/monthly rollups in the same transaction"""
+        when = when or datetime.now()
+        record = {
+            'amount': float(amount),
+            'category': category.lower(),
+            'description': description,
+            'date': _day(when),
+            'month': _day(when)[:7],
+            'created_at': _timestamp(when),
+            'entries': 1,
+        }
+        with self.db.connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO expenses (amount, category, description, date, created_at) '
+                'VALUES (:amount, :category, :description, :date, :created_at)',
+                record
+            )
+            for statement in EXPENSE_ROLLUP_UPSERTS:
+                conn.execute(statement, record)
+        return cursor.lastrowid
+
+    def add_schedule(self, title, date_time, description="", category="general"):
+        """Store one schedule item; date_time is a datetime or 'YYYY-MM-DD HH:MM'"""
+        with self.db.connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO schedule (title, description, date_time, category, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (title, description, _timestamp(date_time), category, _timestamp(datetime.now()))
+            )
+        return cursor.lastrowid
+
+    def log_study_session(self, subject, duration, notes="", when=None):
+        """Store one study session (duration in minutes) and update its daily rollup"""
+        when = when or datetime.now()
+        record = {
+            'subject': subject,
+            'duration': int(duration),
+            'notes': notes,
+            'date': _day(when),
+            'created_at': _timestamp(when),
+            'entries': 1,
+        }
+        with self.db.connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO study_sessions (subject, duration, date, notes, created_at) '
+                'VALUES (:subject, :duration, :date, :notes, :created_at)',
+                record
+            )
+            for statement in STUDY_ROLLUP_UPSERTS:
+                conn.execute(statement, record)
+        return cursor.lastrowid
+
+    # Range queries (index range scans)
+
+    def expenses_between(self, start, end, newest_first=False):
+        """Expenses dated in [start, end), in the order they were added"""
+        order = "DESC" if newest_first else "ASC"
+        with self.db.connection() as conn:
+            return _records(conn.execute(
+                'SELECT amount, category, description, date, created_at FROM expenses '
+                f'WHERE date >= ? AND date < ? ORDER BY created_at {order}, id {order}',
+                (_day(start), _day(end))
+            ), time=lambda record: record['created_at'][11:16])
+
+    def schedule_between(self, start, end):
+        """Schedule items due in [start, end) (dates or datetimes), soonest first"""
+        with self.db.connection() as conn:
+            return _records(conn.execute(
+                'SELECT title, description, date_time, category, completed FROM schedule '
+                'WHERE date_time >= ? AND date_time < ? ORDER BY date_time',
+                (str(start), str(end))
+            ), time=lambda record: record['date_time'][11:16])
+
+    def study_sessions_between(self, start, end):
+        """Study sessions dated in [start, end), in the order they were logged"""
+        with self.db.connection() as conn:
+            return _records(conn.execute(
+                'SELECT subject, duration, date, notes, created_at FROM study_sessions '
+                'WHERE date >= ? AND date < ? ORDER BY created_at, id',
+                (_day(start), _day(end))
+            ), time=lambda record: record['created_at'][11:16])
+
+    # Aggregates (rollup tables: O(days), not O(rows))
+
+    def monthly_expense_totals(self, month=None):
+        """[(category, total)] for month ('YYYY-MM', default this month), largest first"""
+        month = month or datetime.now().strftime('%Y-%m')
+        with self.db.connection() as conn:
+            return conn.execute(
+                'SELECT category, total FROM expense_monthly WHERE month = ? ORDER BY total DESC',
+                (month,)
+            ).fetchall()
+
+    def expense_totals_between(self, start, end):
+        """[(category, total)] for expenses dated in [start, end), largest first"""
+        with self.db.connection() as conn:
+            return conn.execute(
+                'SELECT category, SUM(total) FROM expense_daily WHERE date >= ? AND date < ? '
+                'GROUP BY category ORDER BY SUM(total) DESC',
+                (_day(start), _day(end))
+            ).fetchall()
+
+    def study_totals_between(self, start, end):
+        """[(subject, minutes, sessions)] for sessions dated in [start, end), most minutes first"""
+        with self.db.connection() as conn:
+            return conn.execute(
+                'SELECT subject, SUM(minutes), SUM(sessions) FROM study_daily WHERE date >= ? AND date < ? '
+                'GROUP BY subject ORDER BY SUM(minutes) DESC',
+                (_day(start), _day(end))
+            ).fetchall()
+
+    def study_session_count(self):
+        """Number of study sessions ever logged"""
+        with self.db.connection() as conn:
+            return conn.execute('SELECT COALESCE(SUM(sessions), 0) FROM study_daily').fetchone()[0]
+
+    def has_records(self):
+        """True if any expense, schedule item or study session is stored"""
+        with self.db.connection() as conn:
+            return bool(conn.execute(
+                'SELECT EXISTS (SELECT 1 FROM expenses) OR EXISTS (SELECT 1 FROM schedule) '
+                'OR EXISTS (SELECT 1 FROM study_sessions)'
+            ).fetchone()[0])
+
+
+_repositories = {}
+_repositories_lock = threading.Lock()
+
+
+def get_repository(db_path=DEFAULT_DB_PATH):
+    """Process-wide repository for db_path, so every front end shares one connection pool"""
+    key = os.path.abspath(db_path)
+    with _repositories_lock:
+        repository = _repositories.get(key)
+        if repository is None:
+            repository = _repositories[key] = AssistantRepository(DatabaseManager(db_path))
+        return repository
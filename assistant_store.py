@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Assistant Store
+Read-only loader for the desktop apps' former storage: assistant_data.json plus
+a JSONL journal of newer entries, and journals a compaction had renamed to
+<journal>.<token> but not yet merged. The apps now use the shared database
+(assistant_repository); assistant_data_io.migrate_desktop_data uses this to
+move old files over.
+"""
+
+import json
+import os
+import re
+
+KINDS = ('expenses', 'schedule', 'study_sessions')
+
+# Rotated journals were named <journal>.<uuid4 hex>
+_ROTATED_TOKEN = re.compile(r"[0-9a-f]{32}")
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        snapshot = {}
+    for kind in KINDS:
+        snapshot.setdefault(kind, [])
+    snapshot.setdefault('_compacted', [])
+    return snapshot
+
+
+def _rotated_journals(journal_path):
+    """Journals renamed for compaction but not yet deleted, oldest first"""
+    folder = os.path.dirname(os.path.abspath(journal_path))
+    prefix = os.path.basename(journal_path) + "."
+    paths = [
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.startswith(prefix) and _ROTATED_TOKEN.fullmatch(name[len(prefix):])
+    ]
+    return sorted(paths, key=os.path.getmtime)
+
+
+def _replay(path, data):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                data[entry['kind']].append(entry['record'])
+            except (ValueError, KeyError, TypeError):
+                # A torn last line from a crash mid-write; the rest is intact
+                continue
+
+
+def load_legacy_data(path="assistant_data.json", journal_path=None):
+    """
+    Return ({kind: records}, files): the snapshot plus every journal entry written
+    after it, and the existing files they were read from (to retire once migrated).
+    Raises ValueError when the snapshot is not valid JSON.
+    """
+    journal_path = journal_path or os.path.splitext(path)[0] + ".jsonl"
+    data = _read_snapshot(path)
+    files = [path] if os.path.exists(path) else []
+
+    # Tokens of rotated journals the snapshot already contains
+    compacted = set(data.pop('_compacted'))
+    for rotated in _rotated_journals(journal_path):
+        if rotated.rsplit(".", 1)[-1] not in compacted:
+            _replay(rotated, data)
+        files.append(rotated)
+    if os.path.exists(journal_path):
+        _replay(journal_path, data)
+        files.append(journal_path)
+
+    return data, files
+
+
+def test_load_legacy_data():
+    """Snapshot, rotated and current journals are read once each, already compacted ones skipped"""
+    import tempfile
+
+    print("🧪 Testing legacy assistant data loader...")
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "assistant_data.json")
+    journal = os.path.join(folder, "assistant_data.jsonl")
+    merged, pending = "a" * 32, "b" * 32
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'expenses': [{'amount': 5.0}], 'schedule': [], 'study_sessions': [], '_compacted': [merged]}, f)
+    for name, amount in ((f"{journal}.{merged}", 1.0), (f"{journal}.{pending}", 2.0), (journal, 3.0)):
+        with open(name, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'kind': 'expenses', 'record': {'amount': amount}}) + "\n")
+            f.write('{"kind": "expenses", "rec')  # torn last line
+    open(f"{journal}.migrated", 'w').close()
+
+    data, files = load_legacy_data(path)
+    assert sorted(e['amount'] for e in data['expenses']) == [2.0, 3.0, 5.0]
+    assert data['schedule'] == [] and '_compacted' not in data
+    assert len(files) == 4 and f"{journal}.migrated" not in files
+
+    assert load_legacy_data(os.path.join(folder, "missing.json")) == ({kind: [] for kind in KINDS}, [])
+    print("✅ Legacy assistant data loader test passed")
+
+
+if __name__ == "__main__":
+    test_load_legacy_data()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Async Web Search
+asyncio version of web_search_helper.search_web_answer: same sources, caches,
+priority order and deadline, but network lookups are coroutines, so one
+process can wait on hundreds of slow fallbacks without a thread for each.
+Uses aiohttp when installed, otherwise runs the pooled http_client in threads.
+"""
+
+import asyncio
+import time
+
+import http_client
+import web_search_helper as sync_search
+from web_search_helper import (
+    SEARCH_SOURCES,
+    WEB_SEARCH_DEADLINE,
+    WIKIPEDIA_API,
+    DUCKDUCKGO_API,
+    offline_answer,
+)
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# One aiohttp session per event loop (sessions cannot be shared between loops)
+_sessions = {}
+
+
+def _session():
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=http_client.POOL_CONNECTIONS * http_client.POOL_MAXSIZE,
+            limit_per_host=http_client.DEFAULT_HOST_LIMIT,
+            ttl_dns_cache=300
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": http_client.USER_AGENT}
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_sessions():
+    """Close the aiohttp session of the running loop (call on application shutdown)"""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+def _query_params(params):
+    # aiohttp only accepts str/int/float values; MediaWiki treats any value as "true"
+    return {key: (1 if value is True else value) for key, value in (params or {}).items()}
+
+
+async def get_json(url, params=None, timeout=8):
+    """GET url and return (status, parsed JSON or None); timeout is cut to the search deadline"""
+    timeout = http_client.time_left(timeout)
+    if not AIOHTTP_AVAILABLE:
+        response = await asyncio.to_thread(http_client.get, url, params=params, timeout=timeout)
+        return response.status_code, (response.json() if response.status_code == 200 else None)
+
+    async with _session().get(
+        url,
+        params=_query_params(params),
+        timeout=aiohttp.ClientTimeout(total=timeout)
+    ) as response:
+        if response.status != 200:
+            return response.status, None
+        return response.status, await response.json(content_type=None)
+
+
+async def search_wikipedia_async(query):
+    """Async search_wikipedia_advanced"""
+    try:
+        for search_term in sync_search._wikipedia_search_terms(query):
+            try:
+                titles = sync_search._wiki_titles.get(sync_search.normalize_cache_key(search_term))
+                if titles is None:
+                    status, data = await get_json(
+                        WIKIPEDIA_API, sync_search._wikipedia_search_params(search_term), timeout=8
+                    )
+                    if status != 200:
+                        continue
+                    titles = sync_search._cache_wikipedia_titles(search_term, data)
+                if not titles:
+                    continue
+
+                extracts, missing = sync_search._cached_wikipedia_extracts(titles)
+                if missing:
+                    status, data = await get_json(
+                        WIKIPEDIA_API, sync_search._wikipedia_extract_params(missing), timeout=8
+                    )
+                    if status == 200:
+                        extracts.update(sync_search._cache_wikipedia_extracts(missing, data))
+
+                answer = sync_search._wikipedia_answer(titles, extracts)
+                if answer:
+                    return answer
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                continue
+
+        return None
+
+    except Exception as e:
+        print(f"Wikipedia advanced search error: {e}")
+        return None
+
+
+async def search_duckduckgo_async(query):
+    """Async search_duckduckgo"""
+    try:
+        status, data = await get_json(DUCKDUCKGO_API, sync_search._duckduckgo_params(query), timeout=5)
+        return sync_search._duckduckgo_answer(data) if status == 200 else None
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"DuckDuckGo search error: {e}")
+        return None
+
+
+async def search_rest_countries_async(query):
+    """Async search_rest_countries"""
+    try:
+        url = sync_search._country_url(query)
+        if not url:
+            return None
+        status, data = await get_json(url, timeout=5)
+        return sync_search._country_answer(data) if status == 200 else None
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Country search error: {e}")
+        return None
+
+
+# Coroutine for each network source in web_search_helper.SEARCH_SOURCES
+ASYNC_SOURCES = {
+    "Wikipedia": search_wikipedia_async,
+    "DuckDuckGo": search_duckduckgo_async,
+    "country information": search_rest_countries_async,
+}
+
+
+async def resolve_web_answer_async(question, deadline=WEB_SEARCH_DEADLINE):
+    """
+    Async resolve_web_answer: every network source starts at once, answers are
+    taken in SEARCH_SOURCES priority order, and unfinished lookups are cancelled
+    """
+    expires_at = time.monotonic() + deadline
+
+    # Tasks copy the deadline, so requests in threads (which cancel() cannot
+    # stop) also give up on time
+    with http_client.deadline(expires_at):
+        tasks = {
+            label: asyncio.create_task(ASYNC_SOURCES[label](question))
+            for label, _, network in SEARCH_SOURCES
+            if network
+        }
+
+    try:
+        for label, source, network in SEARCH_SOURCES:
+            if not network:
+                result = source(question)
+            else:
+                task = tasks[label]
+                done, _ = await asyncio.wait([task], timeout=max(expires_at - time.monotonic(), 0))
+                if not done:
+                    print(f"⏱️ {label} missed the {deadline:g}s deadline, skipping")
+                    continue
+                if task.exception() is not None:
+                    print(f"{label} search error: {task.exception()}")
+                    continue
+                result = task.result()
+
+            if result:
+                return label, result
+
+        return None, None
+
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+
+async def search_web_answer_async(question):
+    """Async search_web_answer, with the same guaranteed offline fallback"""
+    print(f"🔍 Searching for answer: {question}")
+
+    label, result = await resolve_web_answer_async(question)
+    if result:
+        print(f"✅ Found {label} answer")
+        return result
+
+    return offline_answer(question)
+
+
+if __name__ == "__main__":
+    async def main():
+        questions = ["What is Python programming?", "Albert Einstein", "capital of japan country"]
+        answers = await asyncio.gather(*(search_web_answer_async(question) for question in questions))
+        for question, answer in zip(questions, answers):
+            print(f"\n❓ Question: {question}\n✅ Answer: {answer}")
+        await close_sessions()
+
+    asyncio.run(main())
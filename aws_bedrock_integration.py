@@ -4,33 +4,453 @@ AWS Bedrock Integration for Smart Personal Assistant
 Enhances the chatbot with advanced AI capabilities
 """
 
-import boto3
+import hashlib
+import io
 import json
-from typing import Optional, Dict, Any
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator, List
 import logging
 from datetime import datetime
 
-class BedrockEnhancedAssistant:
-    """Enhanced assistant using AWS Bedrock"""
+from scipy.sparse import vstack
+from sklearn.preprocessing import normalize
+
+from single_flight import SingleFlight
+
+try:
+    import boto3
+    from botocore.config import Config
+except ImportError:
+    boto3 = None
+
+# Model invocations allowed in flight per region and model; further calls wait
+# at most BEDROCK_QUEUE_TIMEOUT seconds, then fall back instead of queueing
+BEDROCK_MAX_CONCURRENCY = int(os.environ.get("BEDROCK_MAX_CONCURRENCY", 8))
+BEDROCK_QUEUE_TIMEOUT = float(os.environ.get("BEDROCK_QUEUE_TIMEOUT", 0.5))
+
+
+class BedrockBusyError(Exception):
+    """Raised when every invocation slot for a model is taken"""
+
+
+class BedrockStreamError(Exception):
+    """Raised when a response stream fails after part of the answer was yielded"""
+
+
+class BedrockClientManager:
+    """
+    Process-wide bedrock-runtime clients (one per region, with a pooled,
+    keep-alive connection pool and adaptive retries) plus a semaphore per
+    region and model that caps concurrent invocations
+    """
     
-    def __init__(self, region_name: str = 'us-east-1'):
-        """Initialize Bedrock client"""
-        try:
-            # Initialize AWS Bedrock client
-            self.bedrock_client = boto3.client(
-                service_name='bedrock-runtime',
-                region_name=region_name
+    def __init__(self, max_concurrency: int = BEDROCK_MAX_CONCURRENCY, queue_timeout: float = BEDROCK_QUEUE_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._clients = {}
+        self._semaphores = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+    
+    def _check_fork(self):
+        # Clients hold sockets, which must not be shared with a forked worker
+        if self._pid != os.getpid():
+            self._clients = {}
+            self._semaphores = {}
+            self._pid = os.getpid()
+            self.in_flight = 0
+    
+    def get_client(self, region_name: str):
+        """Shared bedrock-runtime client for region_name, created on first use"""
+        with self._lock:
+            self._check_fork()
+            client = self._clients.get(region_name)
+            if client is None:
+                if boto3 is None:
+                    raise ImportError("boto3 is not installed")
+                config = Config(
+                    region_name=region_name,
+                    max_pool_connections=self.max_concurrency + 2,
+                    retries={'mode': 'adaptive', 'max_attempts': 3},
+                    connect_timeout=5,
+                    read_timeout=60,
+                    tcp_keepalive=True
+                )
+                # boto3.client() on the default session is not thread-safe, so use a private session
+                client = boto3.session.Session().client(service_name='bedrock-runtime', config=config)
+                self._clients[region_name] = client
+            return client
+    
+    @contextmanager
+    def invocation_slot(self, region_name: str, model_id: str):
+        """Hold one of the model's invocation slots, or raise BedrockBusyError after queue_timeout"""
+        with self._lock:
+            self._check_fork()
+            semaphore = self._semaphores.setdefault(
+                (region_name, model_id), threading.BoundedSemaphore(self.max_concurrency)
             )
-            
-            # Available models in Bedrock
-            self.models = {
-                'claude': 'anthropic.claude-3-sonnet-20240229-v1:0',
-                'llama': 'meta.llama2-70b-chat-v1',
-                'titan': 'amazon.titan-text-express-v1'
+        
+        if not semaphore.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise BedrockBusyError(f"{model_id} has {self.max_concurrency} requests in flight")
+        
+        # Counters are shared by every request thread, so they change under the lock
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            semaphore.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'in_flight': self.in_flight,
+                'rejected': self.rejected,
+                'max_concurrency': self.max_concurrency
             }
+
+
+bedrock_clients = BedrockClientManager()
+
+# Coalesces identical Bedrock invocations made at the same time
+bedrock_flights = SingleFlight()
+
+# Cached Bedrock answers are reused for questions at least this similar (cosine of TF-IDF vectors)
+SEMANTIC_CACHE_THRESHOLD = 0.9
+SEMANTIC_CACHE_TTL = 6 * 60 * 60
+SEMANTIC_CACHE_SIZE = 512
+
+# Context entries that change on every call and do not affect the answer
+VOLATILE_CONTEXT_KEYS = {'timestamp'}
+
+# Assistants that are not given a cache_scope share this one
+DEFAULT_CACHE_SCOPE = "shared"
+
+# Words that make a question lean on the conversation so far ("what about tomorrow?")
+FOLLOW_UP_WORDS = {
+    'it', 'its', 'this', 'that', 'these', 'those', 'he', 'him', 'his', 'she', 'her',
+    'they', 'them', 'their', 'also', 'else', 'more', 'again',
+    'same', 'above', 'previous', 'earlier', 'yeh', 'woh', 'iska', 'uska', 'aur',
+}
+FOLLOW_UP_PREFIXES = ('and ', 'what about', 'how about', 'but ', 'so ')
+
+
+def is_follow_up(question: str) -> bool:
+    """True if question probably only makes sense given the earlier conversation"""
+    text = question.lower().strip()
+    words = re.findall(r"[a-z']+", text)
+    return len(words) < 3 or text.startswith(FOLLOW_UP_PREFIXES) or any(word in FOLLOW_UP_WORDS for word in words)
+
+
+def _chatbot_vectorizer():
+    """The chatbot's current TfidfVectorizer (updated when Q&A pairs are added), or None"""
+    try:
+        import chatbot
+        return chatbot.trainer.vectorizer
+    except Exception:
+        return None
+
+
+class SemanticResponseCache:
+    """
+    Bedrock answers keyed on the TF-IDF vector of the question, so near-paraphrases
+    of an earlier question reuse its answer. Entries only match when their context
+    key (scope, model, stable context and, for follow-ups, history) is identical,
+    and when both questions contain the same words outside the vectorizer's
+    vocabulary, which the vectors cannot see ("capital of Germany" must not reuse
+    "capital of France").
+
+    Entries are grouped into buckets by (context key, unknown words), the only
+    entries a question can match, and each bucket keeps its vectors stacked in
+    one matrix, so a lookup is a single sparse product over its bucket instead
+    of a scan of the whole cache. The product runs outside the lock.
+    """
+    
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, maxsize: int = SEMANTIC_CACHE_SIZE,
+                 ttl: float = SEMANTIC_CACHE_TTL, vectorizer=None, min_terms: int = 2):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.vectorizer = vectorizer
+        # Questions with fewer known terms ("and him?") are too vague to match safely
+        self.min_terms = min_terms
+        
+        self._entries = OrderedDict()  # (context_key, question) -> [vector, unknown_words, answer, expires_at]
+        self._buckets = {}             # (context_key, unknown_words) -> [entry keys, stacked vectors or None]
+        self._vectorizer_used = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def _encode(vectorizer, question):
+        """L2-normalised TF-IDF row plus the set of words the vocabulary does not know"""
+        vocabulary = vectorizer.vocabulary_
+        unknown_words = frozenset(word for word in vectorizer.build_analyzer()(question) if word not in vocabulary)
+        return normalize(vectorizer.transform([question])), unknown_words
+    
+    def _vectorize(self, question):
+        """(vector, unknown_words) for question, or None if it has too few known terms"""
+        vectorizer = self.vectorizer or _chatbot_vectorizer()
+        if vectorizer is None:
+            return None
+        
+        if vectorizer is not self._vectorizer_used:
+            # Vocabulary or IDF changed: re-encode stored questions so vectors stay comparable
+            self._buckets = {}
+            for key, entry in self._entries.items():
+                entry[0], entry[1] = self._encode(vectorizer, key[1])
+                self._bucket_add(key, entry[1])
+            self._vectorizer_used = vectorizer
+        
+        vector, unknown_words = self._encode(vectorizer, question)
+        return (vector, unknown_words) if vector.nnz >= self.min_terms else None
+    
+    def _bucket_add(self, key, unknown_words):
+        bucket = self._buckets.setdefault((key[0], unknown_words), [[], None])
+        bucket[0].append(key)
+        bucket[1] = None
+    
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        bucket_key = (key[0], entry[1])
+        bucket = self._buckets[bucket_key]
+        bucket[0].remove(key)
+        bucket[1] = None
+        if not bucket[0]:
+            del self._buckets[bucket_key]
+    
+    def get(self, question: str, context_key: str) -> Optional[str]:
+        """Stored answer for the most similar compatible question, or None"""
+        keys = matrix = None
+        with self._lock:
+            encoded = self._vectorize(question.lower())
+            if encoded is not None:
+                vector, unknown_words = encoded
+                bucket = self._buckets.get((context_key, unknown_words))
+                if bucket is not None:
+                    if bucket[1] is None:
+                        bucket[1] = vstack([self._entries[key][0] for key in bucket[0]], format='csr')
+                    keys, matrix = list(bucket[0]), bucket[1]
+        
+        best_key = None
+        if keys:
+            scores = (matrix @ vector.T).toarray().ravel()
+            best = int(scores.argmax())
+            if scores[best] >= self.threshold:
+                best_key = keys[best]
+        
+        with self._lock:
+            entry = self._entries.get(best_key) if best_key is not None else None
+            if entry is not None and entry[3] <= time.time():
+                self._remove(best_key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
             
-            self.current_model = self.models['claude']  # Default to Claude
-            self.conversation_history = []
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return entry[2]
+    
+    def set(self, question: str, context_key: str, answer: str):
+        """Store answer for question under context_key"""
+        if not answer:
+            return
+        with self._lock:
+            encoded = self._vectorize(question.lower())
+            if encoded is None:
+                return
+            
+            key = (context_key, question.lower())
+            self._remove(key)
+            self._entries[key] = [*encoded, answer, time.time() + self.ttl]
+            self._bucket_add(key, encoded[1])
+            
+            # Oldest first: drop what has expired, then whatever is over the size limit
+            now = time.time()
+            while self._entries:
+                oldest_key, oldest = next(iter(self._entries.items()))
+                if oldest[3] > now and len(self._entries) <= self.maxsize:
+                    break
+                if oldest[3] > now:
+                    self.evictions += 1
+                self._remove(oldest_key)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'buckets': len(self._buckets),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+# Default store for every assistant in the process; entries are kept apart by
+# cache_scope (see BedrockEnhancedAssistant.cache_key)
+semantic_cache = SemanticResponseCache()
+
+
+# Prompt budget for conversation history, in estimated tokens
+HISTORY_TOKEN_BUDGET = 1200
+RECENT_TURNS = 3            # newest exchanges kept verbatim (budget permitting)
+SUMMARY_TOKEN_BUDGET = 300  # older exchanges are folded into this rolling summary
+TURN_OVERHEAD_TOKENS = 6    # "User:" / "Assistant:" labels and newlines
+
+SUMMARY_HEADER = "\n\nEarlier conversation (summary):\n"
+RECENT_HEADER = "\n\nRecent conversation:\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)"""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def clip_to_tokens(text: str, tokens: int) -> str:
+    """Cut text to roughly the given number of tokens"""
+    limit = max(tokens, 0) * 4
+    return text if len(text) <= limit else text[:max(limit - 1, 0)].rstrip() + "…"
+
+
+class ConversationMemory:
+    """
+    Conversation history with a bounded prompt footprint: the newest turns are
+    kept verbatim and older ones are collapsed into a short rolling summary, so
+    render() never exceeds token_budget however long the answers are
+    """
+    
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET, recent_turns: int = RECENT_TURNS,
+                 summary_budget: int = SUMMARY_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        # The summary may use at most half the budget so recent turns always have room
+        self.summary_budget = min(summary_budget, token_budget // 2)
+        self.turns = []           # verbatim exchanges, oldest first
+        self.summary_lines = []   # (line, tokens), oldest first
+    
+    @staticmethod
+    def _turn_tokens(turn: Dict[str, Any]) -> int:
+        return estimate_tokens(turn['user']) + estimate_tokens(turn['assistant']) + TURN_OVERHEAD_TOKENS
+    
+    @property
+    def summary_tokens(self) -> int:
+        return sum(tokens for _, tokens in self.summary_lines)
+    
+    @property
+    def tokens(self) -> int:
+        """Estimated prompt tokens of the rendered history"""
+        return estimate_tokens(self.render())
+    
+    def add(self, user_input: str, ai_response: str):
+        self.turns.append({
+            'user': user_input,
+            'assistant': ai_response,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+        # Fold the oldest turns into the summary until the rest fit
+        while self.turns and (
+            len(self.turns) > self.recent_turns
+            or (len(self.turns) > 1 and
+                self.summary_tokens + sum(self._turn_tokens(turn) for turn in self.turns) > self.token_budget)
+        ):
+            self._summarize(self.turns.pop(0))
+    
+    def _summarize(self, turn: Dict[str, Any]):
+        """Add a one-line digest of turn to the summary, dropping the oldest lines beyond its budget"""
+        first_sentence = re.split(r'(?<=[.!?])\s', turn['assistant'].strip(), maxsplit=1)[0]
+        line = (f"- User asked: {clip_to_tokens(' '.join(turn['user'].split()), 25)} "
+                f"→ {clip_to_tokens(' '.join(first_sentence.split()), 35)}")
+        self.summary_lines.append((line, estimate_tokens(line) + 1))
+        
+        while self.summary_lines and self.summary_tokens + estimate_tokens(SUMMARY_HEADER) > self.summary_budget:
+            self.summary_lines.pop(0)
+    
+    def render(self) -> str:
+        """History section of the prompt ("" when empty)"""
+        parts = []
+        remaining = self.token_budget
+        
+        if self.summary_lines:
+            parts.append(SUMMARY_HEADER + "\n".join(line for line, _ in self.summary_lines))
+            remaining -= self.summary_tokens + estimate_tokens(SUMMARY_HEADER)
+        
+        if self.turns:
+            remaining -= estimate_tokens(RECENT_HEADER)
+            # Newest turns first get the remaining budget; an oversized answer is clipped
+            rendered = []
+            for turn in reversed(self.turns):
+                if remaining <= TURN_OVERHEAD_TOKENS:
+                    break
+                user = clip_to_tokens(turn['user'], (remaining - TURN_OVERHEAD_TOKENS) // 2)
+                assistant = clip_to_tokens(turn['assistant'], remaining - TURN_OVERHEAD_TOKENS - estimate_tokens(user))
+                rendered.append(f"User: {user}\nAssistant: {assistant}\n")
+                remaining -= estimate_tokens(user) + estimate_tokens(assistant) + TURN_OVERHEAD_TOKENS
+            if rendered:
+                parts.append(RECENT_HEADER + "".join(reversed(rendered)))
+        
+        return "".join(parts)
+    
+    def clear(self):
+        self.turns = []
+        self.summary_lines = []
+
+
+class BedrockEnhancedAssistant:
+    """Enhanced assistant using AWS Bedrock"""
+    
+    def __init__(self, region_name: str = 'us-east-1', client=None, cache: SemanticResponseCache = None,
+                 memory: ConversationMemory = None, cache_scope: str = None):
+        """
+        Initialize Bedrock client (pass client to use a preconfigured or stub client).
+        cache_scope names the user or session whose cached answers this assistant may
+        reuse; assistants without one share DEFAULT_CACHE_SCOPE, so general questions
+        are answered once for everyone. Pass a scope when the context carries
+        personal data.
+        """
+        self.cache = cache or semantic_cache
+        self.cache_scope = cache_scope or DEFAULT_CACHE_SCOPE
+        self.memory = memory or ConversationMemory()
+        
+        # Available models in Bedrock
+        self.models = {
+            'claude': 'anthropic.claude-3-sonnet-20240229-v1:0',
+            'llama': 'meta.llama2-70b-chat-v1',
+            'titan': 'amazon.titan-text-express-v1'
+        }
+        
+        self.current_model = self.models['claude']  # Default to Claude
+        
+        self.region_name = region_name
+        
+        try:
+            # Shared AWS Bedrock client for this region (connections and credentials are reused)
+            self.bedrock_client = client or bedrock_clients.get_client(region_name)
             
             print("✅ AWS Bedrock initialized successfully!")
             
@@ -42,6 +462,11 @@ class BedrockEnhancedAssistant:
         """Check if Bedrock is available"""
         return self.bedrock_client is not None
     
+    @property
+    def conversation_history(self) -> List[Dict[str, Any]]:
+        """Exchanges still kept verbatim (older ones live in memory.summary_lines)"""
+        return self.memory.turns
+    
     def enhance_prompt(self, user_input: str, context: Dict[str, Any] = None) -> str:
         """Enhance user prompt with context and instructions"""
         
@@ -64,12 +489,8 @@ Guidelines:
 - Keep responses concise but informative
 """
         
-        # Add conversation history for context
-        conversation_context = ""
-        if self.conversation_history:
-            conversation_context = "\n\nRecent conversation:\n"
-            for entry in self.conversation_history[-3:]:  # Last 3 exchanges
-                conversation_context += f"User: {entry['user']}\nAssistant: {entry['assistant']}\n"
+        # Add conversation history for context (bounded by the memory's token budget)
+        conversation_context = self.memory.render()
         
         # Add current context if provided
         current_context = ""
@@ -80,46 +501,96 @@ Guidelines:
         
         return enhanced_prompt
     
+    def build_request_body(self, enhanced_prompt: str) -> Dict[str, Any]:
+        """Request body for the current model"""
+        if 'claude' in self.current_model:
+            return {
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": 1000,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": enhanced_prompt
+                    }
+                ]
+            }
+        elif 'llama' in self.current_model:
+            return {
+                "prompt": enhanced_prompt,
+                "max_gen_len": 1000,
+                "temperature": 0.7,
+                "top_p": 0.9
+            }
+        else:  # Titan
+            return {
+                "inputText": enhanced_prompt,
+                "textGenerationConfig": {
+                    "maxTokenCount": 1000,
+                    "temperature": 0.7,
+                    "topP": 0.9
+                }
+            }
+    
+    def remember(self, user_input: str, ai_response: str):
+        """Add an exchange to the conversation history"""
+        self.memory.add(user_input, ai_response)
+    
+    def cache_key(self, user_input: str, context: Dict[str, Any] = None) -> str:
+        """
+        Answers are only shared between calls in the same scope with the same model
+        and stable context. A follow-up like "what about tomorrow?" means something
+        different in every conversation, so for those the conversation so far is
+        part of the key too; standalone questions ignore it.
+        """
+        stable_context = {key: value for key, value in (context or {}).items() if key not in VOLATILE_CONTEXT_KEYS}
+        history = self.memory.render() if is_follow_up(user_input) else ""
+        history_digest = hashlib.sha1(history.encode('utf-8')).hexdigest() if history else ""
+        return (f"{self.cache_scope}|{self.current_model}|{history_digest}|"
+                f"{json.dumps(stable_context, sort_keys=True, default=str)}")
+    
     def get_bedrock_response(self, user_input: str, context: Dict[str, Any] = None) -> Optional[str]:
         """Get response from AWS Bedrock"""
         
         if not self.is_available():
             return None
         
+        cache_key = self.cache_key(user_input, context)
+        cached = self.cache.get(user_input, cache_key)
+        if cached:
+            print("⚡ Semantic cache hit - reusing Bedrock answer")
+            self.remember(user_input, cached)
+            return cached
+        
         try:
             # Enhance the prompt
             enhanced_prompt = self.enhance_prompt(user_input, context)
             
-            # Prepare request body based on model
-            if 'claude' in self.current_model:
-                body = {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 1000,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": enhanced_prompt
-                        }
-                    ]
-                }
-            elif 'llama' in self.current_model:
-                body = {
-                    "prompt": enhanced_prompt,
-                    "max_gen_len": 1000,
-                    "temperature": 0.7,
-                    "top_p": 0.9
-                }
-            else:  # Titan
-                body = {
-                    "inputText": enhanced_prompt,
-                    "textGenerationConfig": {
-                        "maxTokenCount": 1000,
-                        "temperature": 0.7,
-                        "topP": 0.9
-                    }
-                }
+            # Identical prompts in flight at once (same question, same history) share one call
+            ai_response = bedrock_flights.do(
+                (self.region_name, self.current_model, enhanced_prompt),
+                lambda: self.invoke_model(enhanced_prompt)
+            )
             
-            # Make request to Bedrock
+            # Update conversation history
+            self.remember(user_input, ai_response)
+            
+            self.cache.set(user_input, cache_key, ai_response.strip())
+            return ai_response.strip()
+            
+        except BedrockBusyError as e:
+            print(f"⏳ Bedrock busy, using fallback: {e}")
+            return None
+        except Exception as e:
+            print(f"❌ Bedrock API error: {e}")
+            return None
+    
+    def invoke_model(self, prompt: str) -> str:
+        """Send one prompt to the current model and return the generated text"""
+        # Prepare request body based on model
+        body = self.build_request_body(prompt)
+        
+        # Make request to Bedrock
+        with bedrock_clients.invocation_slot(self.region_name, self.current_model):
             response = self.bedrock_client.invoke_model(
                 modelId=self.current_model,
                 body=json.dumps(body),
@@ -129,31 +600,87 @@ Guidelines:
             
             # Parse response
             response_body = json.loads(response['body'].read())
-            
-            # Extract text based on model
-            if 'claude' in self.current_model:
-                ai_response = response_body['content'][0]['text']
-            elif 'llama' in self.current_model:
-                ai_response = response_body['generation']
-            else:  # Titan
-                ai_response = response_body['results'][0]['outputText']
-            
-            # Update conversation history
-            self.conversation_history.append({
-                'user': user_input,
-                'assistant': ai_response,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            # Keep only last 10 exchanges
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
-            
-            return ai_response.strip()
-            
+        
+        # Extract text based on model
+        if 'claude' in self.current_model:
+            return response_body['content'][0]['text']
+        elif 'llama' in self.current_model:
+            return response_body['generation']
+        else:  # Titan
+            return response_body['results'][0]['outputText']
+    
+    def extract_chunk_text(self, data: Dict[str, Any]) -> str:
+        """Text carried by one decoded response-stream chunk of the current model"""
+        if 'claude' in self.current_model:
+            if data.get('type') == 'content_block_delta' and data['delta'].get('type') == 'text_delta':
+                return data['delta']['text']
+            return ''
+        elif 'llama' in self.current_model:
+            return data.get('generation') or ''
+        else:  # Titan
+            return data.get('outputText') or ''
+    
+    def stream_bedrock_response(self, user_input: str, context: Dict[str, Any] = None,
+                                remember: bool = True) -> Iterator[str]:
+        """
+        Yield the response text in chunks as Bedrock generates it, using
+        invoke_model_with_response_stream. Yields nothing if the request fails,
+        and raises BedrockStreamError if it fails after some chunks were yielded
+        (those chunks are then not an answer). Only a complete answer is cached
+        and remembered. Pass remember=False when the assistant is shared between users.
+        """
+        if not self.is_available():
+            return
+        
+        cache_key = self.cache_key(user_input, context)
+        cached = self.cache.get(user_input, cache_key)
+        if cached:
+            print("⚡ Semantic cache hit - reusing Bedrock answer")
+            if remember:
+                self.remember(user_input, cached)
+            yield cached
+            return
+        
+        chunks = []
+        try:
+            enhanced_prompt = self.enhance_prompt(user_input, context)
+            # The slot is held until the stream is fully read
+            with bedrock_clients.invocation_slot(self.region_name, self.current_model):
+                response = self.bedrock_client.invoke_model_with_response_stream(
+                    modelId=self.current_model,
+                    body=json.dumps(self.build_request_body(enhanced_prompt)),
+                    contentType='application/json',
+                    accept='application/json'
+                )
+                
+                for event in response['body']:
+                    chunk = event.get('chunk')
+                    if not chunk:
+                        continue
+                    text = self.extract_chunk_text(json.loads(chunk['bytes']))
+                    if text:
+                        # Models often open with whitespace; drop it so the first chunk renders cleanly
+                        if not chunks:
+                            text = text.lstrip()
+                            if not text:
+                                continue
+                        chunks.append(text)
+                        yield text
+        
+        except BedrockBusyError as e:
+            print(f"⏳ Bedrock busy, using fallback: {e}")
+            return
         except Exception as e:
-            print(f"❌ Bedrock API error: {e}")
-            return None
+            print(f"❌ Bedrock streaming error: {e}")
+            if chunks:
+                raise BedrockStreamError(f"stream stopped after {len(chunks)} chunks: {e}") from e
+            return
+        
+        if chunks:
+            ai_response = ''.join(chunks).strip()
+            self.cache.set(user_input, cache_key, ai_response)
+            if remember:
+                self.remember(user_input, ai_response)
     
     def switch_model(self, model_name: str) -> bool:
         """Switch to different Bedrock model"""
@@ -167,14 +694,14 @@ Guidelines:
     
     def clear_history(self):
         """Clear conversation history"""
-        self.conversation_history = []
+        self.memory.clear()
         print("✅ Conversation history cleared")
 
 # Integration with existing chatbot
 def get_enhanced_response(user_input: str, bedrock_assistant: BedrockEnhancedAssistant = None) -> str:
     """Get enhanced response using Bedrock with fallback to original system"""
     
-    # Initialize Bedrock assistant if not provided
+    # Initialize Bedrock assistant if not provided (cheap: the client is shared process-wide)
     if bedrock_assistant is None:
         bedrock_assistant = BedrockEnhancedAssistant()
     
@@ -208,6 +735,44 @@ def get_enhanced_response(user_input: str, bedrock_assistant: BedrockEnhancedAss
         web_response = search_web_answer(user_input)
         return web_response if web_response else "I'm here to help! Please try asking your question again."
 
+class StubBedrockClient:
+    """
+    Offline stand-in for the bedrock-runtime client: replies with a fixed text,
+    streamed in the chunk format of whichever model was requested
+    """
+    
+    def __init__(self, reply: str = "Hello from the stub model!", chunk_size: int = 5):
+        self.reply = reply
+        self.chunk_size = chunk_size
+        self.calls = []
+    
+    def _chunks(self) -> List[str]:
+        return [self.reply[i:i + self.chunk_size] for i in range(0, len(self.reply), self.chunk_size)]
+    
+    def invoke_model(self, modelId, body, **kwargs):
+        self.calls.append(('invoke_model', modelId))
+        if 'claude' in modelId:
+            payload = {'content': [{'type': 'text', 'text': self.reply}]}
+        elif 'llama' in modelId:
+            payload = {'generation': self.reply}
+        else:
+            payload = {'results': [{'outputText': self.reply}]}
+        return {'body': io.BytesIO(json.dumps(payload).encode())}
+    
+    def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+        self.calls.append(('invoke_model_with_response_stream', modelId))
+        if 'claude' in modelId:
+            events = [{'type': 'message_start'}, {'type': 'content_block_start', 'index': 0}]
+            events += [{'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': text}}
+                       for text in self._chunks()]
+            events += [{'type': 'content_block_stop', 'index': 0}, {'type': 'message_stop'}]
+        elif 'llama' in modelId:
+            events = [{'generation': text, 'stop_reason': None} for text in self._chunks()]
+            events.append({'generation': '', 'stop_reason': 'stop'})
+        else:
+            events = [{'outputText': text, 'index': 0} for text in self._chunks()]
+        return {'body': ({'chunk': {'bytes': json.dumps(event).encode()}} for event in events)}
+
 # Test function
 def test_bedrock_integration():
     """Test Bedrock integration"""
@@ -234,5 +799,141 @@ def test_bedrock_integration():
         print(f"✅ Response: {response[:200]}...")
         print("-" * 30)
 
+def test_bedrock_streaming():
+    """Check streamed output for every model against the offline stub (no AWS needed)"""
+    print("🧪 Testing Bedrock streaming with stub client...")
+    
+    stub = StubBedrockClient(reply="Streaming works for every model.")
+    # Cosine similarity never exceeds 1, so this cache never answers and every call streams
+    assistant = BedrockEnhancedAssistant(client=stub, cache=SemanticResponseCache(threshold=2.0))
+    
+    for model_name in assistant.models:
+        assistant.switch_model(model_name)
+        assistant.clear_history()
+        
+        chunks = list(assistant.stream_bedrock_response("Say something"))
+        assert len(chunks) > 1, f"{model_name}: expected several chunks, got {chunks}"
+        assert ''.join(chunks) == stub.reply, f"{model_name}: got {''.join(chunks)!r}"
+        assert assistant.conversation_history[-1]['assistant'] == stub.reply
+        assert assistant.get_bedrock_response("Say something") == stub.reply
+        print(f"✅ {model_name}: {len(chunks)} chunks")
+    
+    # Shared assistants must not record other users' questions
+    assistant.clear_history()
+    list(assistant.stream_bedrock_response("private question", remember=False))
+    assert assistant.conversation_history == []
+    print("✅ Bedrock streaming test passed")
+
+def test_semantic_cache():
+    """Paraphrases hit the cache, unrelated questions and other contexts do not (no AWS needed)"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    print("🧪 Testing Bedrock semantic cache...")
+    
+    vectorizer = TfidfVectorizer().fit([
+        "what is machine learning", "explain machine learning to me",
+        "what is the capital of france", "how do i manage expenses"
+    ])
+    stub = StubBedrockClient(reply="Machine learning lets computers learn from data.")
+    assistant = BedrockEnhancedAssistant(client=stub, cache=SemanticResponseCache(threshold=0.8, vectorizer=vectorizer))
+    context = {'timestamp': datetime.now().isoformat(), 'user_location': 'Dehradun, India'}
+    
+    assistant.get_bedrock_response("What is machine learning?", context)
+    context['timestamp'] = datetime.now().isoformat()
+    assert assistant.get_bedrock_response("what is Machine Learning", context) == stub.reply
+    assert len(stub.calls) == 1, "paraphrase should be served from the cache, mid-conversation too"
+    
+    assistant.get_bedrock_response("And how does it learn from data?", context)
+    assistant.clear_history()
+    assistant.get_bedrock_response("And how does it learn from data?", context)
+    assert len(stub.calls) == 3, "a follow-up must only reuse answers given after the same conversation"
+    
+    assistant.get_bedrock_response("What is the capital of France?", context)
+    assert len(stub.calls) == 4, "unrelated question must call Bedrock"
+    
+    assistant.get_bedrock_response("What is the capital of Germany?", context)
+    assert len(stub.calls) == 5, "a word the vocabulary does not know must still tell questions apart"
+    
+    assistant.get_bedrock_response("What is machine learning?", {'user_location': 'Delhi'})
+    assert len(stub.calls) == 6, "different context must call Bedrock"
+    
+    assert ''.join(assistant.stream_bedrock_response("what is machine learning", context, remember=False)) == stub.reply
+    assert len(stub.calls) == 6
+    
+    # A fresh assistant (as get_enhanced_response makes) shares the default scope ...
+    BedrockEnhancedAssistant(client=stub, cache=assistant.cache).get_bedrock_response("what is machine learning", context)
+    assert len(stub.calls) == 6, "assistants without a scope share general answers"
+    
+    # ... but one given its own scope does not see other users' answers
+    private = BedrockEnhancedAssistant(client=stub, cache=assistant.cache, cache_scope="user-42")
+    private.get_bedrock_response("What is machine learning?", context)
+    assert len(stub.calls) == 7, "another scope must not see this one's answers"
+    print(f"✅ Semantic cache test passed: {assistant.cache.stats()}")
+
+def test_conversation_memory():
+    """History stays within its token budget however long the answers get"""
+    print("🧪 Testing conversation memory budget...")
+    
+    memory = ConversationMemory(token_budget=400, recent_turns=3, summary_budget=120)
+    for turn in range(25):
+        memory.add(f"Question number {turn} about topic {turn}?", f"Answer {turn}. " + "Long explanation. " * 200)
+        assert memory.tokens <= memory.token_budget, f"turn {turn}: {memory.tokens} tokens"
+    
+    rendered = memory.render()
+    assert len(memory.turns) <= 3
+    assert "Question number 24" in rendered, "newest turn must be kept"
+    assert "Earlier conversation (summary)" in rendered
+    assert memory.summary_tokens <= memory.summary_budget
+    print(f"✅ Conversation memory test passed: {memory.tokens} tokens, {len(memory.summary_lines)} summary lines")
+
+def test_concurrency_limit():
+    """Calls beyond the concurrency cap fail fast instead of queueing; identical calls are coalesced"""
+    print("🧪 Testing Bedrock concurrency limit...")
+    
+    class SlowStub(StubBedrockClient):
+        def invoke_model(self, modelId, body, **kwargs):
+            time.sleep(0.3)
+            return super().invoke_model(modelId, body, **kwargs)
+    
+    global bedrock_clients
+    shared_clients = bedrock_clients
+    bedrock_clients = BedrockClientManager(max_concurrency=2, queue_timeout=0.05)
+    try:
+        stub = SlowStub()
+        results = []
+        
+        def ask(number):
+            assistant = BedrockEnhancedAssistant(client=stub, cache=SemanticResponseCache(threshold=2.0))
+            results.append(assistant.get_bedrock_response(f"question {number}"))
+        
+        threads = [threading.Thread(target=ask, args=(number,)) for number in range(6)]
+        started = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert results.count(stub.reply) == 2, results
+        assert results.count(None) == 4, results
+        assert time.time() - started < 1.0, "rejected calls must not wait for a slot"
+        
+        # Identical prompts in flight together take one slot and one call
+        stub.calls.clear()
+        results.clear()
+        threads = [threading.Thread(target=ask, args=("same",)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert results == [stub.reply] * 6, results
+        assert len(stub.calls) == 1, stub.calls
+        print(f"✅ Concurrency limit test passed: {bedrock_clients.stats()}")
+    finally:
+        bedrock_clients = shared_clients
+
 if __name__ == "__main__":
+    test_bedrock_streaming()
+    test_concurrency_limit()
+    test_semantic_cache()
+    test_conversation_memory()
     test_bedrock_integration()
\ No newline at end of file
@@ -1,45 +1,262 @@
-from dataset_trainer import train_dataset
-from dataset_bot import dataset_answer
-
-# Load and train the dataset when the module is imported
-print("Loading dataset...")
-questions, answers, vectorizer, question_vectors = train_dataset(
-    "dataset.json",
-    "intents.json"
-)
-print("Dataset loaded successfully!")
-
-def get_response(user_input):
-    """
-    Get response from the chatbot for the given user input
-    """
-    if not user_input.strip():
-        return "Please ask me something!"
-    
-    # Try smart assistant first
-    try:
-        from smart_assistant import get_smart_response
-        
-        # Check if input needs smart features
-        smart_keywords = [
-            'schedule', 'reminder', 'expense', 'money', 'study', 'padhai',
-            'weather', 'mausam', 'today', 'aaj', 'kal', 'tomorrow',
-            'add', 'log', 'kharcha', 'paisa'
-        ]
-        
-        if any(keyword in user_input.lower() for keyword in smart_keywords):
-            return get_smart_response(user_input)
-    
-    except ImportError:
-        pass
-    
-    # Fallback to original chatbot
-    response = dataset_answer(
-        user_input.lower(),
-        questions,
-        answers,
-        vectorizer,
-        question_vectors
-    )
-    
-    return response
\ No newline at end of file
+import os
+
+from dataset_trainer import IncrementalTrainer
+from dataset_bot import dataset_match, dataset_best_matches, NO_ANSWER_MESSAGE
+from response_cache import ResponseCache
+from single_flight import SingleFlight, AsyncSingleFlight, ProcessKeyLock
+from text_normalizer import normalize_cache_key
+
+# Map the compiled index (retrains only when dataset.json / intents.json change).
+# Arrays and Q&A strings are memory-mapped, so gunicorn workers share one copy.
+# Pairs pushed at runtime (admin API) are journaled to dataset_updates.jsonl and
+# replayed by every worker until a compaction folds them into a new compiled index;
+# read the index through trainer.snapshot() so one request sees one generation.
+print("Loading dataset...")
+trainer = IncrementalTrainer.open("dataset.json", "intents.json")
+trainer.sync_journal()
+print("Dataset loaded successfully!")
+
+# Memoised responses per source; set RESPONSE_CACHE_DB="" to keep the cache in memory only
+response_cache = ResponseCache(db_path=os.environ.get("RESPONSE_CACHE_DB", "response_cache.db") or None)
+
+# Identical questions arriving together share one computation. With the shared
+# SQLite cache, workers also take turns per question, so the second worker
+# reads the first one's answer instead of repeating the web search.
+inflight = SingleFlight()
+inflight_async = AsyncSingleFlight()
+worker_locks = ProcessKeyLock(response_cache.db_path + ".lock") if response_cache.db_path else None
+
+# Inputs containing any of these are routed to the smart assistant
+SMART_KEYWORDS = [
+    'schedule', 'reminder', 'expense', 'money', 'study', 'padhai',
+    'weather', 'mausam', 'today', 'aaj', 'kal', 'tomorrow',
+    'add', 'log', 'kharcha', 'paisa'
+]
+
+def needs_smart_features(user_input):
+    """Check if input should be handled by the smart assistant"""
+    text_lower = user_input.lower()
+    return any(keyword in text_lower for keyword in SMART_KEYWORDS)
+
+def cached_response(source, user_input, compute):
+    """Return the cached response for (source, user_input), computing and storing it on a miss"""
+    response = response_cache.get(source, user_input)
+    if response is None:
+        if not response_cache.source_ttls.get(source):
+            # Uncached sources (e.g. smart) act on user data, so each call must run
+            return compute()
+        key = (source, normalize_cache_key(user_input))
+        response = inflight.do(key, lambda: compute_across_workers(key, source, user_input, compute))
+    return response
+
+def compute_across_workers(key, source, user_input, compute):
+    """Run compute() for a cache miss while holding the key's worker lock"""
+    offset = worker_locks.acquire(key) if worker_locks else None
+    try:
+        # Another worker may have answered while we waited for the lock
+        response = response_cache.get(source, user_input) if worker_locks else None
+        if response is None:
+            response = compute()
+            response_cache.set(source, user_input, response)
+        return response
+    finally:
+        if worker_locks:
+            worker_locks.release(offset)
+
+def cached_web_search(question):
+    """search_web_answer behind the response cache (the slowest source by far)"""
+    from web_search_helper import search_web_answer
+    return cached_response('web', question, lambda: search_web_answer(question))
+
+def sync_dataset_updates():
+    """Apply pairs added by other workers; cached dataset answers may now be stale"""
+    if trainer.sync_journal():
+        response_cache.clear_source('dataset')
+
+def local_response(user_input):
+    """
+    Answer from the smart assistant or the dataset, or None when the
+    question needs the web fallback
+    """
+    if not user_input.strip():
+        return "Please ask me something!"
+
+    # Try smart assistant first
+    try:
+        from smart_assistant import get_smart_response
+
+        # Check if input needs smart features
+        if needs_smart_features(user_input):
+            return cached_response('smart', user_input, lambda: get_smart_response(user_input))
+
+    except ImportError:
+        pass
+
+    # Pick up pairs added by other workers since the last request
+    sync_dataset_updates()
+
+    # Fallback to original chatbot
+    text_lower = user_input.lower()
+    response = response_cache.get('dataset', text_lower)
+    if response is None:
+        questions, answers, vectorizer, question_vectors, engine, exact_index = trainer.snapshot()
+        response = dataset_match(
+            text_lower,
+            questions,
+            answers,
+            vectorizer,
+            question_vectors,
+            engine=engine,
+            exact_index=exact_index
+        )
+        if response is not None:
+            response_cache.set('dataset', text_lower, response)
+
+    return response
+
+def get_response(user_input):
+    """
+    Get response from the chatbot for the given user input
+    """
+    response = local_response(user_input)
+    if response is None:
+        # Otherwise, always search web for 100% accuracy
+        print("🌐 Searching web for guaranteed answer...")
+        response = cached_web_search(user_input.lower()) or NO_ANSWER_MESSAGE
+
+    return response
+
+async def get_response_async(user_input):
+    """
+    get_response for asyncio servers: the quick local lookup runs in a thread,
+    and the slow web fallback is awaited without holding one
+    """
+    import asyncio
+    from async_web_search import search_web_answer_async
+
+    response = await asyncio.to_thread(local_response, user_input)
+    if response is None:
+        print("🌐 Searching web for guaranteed answer...")
+        question = user_input.lower()
+        # The cache is SQLite-backed, so its calls block and stay off the event loop
+        response = await asyncio.to_thread(response_cache.get, 'web', question)
+        if response is None:
+            key = ('web', normalize_cache_key(question))
+
+            async def search():
+                offset = await asyncio.to_thread(worker_locks.acquire, key) if worker_locks else None
+                try:
+                    answer = await asyncio.to_thread(response_cache.get, 'web', question) if worker_locks else None
+                    if answer is None:
+                        answer = await search_web_answer_async(question)
+                        await asyncio.to_thread(response_cache.set, 'web', question, answer)
+                    return answer
+                finally:
+                    if worker_locks:
+                        worker_locks.release(offset)
+
+            response = await inflight_async.do(key, search)
+        response = response or NO_ANSWER_MESSAGE
+
+    return response
+
+def stream_response(user_input, bedrock_assistant=None):
+    """
+    Yield (event, data) pairs for a streamed answer. Quick sources give a
+    'final' event straight away; otherwise a 'provisional' answer comes first,
+    then Bedrock 'token' chunks (when an assistant is given) and the 'final' answer.
+    """
+    response = local_response(user_input)
+    if response is not None:
+        yield 'final', {'response': response, 'source': 'local'}
+        return
+
+    question = user_input.lower()
+    response = response_cache.get('web', question)
+    if response is not None:
+        yield 'final', {'response': response, 'source': 'cache'}
+        return
+
+    # The built-in knowledge base answers instantly; show it while slower sources run
+    from web_search_helper import search_google_like_api
+    provisional = search_google_like_api(question)
+    if provisional:
+        yield 'provisional', {'response': provisional, 'source': 'knowledge base'}
+    else:
+        yield 'status', {'message': '🔍 Searching for the best answer...'}
+
+    if bedrock_assistant is not None and bedrock_assistant.is_available():
+        from aws_bedrock_integration import BedrockStreamError
+
+        chunks = []
+        try:
+            for chunk in bedrock_assistant.stream_bedrock_response(user_input, remember=False):
+                chunks.append(chunk)
+                yield 'token', {'text': chunk}
+        except BedrockStreamError as e:
+            # The tokens sent so far are a fragment; tell the client and answer from the web instead
+            yield 'error', {'error': f"AI answer interrupted: {e}"}
+            chunks = []
+        if chunks:
+            yield 'final', {'response': f"🧠 **Enhanced AI Response:**\n\n{''.join(chunks).strip()}", 'source': 'bedrock'}
+            return
+
+    print("🌐 Searching web for guaranteed answer...")
+    response = cached_web_search(question) or NO_ANSWER_MESSAGE
+    yield 'final', {'response': response, 'source': 'web'}
+
+def get_responses(user_inputs, threshold=0.85, web_fallback=False):
+    """
+    Get responses for many inputs at once (e.g. replaying chat logs).
+    Dataset matching is vectorised and scored as one batch; returns a list of
+    (response, similarity) tuples in input order. Similarity is None for inputs
+    that never reached the dataset matcher. Below-threshold inputs get None as
+    the response unless web_fallback is set.
+    """
+    results = [None] * len(user_inputs)
+    dataset_positions = []
+
+    try:
+        from smart_assistant import get_smart_response
+    except ImportError:
+        get_smart_response = None
+
+    for position, user_input in enumerate(user_inputs):
+        if not user_input.strip():
+            results[position] = ("Please ask me something!", None)
+        elif get_smart_response and needs_smart_features(user_input):
+            results[position] = (get_smart_response(user_input), None)
+        else:
+            dataset_positions.append(position)
+
+    sync_dataset_updates()
+    _, answers, vectorizer, question_vectors, engine, exact_index = trainer.snapshot()
+    matches = dataset_best_matches(
+        [user_inputs[position].lower() for position in dataset_positions],
+        vectorizer,
+        question_vectors,
+        engine=engine,
+        exact_index=exact_index
+    )
+
+    for position, (best_index, similarity) in zip(dataset_positions, matches):
+        if best_index is not None and similarity >= threshold:
+            results[position] = (answers[best_index], similarity)
+        elif web_fallback:
+            results[position] = (cached_web_search(user_inputs[position].lower()), similarity)
+        else:
+            results[position] = (None, similarity)
+
+    return results
+
+def get_match_stats():
+    """Counters for the exact-match fast path and index size"""
+    stats = trainer.exact_index.stats()
+    stats['indexed_questions'] = trainer.engine.size
+    return stats
+
+def get_cache_stats():
+    """Hit rate and memory use of the response cache, plus request coalescing counters"""
+    stats = response_cache.stats()
+    stats['coalesced'] = {'threads': inflight.stats(), 'async': inflight_async.stats()}
+    return stats
@@ -1,49 +1,108 @@
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from web_search_helper import search_web_answer
-
-def dataset_answer(user_question, questions, answers, vectorizer, question_vectors, threshold=0.85):
-    user_vec = vectorizer.transform([user_question])
-    similarities = cosine_similarity(user_vec, question_vectors)[0]
-
-    best_index = np.argmax(similarities)
-    best_similarity = similarities[best_index]
-    
-    print(f"🔍 User question: {user_question}")
-    print(f"📊 Best match: '{questions[best_index]}' (similarity: {best_similarity:.3f})")
-    print(f"🎯 Threshold: {threshold}")
-
-    # Higher threshold to ensure only very exact matches use dataset
-    if best_similarity >= threshold:
-        print(f"✅ Using dataset answer")
-        return answers[best_index]
-
-    # Otherwise, always search web for 100% accuracy
-    print(f"❌ No exact dataset match (similarity {best_similarity:.3f} < {threshold})")
-    print("🌐 Searching web for guaranteed answer...")
-    
-    web_answer = search_web_answer(user_question)
-    if web_answer:
-        return web_answer
-    
-    # This should never happen with the new guaranteed fallback
-    return "🤖 I'm processing your question and will provide an answer shortly. Please try asking again!"
-
-
-
-
-
-# import numpy as np
-# from sentence_transformers import SentenceTransformer, util
-
-# model = SentenceTransformer("all-MiniLM-L6-v2")
-
-# def dataset_answer(user_question, questions, answers, embeddings, threshold=0.6):
-#     query_embedding = model.encode([user_question])
-#     similarities = util.cos_sim(query_embedding, embeddings)[0]
-
-#     best_match = similarities.argmax()
-#     if similarities[best_match] >= threshold:
-#         return answers[best_match]
-
-#     return "Sorry, I don't know the answer to that yet."
+from retrieval_engine import SparseRetrievalEngine
+from web_search_helper import search_web_answer
+
+# Returned when even the guaranteed web fallback comes back empty
+NO_ANSWER_MESSAGE = "🤖 I'm processing your question and will provide an answer shortly. Please try asking again!"
+
+# Engine built for the most recent question_vectors passed without one
+_engine_cache = {"vectors": None, "engine": None}
+
+def get_engine(question_vectors):
+    """Return a retrieval engine for question_vectors, building it only once"""
+    if _engine_cache["vectors"] is not question_vectors:
+        _engine_cache["engine"] = SparseRetrievalEngine(question_vectors)
+        _engine_cache["vectors"] = question_vectors
+    return _engine_cache["engine"]
+
+def dataset_top_k(user_question, vectorizer, question_vectors, k=5, engine=None):
+    """Return up to k (question_index, similarity) pairs for user_question, best first"""
+    engine = engine or get_engine(question_vectors)
+    user_vec = vectorizer.transform([user_question])
+    return engine.top_k(user_vec, k)
+
+def dataset_best_matches(user_questions, vectorizer, question_vectors, engine=None, exact_index=None):
+    """Return one (question_index, similarity) pair per question, scored as a single batch"""
+    engine = engine or get_engine(question_vectors)
+    if not user_questions:
+        return []
+
+    results = [None] * len(user_questions)
+    remaining = []
+    for position, user_question in enumerate(user_questions):
+        exact_match = exact_index.lookup(user_question) if exact_index is not None else None
+        if exact_match is not None:
+            results[position] = (exact_match, 1.0)
+        else:
+            remaining.append(position)
+
+    if remaining:
+        user_vecs = vectorizer.transform([user_questions[position] for position in remaining])
+        for position, match in zip(remaining, engine.best_matches(user_vecs)):
+            results[position] = match
+
+    return results
+
+def dataset_match(user_question, questions, answers, vectorizer, question_vectors, threshold=0.85, engine=None,
+                  exact_index=None):
+    """Return the stored answer for user_question, or None when no question clears the threshold"""
+    # Fast path: normalised question already stored verbatim, no vectorisation needed
+    if exact_index is not None:
+        exact_match = exact_index.lookup(user_question)
+        if exact_match is not None:
+            print(f"⚡ Exact match: '{questions[exact_match]}'")
+            return answers[exact_match]
+
+    hits = dataset_top_k(user_question, vectorizer, question_vectors, k=1, engine=engine)
+    best_index, best_similarity = hits[0] if hits else (None, 0.0)
+
+    print(f"🔍 User question: {user_question}")
+    if best_index is not None:
+        print(f"📊 Best match: '{questions[best_index]}' (similarity: {best_similarity:.3f})")
+    else:
+        print("📊 Best match: none (no shared terms)")
+    print(f"🎯 Threshold: {threshold}")
+
+    # Higher threshold to ensure only very exact matches use dataset
+    if best_index is not None and best_similarity >= threshold:
+        print(f"✅ Using dataset answer")
+        return answers[best_index]
+
+    print(f"❌ No exact dataset match (similarity {best_similarity:.3f} < {threshold})")
+    return None
+
+def dataset_answer(user_question, questions, answers, vectorizer, question_vectors, threshold=0.85, engine=None,
+                   exact_index=None, web_search=None):
+    answer = dataset_match(
+        user_question, questions, answers, vectorizer, question_vectors,
+        threshold=threshold, engine=engine, exact_index=exact_index
+    )
+    if answer is not None:
+        return answer
+
+    # Otherwise, always search web for 100% accuracy
+    print("🌐 Searching web for guaranteed answer...")
+
+    web_answer = (web_search or search_web_answer)(user_question)
+    if web_answer:
+        return web_answer
+
+    # This should never happen with the new guaranteed fallback
+    return NO_ANSWER_MESSAGE
+
+
+
+
+# import numpy as np
+# from sentence_transformers import SentenceTransformer, util
+
+# model = SentenceTransformer("all-MiniLM-L6-v2")
+
+# def dataset_answer(user_question, questions, answers, embeddings, threshold=0.6):
+#     query_embedding = model.encode([user_question])
+#     similarities = util.cos_sim(query_embedding, embeddings)[0]
+
+#     best_match = similarities.argmax()
+#     if similarities[best_match] >= threshold:
+#         return answers[best_match]
+
+#     return "Sorry, I don't know the answer to that yet."
@@ -1,40 +1,657 @@
-import json
-from sklearn.feature_extraction.text import TfidfVectorizer
-from intent_to_dataset import load_intents_as_qa
-
-def train_dataset(dataset_path, intents_path):
-    # ---------- LOAD dataset.json ----------
-    with open(dataset_path, encoding="utf-8") as f:
-        data = json.load(f)
-
-    questions = [item["question"].lower() for item in data]
-    answers = [item["answer"] for item in data]
-
-    # ---------- LOAD intents.json ----------
-    intent_q, intent_a = load_intents_as_qa(intents_path)
-
-    questions.extend(intent_q)
-    answers.extend(intent_a)
-
-    # ---------- TF-IDF ----------
-    vectorizer = TfidfVectorizer()
-    question_vectors = vectorizer.fit_transform(questions)
-
-    return questions, answers, vectorizer, question_vectors
-
-
-
-# import json
-# from sentence_transformers import SentenceTransformer
-
-# model = SentenceTransformer("all-MiniLM-L6-v2")
-
-# def train_dataset(path):
-#     with open(path, encoding="utf-8") as f:
-#         data = json.load(f)
-
-#     questions = [item["question"] for item in data]
-#     answers = [item["answer"] for item in data]
-
-#     embeddings = model.encode(questions)
-#     return questions, answers, embeddings
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: single process, nothing to coordinate
+
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+from intent_to_dataset import load_intents_as_qa
+from retrieval_engine import SparseRetrievalEngine, ExactMatchIndex
+from text_normalizer import normalize_text, HINGLISH_VARIANTS
+
+# Bump whenever the on-disk layout of the compiled index changes
+INDEX_FORMAT_VERSION = 3
+DEFAULT_INDEX_DIR = "index_cache"
+DEFAULT_JOURNAL_PATH = "dataset_updates.jsonl"
+
+def train_dataset(dataset_path, intents_path, updates_path=None):
+    # ---------- LOAD dataset.json ----------
+    with open(dataset_path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    questions = [item["question"].lower() for item in data]
+    answers = [item["answer"] for item in data]
+
+    # ---------- LOAD intents.json ----------
+    intent_q, intent_a = load_intents_as_qa(intents_path)
+
+    questions.extend(intent_q)
+    answers.extend(intent_a)
+
+    # ---------- Compacted admin updates ----------
+    if updates_path:
+        merge_pairs(questions, answers, read_journal(updates_path)[0])
+
+    # ---------- TF-IDF ----------
+    vectorizer = TfidfVectorizer()
+    question_vectors = vectorizer.fit_transform(questions)
+
+    return questions, answers, vectorizer, question_vectors
+
+
+def merge_pairs(questions, answers, pairs):
+    """Apply (question, answer) pairs in place: known questions get the new answer, others are appended"""
+    exact_index = ExactMatchIndex(questions)
+    for question, answer in pairs:
+        question = question.strip().lower()
+        row = exact_index.find(question)
+        if row is None:
+            exact_index.add(question, len(questions))
+            questions.append(question)
+            answers.append(answer)
+        else:
+            answers[row] = answer
+
+
+def read_journal(path, offset=0, file_id=None):
+    """
+    Return (pairs, end_offset, file_id) for the complete lines of a JSONL journal.
+    Reading resumes at offset only while the file is still file_id, so a journal
+    rotated by compaction is read from the start. A last line without newline is
+    still being written and is left for the next read.
+    """
+    pairs = []
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return pairs, 0, None
+    with f:
+        stat = os.fstat(f.fileno())
+        if (stat.st_dev, stat.st_ino) != file_id:
+            offset = 0
+        f.seek(offset)
+        for raw_line in f:
+            if not raw_line.endswith(b"\n"):
+                break
+            offset += len(raw_line)
+            try:
+                item = json.loads(raw_line.decode("utf-8"))
+                pairs.append((item["question"], item["answer"]))
+            except (ValueError, KeyError) as e:
+                print(f"⚠️ Skipping bad journal line: {e}")
+    return pairs, offset, (stat.st_dev, stat.st_ino)
+
+
+def _file_id(path):
+    """(device, inode, size, mtime) of path, or None when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+@contextlib.contextmanager
+def _file_lock(path, blocking=True):
+    """Exclusive flock on path across processes; yields False when non-blocking and already held"""
+    if fcntl is None:
+        yield True
+        return
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def source_fingerprint(*paths):
+    """Content hash of the source files (and index format) used to key the compiled index"""
+    digest = hashlib.sha256(f"format-{INDEX_FORMAT_VERSION}".encode())
+    # The stored exact-match keys depend on the spelling folds
+    digest.update(json.dumps(HINGLISH_VARIANTS, sort_keys=True).encode("utf-8"))
+    for path in paths:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            # Missing intents file is allowed by load_intents_as_qa, keep that behaviour
+            digest.update(b"<missing>")
+    return digest.hexdigest()
+
+
+class StringTable:
+    """
+    Read-only list of strings stored as one UTF-8 blob plus an offsets array.
+    Both are memory-mapped, so every worker process shares the same page cache
+    instead of holding its own copy. Strings added or replaced at runtime live
+    in a small per-process overlay.
+    """
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+        self._base_size = len(offsets) - 1
+        self._extra = []
+        self._replaced = {}
+
+    @classmethod
+    def write(cls, path_prefix, strings):
+        """Write strings to <path_prefix>.bin and <path_prefix>_offsets.npy"""
+        offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+        with open(path_prefix + ".bin", "wb") as f:
+            position = 0
+            for i, text in enumerate(strings):
+                encoded = text.encode("utf-8")
+                f.write(encoded)
+                position += len(encoded)
+                offsets[i + 1] = position
+        np.save(path_prefix + "_offsets.npy", offsets)
+
+    @classmethod
+    def open(cls, path_prefix):
+        offsets = np.load(path_prefix + "_offsets.npy", mmap_mode="r")
+        if offsets[-1] == 0:
+            # np.memmap cannot map an empty file
+            blob = np.zeros(0, dtype=np.uint8)
+        else:
+            blob = np.memmap(path_prefix + ".bin", dtype=np.uint8, mode="r")
+        return cls(blob, offsets)
+
+    def __len__(self):
+        return self._base_size + len(self._extra)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index >= self._base_size:
+            return self._extra[index - self._base_size]
+        if index in self._replaced:
+            return self._replaced[index]
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __setitem__(self, index, text):
+        if index < 0:
+            index += len(self)
+        if index >= self._base_size:
+            self._extra[index - self._base_size] = text
+        elif 0 <= index:
+            self._replaced[index] = text
+        else:
+            raise IndexError("StringTable index out of range")
+
+    def append(self, text):
+        self._extra.append(text)
+
+    def extend(self, texts):
+        self._extra.extend(texts)
+
+
+def save_index(index_path, questions, answers, vectorizer, question_vectors):
+    """
+    Write a compiled index to disk: vocabulary, IDF weights, the normalised CSR
+    question matrix, its CSC postings (inverted index), the Q&A string tables and
+    the exact-match table. Everything except the vocabulary is stored in a
+    memory-mappable layout.
+    """
+    parent = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(parent, exist_ok=True)
+
+    # Build in a temp dir next to the target so the final rename is atomic
+    tmp_dir = tempfile.mkdtemp(prefix=".building-", dir=parent)
+    try:
+        matrix = normalize(csr_matrix(question_vectors, dtype=np.float64), norm="l2")
+        postings = matrix.tocsc()
+        np.save(os.path.join(tmp_dir, "data.npy"), matrix.data)
+        np.save(os.path.join(tmp_dir, "indices.npy"), matrix.indices)
+        np.save(os.path.join(tmp_dir, "indptr.npy"), matrix.indptr)
+        np.save(os.path.join(tmp_dir, "postings_data.npy"), postings.data)
+        np.save(os.path.join(tmp_dir, "postings_indices.npy"), postings.indices)
+        np.save(os.path.join(tmp_dir, "postings_indptr.npy"), postings.indptr)
+        np.save(os.path.join(tmp_dir, "idf.npy"), vectorizer.idf_)
+
+        vocabulary = {term: int(idx) for term, idx in vectorizer.vocabulary_.items()}
+        with open(os.path.join(tmp_dir, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump(vocabulary, f, ensure_ascii=False)
+
+        StringTable.write(os.path.join(tmp_dir, "questions"), questions)
+        StringTable.write(os.path.join(tmp_dir, "answers"), answers)
+        exact_hashes, exact_rows = ExactMatchIndex.build_table(questions)
+        np.save(os.path.join(tmp_dir, "exact_hashes.npy"), exact_hashes)
+        np.save(os.path.join(tmp_dir, "exact_rows.npy"), exact_rows)
+
+        meta = {
+            "format_version": INDEX_FORMAT_VERSION,
+            "shape": list(matrix.shape),
+            "nnz": int(matrix.nnz),
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        try:
+            os.replace(tmp_dir, index_path)
+        except OSError:
+            # Another worker finished the same build first - theirs is identical
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def _open_index(index_path):
+    """Map a compiled index; returns (questions, answers, vectorizer, question_vectors, postings, exact_index)"""
+    with open(os.path.join(index_path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    if meta.get("format_version") != INDEX_FORMAT_VERSION:
+        raise ValueError(f"Unsupported index format: {meta.get('format_version')}")
+
+    def array(name):
+        return np.load(os.path.join(index_path, name), mmap_mode="r")
+
+    shape = tuple(meta["shape"])
+    question_vectors = csr_matrix(
+        (array("data.npy"), array("indices.npy"), array("indptr.npy")),
+        shape=shape,
+        copy=False
+    )
+    postings = csc_matrix(
+        (array("postings_data.npy"), array("postings_indices.npy"), array("postings_indptr.npy")),
+        shape=shape,
+        copy=False
+    )
+
+    with open(os.path.join(index_path, "vocabulary.json"), encoding="utf-8") as f:
+        vocabulary = json.load(f)
+
+    vectorizer = TfidfVectorizer()
+    vectorizer.vocabulary_ = vocabulary
+    vectorizer.idf_ = np.asarray(array("idf.npy"))
+
+    questions = StringTable.open(os.path.join(index_path, "questions"))
+    answers = StringTable.open(os.path.join(index_path, "answers"))
+    exact_index = ExactMatchIndex.from_table(questions, array("exact_hashes.npy"), array("exact_rows.npy"))
+
+    return questions, answers, vectorizer, question_vectors, postings, exact_index
+
+
+def load_index(index_path):
+    """Load a compiled index; arrays and strings are memory-mapped instead of parsed"""
+    return _open_index(index_path)[:4]
+
+
+def _remove_stale_indexes(index_dir, keep):
+    """Delete compiled indexes built from older versions of the sources"""
+    for name in os.listdir(index_dir):
+        if name == keep or name.startswith("."):
+            continue
+        shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+
+
+def load_or_build_engine(dataset_path, intents_path, index_dir=DEFAULT_INDEX_DIR, updates_path=None):
+    """
+    Return (questions, answers, vectorizer, question_vectors, engine, exact_index),
+    mapping the compiled index when the source files are unchanged and rebuilding it only when
+    they differ. The engine runs directly on the mapped arrays, so worker processes
+    opening the same index share its memory. updates_path is the compacted admin
+    journal, applied on top of the dataset.
+    """
+    sources = [dataset_path, intents_path] + ([updates_path] if updates_path else [])
+    fingerprint = source_fingerprint(*sources)
+    index_path = os.path.join(index_dir, fingerprint)
+
+    if not os.path.isdir(index_path):
+        questions, answers, vectorizer, question_vectors = train_dataset(dataset_path, intents_path, updates_path)
+        try:
+            save_index(index_path, questions, answers, vectorizer, question_vectors)
+            _remove_stale_indexes(index_dir, keep=fingerprint)
+        except OSError as e:
+            # A read-only deploy dir should not stop the chatbot from starting
+            print(f"⚠️ Could not write compiled index: {e}")
+            engine = SparseRetrievalEngine(question_vectors)
+            return questions, answers, vectorizer, question_vectors, engine, ExactMatchIndex(questions)
+
+    try:
+        questions, answers, vectorizer, question_vectors, postings, exact_index = _open_index(index_path)
+    except Exception as e:
+        print(f"⚠️ Compiled index unreadable, rebuilding: {e}")
+        shutil.rmtree(index_path, ignore_errors=True)
+        questions, answers, vectorizer, question_vectors = train_dataset(dataset_path, intents_path, updates_path)
+        engine = SparseRetrievalEngine(question_vectors)
+        return questions, answers, vectorizer, question_vectors, engine, ExactMatchIndex(questions)
+
+    engine = SparseRetrievalEngine(question_vectors, postings=postings)
+    return questions, answers, vectorizer, question_vectors, engine, exact_index
+
+
+def load_or_train_dataset(dataset_path, intents_path, index_dir=DEFAULT_INDEX_DIR, updates_path=None):
+    """
+    Return (questions, answers, vectorizer, question_vectors), loading the compiled
+    index when the source files are unchanged and rebuilding it only when they differ
+    """
+    return load_or_build_engine(dataset_path, intents_path, index_dir, updates_path)[:4]
+
+
+def compacted_updates_path(journal_path):
+    """File the journal is folded into on compaction, e.g. dataset_updates.compacted.jsonl"""
+    return os.path.splitext(journal_path)[0] + ".compacted.jsonl"
+
+
+class IncrementalTrainer:
+    """
+    Keeps a trained index live so Q&A pairs can be added without a full refit.
+    A question that is already indexed keeps its row and only gets the new answer.
+    New questions are tokenised with the existing analyzer, unseen terms extend the
+    vocabulary and the rows go to a small per-worker delta in the retrieval engine,
+    next to the read-only memory-mapped base.
+
+    Pairs are shared between workers through an append-only journal. compact()
+    folds the journal into a compacted updates file and compiles a new index from
+    it, which also recomputes every IDF weight; every worker then maps that index,
+    drops its delta and the journal starts empty again. It runs in the background
+    once refresh_every new questions or compact_bytes of journal have piled up.
+    """
+
+    def __init__(self, questions, answers, vectorizer, question_vectors,
+                 engine=None, refresh_every=500, journal_path=None, exact_index=None,
+                 sources=None, compact_bytes=1 << 20):
+        self.refresh_every = refresh_every
+        self.journal_path = journal_path
+        self.updates_path = compacted_updates_path(journal_path) if journal_path else None
+        # (dataset_path, intents_path, index_dir) the compiled index is built from
+        self.sources = sources
+        self.compact_bytes = compact_bytes
+
+        self._lock = threading.RLock()
+        self._compacting = threading.Lock()
+        self._install(questions, answers, vectorizer, question_vectors, engine, exact_index)
+
+    @classmethod
+    def open(cls, dataset_path, intents_path, journal_path=DEFAULT_JOURNAL_PATH,
+             index_dir=DEFAULT_INDEX_DIR, **kwargs):
+        """Map the compiled index for the dataset plus the compacted journal; call sync_journal() next"""
+        updates_path = compacted_updates_path(journal_path)
+        updates_id = _file_id(updates_path)
+        loaded = load_or_build_engine(dataset_path, intents_path, index_dir, updates_path)
+        questions, answers, vectorizer, question_vectors, engine, exact_index = loaded
+        trainer = cls(questions, answers, vectorizer, question_vectors, engine=engine, exact_index=exact_index,
+                      journal_path=journal_path, sources=(dataset_path, intents_path, index_dir), **kwargs)
+        trainer._updates_id = updates_id
+        return trainer
+
+    def _install(self, questions, answers, vectorizer, question_vectors, engine=None, exact_index=None):
+        """Start serving a freshly loaded index; the journal is replayed from the start"""
+        self.questions = questions
+        self.answers = answers
+        self.vectorizer = vectorizer
+        self.question_vectors = question_vectors
+        self.engine = engine or SparseRetrievalEngine(question_vectors)
+        # Needed to spot edits of existing questions
+        self.exact_index = exact_index if exact_index is not None else ExactMatchIndex(questions)
+        # New questions held in the delta, not yet in the compiled index
+        self.pending_refresh = 0
+
+        self._analyzer = vectorizer.build_analyzer()
+        # Nothing read yet; differs from any (device, inode) and from a missing journal
+        self._journal_id = ()
+        self._journal_offset = 0
+        self._updates_id = _file_id(self.updates_path) if self.updates_path else None
+
+    def snapshot(self):
+        """(questions, answers, vectorizer, question_vectors, engine, exact_index) of one index generation"""
+        with self._lock:
+            return (self.questions, self.answers, self.vectorizer,
+                    self.question_vectors, self.engine, self.exact_index)
+
+    @staticmethod
+    def _idf(df, n_docs):
+        # Same smoothed formula TfidfVectorizer uses by default
+        return np.log((1 + n_docs) / (1 + df)) + 1
+
+    def find_question(self, question):
+        """Row of an already indexed question (same normalised text), or None"""
+        return self.exact_index.find(question.strip().lower())
+
+    def add_pairs(self, pairs):
+        """
+        Add (question, answer) pairs to the live index; returns how many were applied.
+        Pairs for known questions replace the answer, later pairs in a batch win.
+        """
+        pairs = [(q.strip().lower(), a) for q, a in pairs if q and q.strip() and a]
+        if not pairs:
+            return 0
+
+        with self._lock:
+            new_pairs = {}
+            for question, answer in pairs:
+                row = self.exact_index.find(question)
+                if row is not None:
+                    self.answers[row] = answer
+                else:
+                    new_pairs[normalize_text(question) or question] = (question, answer)
+            if new_pairs:
+                self._add_rows_locked(list(new_pairs.values()))
+
+        return len(pairs)
+
+    def _add_rows_locked(self, pairs):
+        """Append rows for questions the index has not seen yet"""
+        vocabulary = self.vectorizer.vocabulary_
+        new_terms = {}
+        rows, cols, values = [], [], []
+        for row, (question, _) in enumerate(pairs):
+            term_counts = {}
+            for term in self._analyzer(question):
+                term_id = vocabulary.get(term)
+                if term_id is None:
+                    term_id = new_terms.setdefault(term, len(vocabulary) + len(new_terms))
+                term_counts[term_id] = term_counts.get(term_id, 0) + 1
+            for term_id, count in term_counts.items():
+                rows.append(row)
+                cols.append(term_id)
+                values.append(count)
+
+        n_terms = len(vocabulary) + len(new_terms)
+        new_counts = csr_matrix((values, (rows, cols)), shape=(len(pairs), n_terms), dtype=np.int64)
+
+        # Existing terms keep their compiled IDF until the next compaction. A new
+        # term occurs in none of the older rows, so its document frequency is just
+        # its count in this batch.
+        idf = np.asarray(self.vectorizer.idf_, dtype=np.float64)
+        if new_terms:
+            df = np.bincount(new_counts.indices, minlength=n_terms)[len(idf):]
+            idf = np.concatenate([idf, self._idf(df, self.engine.size + len(pairs))])
+            vocabulary = {**vocabulary, **new_terms}
+
+        # Lists must grow before the engine can return the new ids
+        first_id = len(self.questions)
+        self.questions.extend(question for question, _ in pairs)
+        self.answers.extend(answer for _, answer in pairs)
+        for offset, (question, _) in enumerate(pairs):
+            self.exact_index.add(question, first_id + offset)
+
+        new_vectorizer = TfidfVectorizer()
+        new_vectorizer.vocabulary_ = vocabulary
+        new_vectorizer.idf_ = idf
+        self.engine.add_rows(new_counts.multiply(idf).tocsr())
+        self.vectorizer = new_vectorizer
+        self._analyzer = new_vectorizer.build_analyzer()
+
+        self.pending_refresh += len(pairs)
+        if self.refresh_every and self.pending_refresh >= self.refresh_every and self.sources:
+            # Folds the delta into a new shared index instead of re-weighting a private copy
+            self.compact_in_background()
+
+    def append_to_journal(self, pairs):
+        """Persist pairs to the shared journal so every worker (and restarts) pick them up"""
+        if not self.journal_path:
+            raise ValueError("No journal configured")
+        lines = "".join(
+            json.dumps({"question": q, "answer": a}, ensure_ascii=False) + "\n" for q, a in pairs
+        )
+        # Compaction rotates the journal under the same lock, so no line lands in a rotated file
+        with _file_lock(self.journal_path + ".lock"):
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+    def sync_journal(self):
+        """
+        Apply pairs appended to the journal since the last sync and switch to a newly
+        compacted index; cheap when nothing changed. Returns how many pairs were
+        applied (at least 1 after switching index).
+        """
+        if not self.journal_path:
+            return 0
+        if self.sources and _file_id(self.updates_path) != self._updates_id:
+            return max(self.reload(), 1)
+        stat = _file_id(self.journal_path)
+        if stat is not None and stat[:2] == self._journal_id and stat[2] <= self._journal_offset:
+            return 0
+        if stat is None and self._journal_id is None:
+            return 0
+
+        with self._lock:
+            pairs, self._journal_offset, journal_id = read_journal(
+                self.journal_path, self._journal_offset, self._journal_id
+            )
+            if journal_id != self._journal_id:
+                # First read, or compaction rotated the journal: lines this worker had
+                # not read yet are in the rotated file. Replaying ones it did read is
+                # harmless, a known question just gets the same answer again.
+                pairs = read_journal(self.journal_path + ".compacting")[0] + pairs
+                self._journal_id = journal_id
+
+            # Applied under the same lock so concurrent syncs keep journal order
+            return self.add_pairs(pairs)
+
+    def reload(self):
+        """Map the index of the latest compaction and replay the journal on top of it"""
+        dataset_path, intents_path, index_dir = self.sources
+        with self._lock:
+            updates_id = _file_id(self.updates_path)
+            loaded = load_or_build_engine(dataset_path, intents_path, index_dir, self.updates_path)
+            self._install(*loaded)
+            self._updates_id = updates_id
+            return self.sync_journal()
+
+    def needs_compaction(self):
+        """True once the journal has grown past compact_bytes"""
+        try:
+            return bool(self.journal_path) and os.path.getsize(self.journal_path) >= self.compact_bytes
+        except OSError:
+            return False
+
+    def compact_in_background(self):
+        """Run compact() in a daemon thread unless this worker is already compacting"""
+        if self._compacting.locked():
+            return
+        threading.Thread(target=self.compact, daemon=True).start()
+
+    def compact(self):
+        """
+        Fold the journal into the compacted updates file, build the compiled index for
+        it and switch to that index. Other workers switch on their next sync_journal().
+        Returns False when another process is already compacting.
+        """
+        if not self.journal_path or not self.sources:
+            raise ValueError("Compaction needs a journal and the index sources")
+        dataset_path, intents_path, index_dir = self.sources
+        rotated = self.journal_path + ".compacting"
+
+        with self._compacting, _file_lock(self.journal_path + ".compact.lock", blocking=False) as locked:
+            if not locked:
+                return False
+
+            with _file_lock(self.journal_path + ".lock"):
+                if os.path.exists(rotated) and os.path.exists(self.journal_path):
+                    # A previous compaction died part way; add the journal to its file
+                    with open(self.journal_path, "rb") as src, open(rotated, "ab") as dst:
+                        shutil.copyfileobj(src, dst)
+                    os.remove(self.journal_path)
+                elif os.path.exists(self.journal_path):
+                    os.replace(self.journal_path, rotated)
+
+            pending = read_journal(rotated)[0]
+            if pending:
+                merged = {}
+                for question, answer in read_journal(self.updates_path)[0] + pending:
+                    key = normalize_text(question) or question
+                    # First spelling of a question is kept, the latest answer wins
+                    merged[key] = (merged[key][0] if key in merged else question, answer)
+
+                # Same file name in a temp dir gives the same fingerprint, so the index is
+                # ready before workers see the new updates file and none of them rebuilds it
+                parent = os.path.dirname(os.path.abspath(self.updates_path))
+                tmp_dir = tempfile.mkdtemp(prefix=".compacting-", dir=parent)
+                try:
+                    tmp_path = os.path.join(tmp_dir, os.path.basename(self.updates_path))
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        for question, answer in merged.values():
+                            f.write(json.dumps({"question": question, "answer": answer}, ensure_ascii=False) + "\n")
+                        f.flush()
+                        os.fsync(f.fileno())
+                    load_or_build_engine(dataset_path, intents_path, index_dir, tmp_path)
+                    os.replace(tmp_path, self.updates_path)
+                finally:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+            if os.path.exists(rotated):
+                os.remove(rotated)
+
+        if pending:
+            self.reload()
+            print(f"✅ Dataset journal compacted: {len(pending)} pairs folded into the index")
+        return True
+
+
+if __name__ == "__main__":
+    # Precompile the index, e.g. as a deploy step before workers start;
+    # --compact also folds dataset_updates.jsonl into it
+    import sys
+    import time
+    start = time.time()
+    if "--compact" in sys.argv:
+        IncrementalTrainer.open("dataset.json", "intents.json").compact()
+    else:
+        load_or_train_dataset("dataset.json", "intents.json",
+                              updates_path=compacted_updates_path(DEFAULT_JOURNAL_PATH))
+    print(f"✅ Index ready in {time.time() - start:.3f}s")
+
+
+
+# import json
+# from sentence_transformers import SentenceTransformer
+
+# model = SentenceTransformer("all-MiniLM-L6-v2")
+
+# def train_dataset(path):
+#     with open(path, encoding="utf-8") as f:
+#         data = json.load(f)
+
+#     questions = [item["question"] for item in data]
+#     answers = [item["answer"] for item in data]
+
+#     embeddings = model.encode(questions)
+#     return questions, answers, embeddings
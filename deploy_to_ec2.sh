@@ -78,7 +78,7 @@ User=$USER
 Group=www-data
 WorkingDirectory=$APP_DIR
 Environment="PATH=$APP_DIR/venv/bin"
-ExecStart=$APP_DIR/venv/bin/gunicorn --workers 3 --bind 0.0.0.0:5000 app_web:app
+ExecStart=$APP_DIR/venv/bin/gunicorn --workers 3 --preload --bind 0.0.0.0:5000 app_web:app
 Restart=always
 RestartSec=10
 
@@ -3,14 +3,18 @@
 Enhanced Smart Personal Assistant Web App
 """
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response, stream_with_context
 from datetime import datetime
 import json
+import os
 import re
-from chatbot import get_response
+import threading
+from chatbot import get_response, stream_response
+from admin_api import admin_api
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'  # Change this in production
+app.register_blueprint(admin_api)
 
 @app.route("/", methods=["GET", "POST"])
 def home():
@@ -57,6 +61,62 @@ def api_chat():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Bedrock answers the slow fallbacks of /api/chat/stream when ENABLE_BEDROCK=1
+_bedrock_assistant = None
+_bedrock_lock = threading.Lock()
+
+def get_bedrock_assistant():
+    """Process-wide Bedrock assistant, created on first use (after gunicorn forks)"""
+    global _bedrock_assistant
+    if os.environ.get('ENABLE_BEDROCK') != '1':
+        return None
+    with _bedrock_lock:
+        if _bedrock_assistant is None:
+            try:
+                from aws_bedrock_integration import BedrockEnhancedAssistant
+                _bedrock_assistant = BedrockEnhancedAssistant()
+            except ImportError as e:
+                print(f"⚠️ Bedrock unavailable: {e}")
+                os.environ['ENABLE_BEDROCK'] = '0'
+                return None
+    return _bedrock_assistant
+
+@app.route("/api/chat/stream", methods=["GET", "POST"])
+def api_chat_stream():
+    """
+    Server-Sent Events version of /api/chat: sends a provisional answer as soon
+    as one is known, then streamed tokens and the final answer.
+    GET ?message=... is accepted because EventSource cannot POST.
+    """
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        user_input = data.get('message', '') if isinstance(data, dict) else None
+        if not isinstance(user_input, str):
+            return jsonify({'error': "Body must be a JSON object with a string 'message'"}), 400
+    else:
+        user_input = request.args.get('message', '')
+    
+    if not user_input.strip():
+        return jsonify({'error': 'Empty message'}), 400
+    
+    def events():
+        try:
+            for event, payload in stream_response(user_input, bedrock_assistant=get_bedrock_assistant()):
+                if event == 'final':
+                    payload['timestamp'] = datetime.now().isoformat()
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # stop nginx from holding events back
+        }
+    )
+
 @app.route("/api/quick-actions", methods=["GET"])
 def quick_actions():
     """Get quick action suggestions"""
@@ -101,6 +161,5 @@ def dashboard():
     return render_template("dashboard.html")
 
 if __name__ == "__main__":
-    import os
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
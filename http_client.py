@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+HTTP Client
+One shared requests.Session per process for every outbound API call:
+keep-alive connection pools per host, retries with backoff, and a cap on
+concurrent requests to any single host
+"""
+
+import contextlib
+import contextvars
+import email.utils
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Pool sizes can be tuned per deployment without code changes
+POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 10))  # hosts with a cached pool
+POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 16))          # kept-alive connections per host
+
+# Retry transient failures of idempotent GETs only (connection errors and gateway
+# statuses); callers already treat a None answer as "try the next source"
+MAX_RETRIES = 2
+BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = (502, 503, 504)
+RETRY_METHODS = frozenset(["GET"])
+# Longest Retry-After we wait for; a server asking for more just gets no retry
+MAX_RETRY_AFTER = 1.0
+
+# Maximum in-flight requests per host (a single web search can hit Wikipedia a dozen times)
+DEFAULT_HOST_LIMIT = 8
+HOST_LIMITS = {
+    "en.wikipedia.org": 8,
+    "api.duckduckgo.com": 4,
+    "restcountries.com": 4,
+}
+
+USER_AGENT = "SmartPersonalAssistant/1.0"
+
+# time.monotonic() by which the requests of the current search must be done
+_deadline = contextvars.ContextVar("http_deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline(expires_at):
+    """
+    Within this block every request, including its host-slot wait and retries,
+    ends by expires_at (a time.monotonic() value). Threads started with
+    asyncio.to_thread and tasks created inside the block inherit it.
+    """
+    token = _deadline.set(expires_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left(timeout=None):
+    """
+    timeout cut to the time left before the current deadline (also for a
+    (connect, read) tuple); raises Timeout once the deadline has passed
+    """
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return timeout
+    remaining = expires_at - time.monotonic()
+    if remaining <= 0:
+        raise requests.exceptions.Timeout("Search deadline passed")
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+    return min(timeout, remaining)
+
+
+class HTTPClient:
+    """Pooled, retrying HTTP client with per-host concurrency limits"""
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR,
+                 host_limits=None, default_host_limit=DEFAULT_HOST_LIMIT):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.default_host_limit = default_host_limit
+
+        self._session = None
+        self._session_pid = None
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _build_session(self):
+        # Retries happen in request(), where the method and the wait are known
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=0,
+            pool_block=False
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["User-Agent"] = USER_AGENT
+        return session
+
+    @property
+    def session(self):
+        """Session for the current process (sockets must not be shared across a gunicorn fork)"""
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            with self._lock:
+                if self._session is None or self._session_pid != pid:
+                    self._session = self._build_session()
+                    self._session_pid = pid
+        return self._session
+
+    def _host_semaphore(self, host):
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            with self._lock:
+                semaphore = self._semaphores.setdefault(
+                    host,
+                    threading.BoundedSemaphore(self.host_limits.get(host, self.default_host_limit))
+                )
+        return semaphore
+
+    def _retry_delay(self, attempt, response):
+        """Seconds to wait before retry number attempt, or None when it should not be retried"""
+        delay = self.backoff_factor * (2 ** (attempt - 1))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                try:
+                    seconds = email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    seconds = 0
+            if seconds > MAX_RETRY_AFTER:
+                return None
+            delay = max(delay, seconds)
+        return delay
+
+    def _send(self, method, url, **kwargs):
+        """One request through the shared session, waiting at most `timeout` for a host slot"""
+        host = urlsplit(url).hostname or ""
+        timeout = kwargs["timeout"] = time_left(kwargs.get("timeout"))
+        wait = timeout[0] if isinstance(timeout, tuple) else timeout
+
+        semaphore = self._host_semaphore(host)
+        if not semaphore.acquire(timeout=wait):
+            raise requests.exceptions.Timeout(f"Too many concurrent requests to {host}")
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            semaphore.release()
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the shared session. GETs are retried with backoff
+        on connection errors and RETRY_STATUSES; other methods are sent once.
+        Inside a deadline() block no attempt or backoff runs past the deadline.
+        """
+        retries = self.max_retries if method.upper() in RETRY_METHODS else 0
+        attempt = 0
+        while True:
+            try:
+                response = self._send(method, url, **kwargs)
+                error = None
+            except requests.exceptions.SSLError:
+                raise
+            except requests.exceptions.ConnectionError as e:
+                response, error = None, e
+
+            if error is None and response.status_code not in RETRY_STATUSES:
+                return response
+            attempt += 1
+            delay = self._retry_delay(attempt, response) if attempt <= retries else None
+            expires_at = _deadline.get()
+            if delay is not None and expires_at is not None and time.monotonic() + delay >= expires_at:
+                # No time left for another attempt
+                delay = None
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+
+
+# Process-wide client used by the module-level helpers below
+_client = HTTPClient()
+
+def get_client():
+    return _client
+
+def get(url, **kwargs):
+    """Drop-in replacement for requests.get that reuses pooled connections"""
+    return _client.get(url, **kwargs)
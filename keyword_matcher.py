@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Keyword Matcher
+Aho-Corasick automaton over the keywords of a prioritised rule table, so one
+pass over a question finds every keyword it contains and the best rule is
+resolved without rescanning the text per keyword
+"""
+
+from collections import deque
+
+
+class KeywordAutomaton:
+    """Finds every pattern that occurs as a substring of a text in a single pass"""
+
+    def __init__(self, patterns):
+        self.patterns = list(dict.fromkeys(patterns))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (pattern_id,)
+
+        # Breadth-first so each state's failure link is final before its children use it
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                if self._fail[child] == child:
+                    self._fail[child] = 0
+                self._output[child] += self._output[self._fail[child]]
+
+    def find(self, text):
+        """Return the set of patterns occurring anywhere in text"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return {self.patterns[pattern_id] for pattern_id in found}
+
+
+class KeywordMatcher:
+    """
+    Rule table compiled into one automaton. Rules are keyword lists in priority
+    order (index 0 wins); extra_patterns are reported by scan() for callers
+    that need additional conditions but belong to no rule.
+    """
+
+    def __init__(self, rules, extra_patterns=()):
+        self.rules = [tuple(keywords) for keywords in rules]
+        self._rules_by_pattern = {}
+        for index, keywords in enumerate(self.rules):
+            for keyword in keywords:
+                self._rules_by_pattern.setdefault(keyword, []).append(index)
+
+        self.automaton = KeywordAutomaton(list(self._rules_by_pattern) + list(extra_patterns))
+
+    def scan(self, text):
+        """Every rule keyword or extra pattern found in text"""
+        return self.automaton.find(text)
+
+    def rules_with_any(self, found):
+        """Indices of rules with at least one keyword in found, best first"""
+        return sorted({
+            index
+            for pattern in found
+            for index in self._rules_by_pattern.get(pattern, ())
+        })
+
+    def first_any(self, found):
+        """Highest-priority rule with any keyword in found, or None"""
+        indices = self.rules_with_any(found)
+        return indices[0] if indices else None
+
+    def first_all(self, found):
+        """Highest-priority rule whose keywords are all in found, or None"""
+        for index in self.rules_with_any(found):
+            if all(keyword in found for keyword in self.rules[index]):
+                return index
+        return None
+
+    def match(self, text):
+        """Shortcut for first_any(scan(text))"""
+        return self.first_any(self.scan(text))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Knowledge Base
+Loads the static answers in knowledge_base.json, compiles each section's
+keywords into one matcher at load time, and reloads the file when it changes
+"""
+
+import json
+import os
+import threading
+import time
+
+from keyword_matcher import KeywordMatcher
+
+KNOWLEDGE_BASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base.json")
+
+
+class KnowledgeSection:
+    """One rule table: entries in priority order plus their compiled keyword matcher"""
+
+    def __init__(self, entries, extra_patterns=()):
+        self.keywords = [tuple(entry["keywords"]) for entry in entries]
+        self.answers = [entry["answer"] for entry in entries]
+        self.matcher = KeywordMatcher(self.keywords, extra_patterns=extra_patterns)
+
+    def __len__(self):
+        return len(self.answers)
+
+    def match(self, text):
+        """Answer of the highest-priority entry with any keyword in text, or None"""
+        index = self.matcher.match(text)
+        return None if index is None else self.answers[index]
+
+
+class KnowledgeBase:
+    """
+    Sections are rebuilt only when the file's mtime changes, checked at most
+    once every check_interval seconds, so lookups never touch the disk
+    """
+
+    def __init__(self, path=KNOWLEDGE_BASE_PATH, extra_patterns=None, check_interval=2.0):
+        self.path = path
+        self.extra_patterns = extra_patterns or {}
+        self.check_interval = check_interval
+        self.sections = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """Load and index the file; on error the previous sections stay in use"""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            sections = {
+                name: KnowledgeSection(entries, self.extra_patterns.get(name, ()))
+                for name, entries in data.get("sections", {}).items()
+            }
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Could not load knowledge base {self.path}: {e}")
+            return False
+
+        # Rebind rather than mutate so concurrent readers see old or new, never half of each
+        self.sections = sections
+        self._mtime = mtime
+        print(f"📚 Knowledge base loaded: " + ", ".join(f"{name} ({len(section)})" for name, section in sections.items()))
+        return True
+
+    def reload_if_changed(self):
+        """Reload when the file has been modified since it was last loaded"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return False
+            self._checked_at = now
+            try:
+                changed = os.path.getmtime(self.path) != self._mtime
+            except OSError:
+                return False
+            return self.reload() if changed else False
+
+    def section(self, name):
+        """Current KnowledgeSection for name (empty when the file has no such section)"""
+        self.reload_if_changed()
+        section = self.sections.get(name)
+        if section is None:
+            section = KnowledgeSection([], self.extra_patterns.get(name, ()))
+        return section
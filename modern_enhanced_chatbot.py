@@ -7,11 +7,12 @@ Beautiful, modern interface with animations, professional design, and AWS Bedroc
 import tkinter as tk
 from tkinter import scrolledtext, messagebox, ttk
 import threading
-from datetime import datetime
-import json
-import os
+from datetime import datetime, timedelta
 import time
 
+from assistant_data_io import migrate_desktop_data
+from assistant_repository import get_repository, normalize_expense_category
+
 # Try to import AWS Bedrock integration
 try:
     from aws_bedrock_integration import BedrockEnhancedAssistant, get_enhanced_response
@@ -677,12 +678,65 @@ class ModernEnhancedChatbot:
     def process_message_animated(self, message):
         """Process message with animation"""
         try:
-            response = self.get_response(message)
+            # Bedrock answers are rendered chunk by chunk as they arrive
+            if self.stream_bedrock_response(message):
+                return
+            response = self.get_response(message, use_bedrock=False)
             self.root.after(0, self.display_response_animated, response)
         except Exception as e:
             error_msg = f"Sorry, error occurred: {str(e)}"
             self.root.after(0, self.display_response_animated, error_msg)
     
+    def stream_bedrock_response(self, message):
+        """Stream a Bedrock answer into the chat (runs in the worker thread); False if Bedrock gave nothing"""
+        if not (self.bedrock_assistant and self.bedrock_assistant.is_available()):
+            return False
+        
+        started = False
+        try:
+            print("🤖 Streaming AWS Bedrock response...")
+            for chunk in self.bedrock_assistant.stream_bedrock_response(message, self.bedrock_context()):
+                if not started:
+                    self.root.after(0, self.begin_streamed_response)
+                    started = True
+                self.root.after(0, self.append_streamed_chunk, chunk)
+        except Exception as e:
+            print(f"⚠️ Bedrock streaming error: {e}")
+            if started:
+                # Part of the answer is already on screen; make clear it is incomplete
+                self.root.after(0, self.append_streamed_chunk, "\n\n⚠️ The answer was cut off. Please ask again.")
+        
+        if started:
+            self.root.after(0, self.finish_streamed_response)
+        return started
+    
+    def begin_streamed_response(self):
+        """Replace the typing indicator with the header of a streamed answer"""
+        self.typing_animation_active = False
+        self.chat_display.config(state='normal')
+        self.chat_display.delete(self.typing_start_pos, tk.END)
+        # Same header add_message_animated writes, so both kinds of answer look alike
+        timestamp = datetime.now().strftime("%H:%M")
+        self.chat_display.insert(tk.END, f"\n[{timestamp}] Assistant: ", "timestamp")
+        self.chat_display.insert(tk.END, "🧠 **AWS Bedrock AI:**\n\n", "bot_msg")
+        self.chat_display.config(state='disabled')
+        self.status_label.config(text="🧠 AI is responding...")
+    
+    def append_streamed_chunk(self, chunk):
+        """Show the next piece of a streamed answer"""
+        self.chat_display.config(state='normal')
+        self.chat_display.insert(tk.END, chunk, "bot_msg")
+        self.chat_display.config(state='disabled')
+        self.chat_display.see(tk.END)
+    
+    def finish_streamed_response(self):
+        self.chat_display.config(state='normal')
+        self.chat_display.insert(tk.END, "\n", "bot_msg")
+        self.chat_display.config(state='disabled')
+        self.chat_display.see(tk.END)
+        self.status_label.config(text="✅ Ready! Ask me anything...")
+        self.message_entry.focus()
+    
     def display_response_animated(self, response):
         """Display response with animation"""
         # Stop typing animation
@@ -805,31 +859,21 @@ Ready to assist you with 100% accuracy! 🎯
     
     # Include all the original methods for data handling and responses
     def load_data(self):
-        """Load saved data"""
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-            else:
-                self.data = {
-                    'expenses': [],
-                    'schedule': [],
-                    'study_sessions': []
-                }
-        except:
-            self.data = {
-                'expenses': [],
-                'schedule': [],
-                'study_sessions': []
-            }
-    
-    def save_data(self):
-        """Save data to file"""
+        """Use the shared assistant database, moving any old desktop data file into it once"""
+        self.repository = get_repository()
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            reports = migrate_desktop_data(self.repository.db, self.data_file)
         except Exception as e:
-            print(f"Error saving data: {e}")
+            print(f"⚠️ Could not migrate {self.data_file}: {e}")
+            return
+        
+        if any(report.skipped for report in reports):
+            details = "\n".join(str(report) for report in reports)
+            messagebox.showwarning(
+                "Data Migration",
+                f"{self.data_file} was not moved into the assistant database because some "
+                f"records are invalid. Fix them and restart:\n\n{details}"
+            )
     
     def search_web_for_answer(self, question):
         """Search web for real answers using web_search_helper"""
@@ -843,29 +887,30 @@ Ready to assist you with 100% accuracy! 🎯
             print(f"Web search error: {e}")
             return None
     
-    def get_response(self, user_input):
+    def bedrock_context(self):
+        """Context about the user's capabilities and data sent along with Bedrock prompts"""
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'user_location': 'Dehradun, India',
+            'assistant_creator': 'Ankit Kumar Pandit',
+            'capabilities': [
+                'general_knowledge', 'schedule_management', 
+                'expense_tracking', 'study_assistance',
+                'weather_updates', 'news_updates', 'entertainment'
+            ],
+            'user_data_available': self.repository.has_records()
+        }
+    
+    def get_response(self, user_input, use_bedrock=True):
         """Get response based on input with AWS Bedrock enhancement"""
         text_lower = user_input.lower()
         
         # Try AWS Bedrock first for enhanced AI responses
-        if hasattr(self, 'bedrock_assistant') and self.bedrock_assistant and self.bedrock_assistant.is_available():
+        if use_bedrock and hasattr(self, 'bedrock_assistant') and self.bedrock_assistant and self.bedrock_assistant.is_available():
             try:
                 print("🤖 Using AWS Bedrock for enhanced AI response...")
                 
-                # Add context about user's capabilities and data
-                context = {
-                    'timestamp': datetime.now().isoformat(),
-                    'user_location': 'Dehradun, India',
-                    'assistant_creator': 'Ankit Kumar Pandit',
-                    'capabilities': [
-                        'general_knowledge', 'schedule_management', 
-                        'expense_tracking', 'study_assistance',
-                        'weather_updates', 'news_updates', 'entertainment'
-                    ],
-                    'user_data_available': bool(self.data['expenses'] or self.data['schedule'] or self.data['study_sessions'])
-                }
-                
-                bedrock_response = self.bedrock_assistant.get_bedrock_response(user_input, context)
+                bedrock_response = self.bedrock_assistant.get_bedrock_response(user_input, self.bedrock_context())
                 
                 if bedrock_response:
                     return f"🧠 **AWS Bedrock AI:**\n\n{bedrock_response}"
@@ -950,16 +995,7 @@ Ready to assist you with 100% accuracy! 🎯
                     category = rest.strip()
                     description = ""
                 
-                expense = {
-                    'amount': amount,
-                    'category': category,
-                    'description': description,
-                    'date': datetime.now().strftime('%Y-%m-%d'),
-                    'time': datetime.now().strftime('%H:%M')
-                }
-                
-                self.data['expenses'].append(expense)
-                self.save_data()
+                self.repository.add_expense(amount, *normalize_expense_category(category, description))
                 
                 return f"✅ Expense added: ₹{amount} for {category}" + (f" - {description}" if description else "")
             else:
@@ -969,8 +1005,8 @@ Ready to assist you with 100% accuracy! 🎯
     
     def handle_show_expenses(self):
         """Show today's expenses"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_expenses = [e for e in self.data['expenses'] if e['date'] == today]
+        today = datetime.now().date()
+        today_expenses = self.repository.expenses_between(today, today + timedelta(days=1))
         
         if not today_expenses:
             return "💰 No expenses recorded for today."
@@ -988,20 +1024,15 @@ Ready to assist you with 100% accuracy! 🎯
     
     def handle_monthly_expenses(self):
         """Show monthly expense summary"""
-        current_month = datetime.now().strftime('%Y-%m')
-        month_expenses = [e for e in self.data['expenses'] if e['date'].startswith(current_month)]
+        categories = self.repository.monthly_expense_totals()
         
-        if not month_expenses:
+        if not categories:
             return "📊 No expenses recorded for this month."
         
-        total = sum(e['amount'] for e in month_expenses)
-        categories = {}
-        for expense in month_expenses:
-            cat = expense['category']
-            categories[cat] = categories.get(cat, 0) + expense['amount']
+        total = sum(amount for _, amount in categories)
         
         result = f"📊 Monthly Expense Summary (₹{total}):\n\n"
-        for category, amount in sorted(categories.items(), key=lambda x: x[1], reverse=True):
+        for category, amount in categories:
             percentage = (amount / total * 100) if total > 0 else 0
             result += f"• {category.title()}: ₹{amount} ({percentage:.1f}%)\n"
         
@@ -1010,24 +1041,17 @@ Ready to assist you with 100% accuracy! 🎯
     def handle_add_schedule(self, user_input):
         """Handle add schedule command"""
         try:
-            schedule_item = {
-                'title': 'New Event',
-                'description': user_input,
-                'date': datetime.now().strftime('%Y-%m-%d'),
-                'time': datetime.now().strftime('%H:%M')
-            }
-            
-            self.data['schedule'].append(schedule_item)
-            self.save_data()
+            title = 'New Event'
+            self.repository.add_schedule(title, datetime.now(), description=user_input)
             
-            return f"📅 Schedule added: {schedule_item['title']}"
+            return f"📅 Schedule added: {title}"
         except:
             return "📅 Schedule feature available! Use: Add schedule: [event] on [date] [time]"
     
     def handle_show_schedule(self):
         """Show today's schedule"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_schedule = [s for s in self.data['schedule'] if s['date'] == today]
+        today = datetime.now().date()
+        today_schedule = self.repository.schedule_between(today, today + timedelta(days=1))
         
         if not today_schedule:
             return "📅 No schedule for today. You're free!"
@@ -1041,29 +1065,21 @@ Ready to assist you with 100% accuracy! 🎯
     def handle_log_study(self, user_input):
         """Handle log study command"""
         try:
-            study_session = {
-                'subject': 'Study Session',
-                'duration': '60 minutes',
-                'date': datetime.now().strftime('%Y-%m-%d'),
-                'time': datetime.now().strftime('%H:%M'),
-                'notes': user_input
-            }
-            
-            self.data['study_sessions'].append(study_session)
-            self.save_data()
+            subject, duration = 'Study Session', 60
+            self.repository.log_study_session(subject, duration, notes=user_input)
             
-            return f"📚 Study session logged: {study_session['subject']} for {study_session['duration']}"
+            return f"📚 Study session logged: {subject} for {duration} minutes"
         except:
             return "📚 Study logging available! Use: Log study: [subject] for [duration] - [notes]"
     
     def handle_study_stats(self):
         """Show study statistics"""
-        if not self.data['study_sessions']:
+        total_sessions = self.repository.study_session_count()
+        if not total_sessions:
             return "📚 No study sessions recorded yet."
         
-        total_sessions = len(self.data['study_sessions'])
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_sessions = [s for s in self.data['study_sessions'] if s['date'] == today]
+        today = datetime.now().date()
+        today_sessions = self.repository.study_sessions_between(today, today + timedelta(days=1))
         
         result = f"📚 Study Statistics:\n\n"
         result += f"📊 Total Sessions: {total_sessions}\n"
@@ -4,15 +4,21 @@ Multi-API Enhanced Smart Personal Assistant
 Integrates multiple APIs for comprehensive functionality
 """
 
-import requests
+import http_client
 import json
 import random
 from datetime import datetime, timedelta
 import os
 from typing import Dict, Any, Optional
 
+from single_flight import coalesced, method_key
+
 class MultiAPIAssistant:
-    """Enhanced assistant with multiple API integrations"""
+    """
+    Enhanced assistant with multiple API integrations
+    Network-backed lookups are coalesced: identical calls in flight at the same
+    time (from any instance) share a single request
+    """
     
     def __init__(self):
         # API Keys (Replace with your actual keys)
@@ -121,10 +127,11 @@ class MultiAPIAssistant:
         except Exception as e:
             return f"❌ News service temporarily unavailable: {str(e)}"
     
+    @coalesced(key=method_key)
     def get_motivational_quote(self) -> str:
         """Get motivational quote using Quotable API"""
         try:
-            response = requests.get(self.api_urls['quotes'], timeout=5)
+            response = http_client.get(self.api_urls['quotes'], timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 return f"✨ **Daily Motivation:**\n\n\"{data['content']}\"\n\n— {data['author']}"
@@ -144,10 +151,11 @@ class MultiAPIAssistant:
             quote = random.choice(fallback_quotes)
             return f"✨ **Daily Motivation:**\n\n{quote}"
     
+    @coalesced(key=method_key)
     def get_programming_joke(self) -> str:
         """Get programming joke using JokeAPI"""
         try:
-            response = requests.get(self.api_urls['jokes'], timeout=5)
+            response = http_client.get(self.api_urls['jokes'], timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 
@@ -171,10 +179,11 @@ class MultiAPIAssistant:
             joke = random.choice(fallback_jokes)
             return f"😄 **Programming Humor:**\n\n{joke}"
     
+    @coalesced(key=method_key)
     def get_currency_rates(self, base_currency: str = "USD") -> str:
         """Get currency exchange rates"""
         try:
-            response = requests.get(self.api_urls['currency'], timeout=5)
+            response = http_client.get(self.api_urls['currency'], timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 rates = data['rates']
@@ -202,10 +211,11 @@ class MultiAPIAssistant:
         except Exception:
             return "💱 **Currency Rates:**\n\n💰 USD to INR: ~83.00\n💰 USD to EUR: ~0.85\n💰 USD to GBP: ~0.73\n\n⚠️ Rates are approximate"
     
+    @coalesced(key=method_key)
     def get_random_fact(self) -> str:
         """Get random interesting fact"""
         try:
-            response = requests.get(self.api_urls['facts'], timeout=5)
+            response = http_client.get(self.api_urls['facts'], timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 return f"🧠 **Did You Know?**\n\n{data['text']}"
@@ -225,11 +235,12 @@ class MultiAPIAssistant:
             fact = random.choice(fallback_facts)
             return f"🧠 **Did You Know?**\n\n{fact}"
     
+    @coalesced(key=method_key)
     def get_github_user_info(self, username: str) -> str:
         """Get GitHub user information"""
         try:
             url = f"{self.api_urls['github']}/{username}"
-            response = requests.get(url, timeout=5)
+            response = http_client.get(url, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -254,11 +265,12 @@ class MultiAPIAssistant:
         except Exception as e:
             return f"❌ GitHub service temporarily unavailable: {str(e)}"
     
+    @coalesced(key=method_key)
     def get_word_definition(self, word: str) -> str:
         """Get word definition using Dictionary API"""
         try:
             url = f"{self.api_urls['dictionary']}/{word.lower()}"
-            response = requests.get(url, timeout=5)
+            response = http_client.get(url, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
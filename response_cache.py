@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Response Cache
+Size-bounded LRU caches with per-entry TTL, plus a per-source response cache
+for the chatbot that can be backed by SQLite so it survives restarts
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from text_normalizer import normalize_cache_key
+
+
+def _entry_size(key, value):
+    """Rough memory footprint of one cache entry in bytes"""
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class LRUTTLCache:
+    """Thread-safe LRU cache with a maximum entry count, byte budget and TTL"""
+
+    def __init__(self, maxsize=1024, ttl=300, max_bytes=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, expires_at, size)
+        self._lock = threading.Lock()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value, or default when missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                self.bytes_used -= size
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store value; ttl overrides the cache default (None in both means no expiry)"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        size = _entry_size(key, value)
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes_used -= old[2]
+
+            self._data[key] = (value, expires_at, size)
+            self.bytes_used += size
+
+            while self._data and (
+                len(self._data) > self.maxsize
+                or (self.max_bytes is not None and self.bytes_used > self.max_bytes)
+            ):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self.bytes_used -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self.bytes_used -= entry[2]
+
+    def delete_where(self, predicate):
+        """Remove every entry whose key satisfies predicate"""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                self.bytes_used -= self._data.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes_used = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Hit/miss counters and memory usage"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'bytes': self.bytes_used,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class ResponseCache:
+    """
+    Memoises chatbot responses keyed on (source, normalised input).
+    Each source has its own TTL; a TTL of 0 disables caching for that source.
+    With db_path set, entries are also written to SQLite so they survive
+    restarts and are shared between worker processes.
+    """
+
+    DEFAULT_TTLS = {
+        'dataset': 60 * 60,        # answers only change through the admin API
+        'web': 6 * 60 * 60,        # Wikipedia / DuckDuckGo answers are fairly stable
+        'smart': 0,                # schedule/expense replies depend on live user data
+    }
+
+    def __init__(self, source_ttls=None, maxsize=2048, max_bytes=16 * 1024 * 1024, db_path=None):
+        self.source_ttls = dict(self.DEFAULT_TTLS)
+        if source_ttls:
+            self.source_ttls.update(source_ttls)
+
+        self.memory = LRUTTLCache(maxsize=maxsize, ttl=None, max_bytes=max_bytes)
+        self.source_stats = {}
+        self._stats_lock = threading.Lock()
+
+        self.db_path = db_path
+        self._db = None
+        self._db_pid = None
+        self._db_failed = False
+        self._db_lock = threading.Lock()
+
+    def _connection(self):
+        """SQLite connection for this process, opened lazily (gunicorn --preload forks after import)"""
+        if not self.db_path or self._db_failed:
+            return None
+        if self._db is not None and self._db_pid == os.getpid():
+            return self._db
+
+        try:
+            db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute('''
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    source TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (source, key)
+                )
+            ''')
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Response cache database unavailable, using memory only: {e}")
+            self._db_failed = True
+            return None
+
+        self._db = db
+        self._db_pid = os.getpid()
+        return db
+
+    def _count(self, source, hit):
+        with self._stats_lock:
+            counters = self.source_stats.setdefault(source, {'hits': 0, 'misses': 0})
+            counters['hits' if hit else 'misses'] += 1
+
+    def get(self, source, user_input):
+        """Return a cached response for user_input from source, or None"""
+        if not self.source_ttls.get(source):
+            return None
+
+        key = (source, normalize_cache_key(user_input))
+        response = self.memory.get(key)
+
+        if response is None and self.db_path:
+            row = None
+            try:
+                with self._db_lock:
+                    db = self._connection()
+                    if db is not None:
+                        row = db.execute(
+                            'SELECT response, expires_at FROM response_cache '
+                            'WHERE source = ? AND key = ? AND expires_at > ?',
+                            (source, key[1], time.time())
+                        ).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ Response cache read failed: {e}")
+
+            if row:
+                response = row[0]
+                # Promote to memory for the rest of its lifetime
+                self.memory.set(key, response, ttl=max(row[1] - time.time(), 1))
+
+        self._count(source, response is not None)
+        return response
+
+    def set(self, source, user_input, response):
+        """Cache response for user_input from source (ignored when that source's TTL is 0)"""
+        ttl = self.source_ttls.get(source)
+        if not ttl or not response:
+            return
+
+        key = (source, normalize_cache_key(user_input))
+        self.memory.set(key, response, ttl=ttl)
+
+        if self.db_path:
+            try:
+                with self._db_lock:
+                    db = self._connection()
+                    if db is not None:
+                        db.execute(
+                            'INSERT OR REPLACE INTO response_cache (source, key, response, expires_at) '
+                            'VALUES (?, ?, ?, ?)',
+                            (source, key[1], response, time.time() + ttl)
+                        )
+                        db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Response cache write failed: {e}")
+
+    def clear_source(self, source):
+        """Drop every cached response from one source (e.g. after the dataset changes)"""
+        self.memory.delete_where(lambda key: key[0] == source)
+
+        if self.db_path:
+            try:
+                with self._db_lock:
+                    db = self._connection()
+                    if db is not None:
+                        db.execute('DELETE FROM response_cache WHERE source = ?', (source,))
+                        db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Response cache clear failed: {e}")
+
+    def stats(self):
+        """Overall and per-source hit rates plus memory usage"""
+        stats = self.memory.stats()
+        with self._stats_lock:
+            per_source = {}
+            for source, counters in self.source_stats.items():
+                total = counters['hits'] + counters['misses']
+                per_source[source] = dict(counters, hit_rate=round(counters['hits'] / total, 4) if total else 0.0)
+        stats['sources'] = per_source
+        stats['hits'] = sum(c['hits'] for c in per_source.values())
+        stats['misses'] = sum(c['misses'] for c in per_source.values())
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / total, 4) if total else 0.0
+        stats['persistent'] = bool(self.db_path) and not self._db_failed
+        return stats
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Sparse Retrieval Engine
+Top-k cosine search over TF-IDF question vectors using an inverted index,
+so query cost depends on the query's terms instead of the number of stored questions
+"""
+
+import hashlib
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from sklearn.preprocessing import normalize
+
+from text_normalizer import normalize_text
+
+
+def _fit_width(matrix, width):
+    """Drop or pad columns so matrix has exactly width columns (vocabulary may grow at runtime)"""
+    if matrix.shape[1] == width:
+        return matrix
+    if matrix.shape[1] > width:
+        return matrix[:, :width]
+    return csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], width))
+
+
+class _Segment:
+    """Immutable block of normalised rows plus its inverted index"""
+
+    def __init__(self, matrix, offset, postings=None):
+        self.matrix = matrix
+        self.offset = offset
+
+        # CSC layout of the same matrix is the inverted index: column t lists
+        # the ids and weights of every question containing term t
+        if postings is None:
+            postings = matrix.tocsc()
+        self.postings_ptr = postings.indptr
+        self.postings_docs = postings.indices
+        self.postings_weights = postings.data
+
+    @property
+    def size(self):
+        return self.matrix.shape[0]
+
+
+class SparseRetrievalEngine:
+    """Inverted-index nearest neighbour search over L2-normalised sparse rows"""
+
+    def __init__(self, question_vectors, max_delta_segments=8, postings=None):
+        # Appended rows live in delta segments after the base segment. The base may
+        # be a memory-mapped index shared by every worker, so it is never rebuilt
+        # here; past max_delta_segments the deltas are merged with each other only
+        self.max_delta_segments = max_delta_segments
+        self.replace(question_vectors, postings=postings)
+
+    def replace(self, question_vectors, postings=None):
+        """
+        Swap in a completely new matrix, dropping any delta segments.
+        Passing prebuilt CSC postings means the rows are already L2-normalised;
+        both are then used as-is, so memory-mapped arrays are never copied.
+        """
+        if postings is None:
+            # Pre-normalise rows so a sparse dot product is the cosine similarity
+            matrix = normalize(csr_matrix(question_vectors, dtype=np.float64), norm="l2")
+        else:
+            matrix = csr_matrix(question_vectors, copy=False)
+        # Readers take a snapshot of this list, so it is only ever rebound, never mutated
+        self.segments = [_Segment(matrix, 0, postings)]
+
+    def add_rows(self, rows):
+        """Append already-weighted rows; their ids continue after the current last question"""
+        rows = normalize(csr_matrix(rows, dtype=np.float64), norm="l2")
+        if rows.shape[0] == 0:
+            return
+
+        segments = self.segments
+        deltas = segments[1:] + [_Segment(rows, segments[-1].offset + segments[-1].size)]
+
+        if len(deltas) > self.max_delta_segments:
+            width = max(segment.matrix.shape[1] for segment in deltas)
+            merged = vstack([_fit_width(segment.matrix, width) for segment in deltas], format="csr")
+            deltas = [_Segment(merged, deltas[0].offset)]
+
+        self.segments = segments[:1] + deltas
+
+    @property
+    def size(self):
+        """Number of indexed questions"""
+        last = self.segments[-1]
+        return last.offset + last.size
+
+    @property
+    def matrix(self):
+        """All indexed rows as one CSR matrix"""
+        segments = self.segments
+        if len(segments) == 1:
+            return segments[0].matrix
+        width = max(segment.matrix.shape[1] for segment in segments)
+        return vstack([_fit_width(segment.matrix, width) for segment in segments], format="csr")
+
+    def _score_candidates(self, query_vec):
+        """Accumulate dot products for every question sharing a term with the query"""
+        query = normalize(csr_matrix(query_vec, dtype=np.float64), norm="l2")
+        term_ids = query.indices
+        if term_ids.size == 0:
+            return None, None
+
+        doc_chunks = []
+        score_chunks = []
+        for segment in self.segments:
+            n_terms = len(segment.postings_ptr) - 1
+            for term_id, weight in zip(term_ids, query.data):
+                if term_id >= n_terms:
+                    continue
+                start, end = segment.postings_ptr[term_id], segment.postings_ptr[term_id + 1]
+                if start == end:
+                    continue
+                doc_chunks.append(segment.postings_docs[start:end] + segment.offset)
+                score_chunks.append(segment.postings_weights[start:end] * weight)
+
+        if not doc_chunks:
+            return None, None
+
+        docs, inverse = np.unique(np.concatenate(doc_chunks), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_chunks))
+        return docs, scores
+
+    def top_k(self, query_vec, k=5):
+        """Return up to k (question_index, score) pairs, best first"""
+        docs, scores = self._score_candidates(query_vec)
+        if docs is None or k <= 0:
+            return []
+
+        if len(scores) > k:
+            # Keep everything tied with the k-th score so the tie-break below
+            # can still choose between them
+            kth_score = -np.partition(-scores, k - 1)[k - 1]
+            keep = np.flatnonzero(scores >= kth_score)
+            docs, scores = docs[keep], scores[keep]
+
+        # Highest score first; ties go to the lower index, same as np.argmax
+        order = np.lexsort((docs, -scores))[:k]
+        return [(int(docs[i]), float(scores[i])) for i in order]
+
+    def best_matches(self, query_matrix):
+        """
+        Return one (question_index, score) pair per query row, using a single
+        sparse matrix-matrix product; rows with no shared terms give (None, 0.0)
+        """
+        queries = normalize(csr_matrix(query_matrix, dtype=np.float64), norm="l2")
+        n_queries = queries.shape[0]
+        if n_queries == 0:
+            return []
+
+        best_docs = np.full(n_queries, -1)
+        best_scores = np.zeros(n_queries)
+
+        # Segments are in id order and only a strictly better score replaces
+        # an earlier hit, so ties still resolve to the lowest question index
+        for segment in self.segments:
+            docs, scores = self._segment_best(segment, _fit_width(queries, segment.matrix.shape[1]))
+            better = (docs >= 0) & (scores > best_scores)
+            best_docs[better] = docs[better] + segment.offset
+            best_scores[better] = scores[better]
+
+        return [
+            (int(doc), float(score)) if doc >= 0 else (None, 0.0)
+            for doc, score in zip(best_docs, best_scores)
+        ]
+
+    @staticmethod
+    def _segment_best(segment, queries):
+        """Best row per query within one segment, as (local_ids, scores) arrays"""
+        n_queries = queries.shape[0]
+        scores = (queries @ segment.matrix.T).tocsr()
+        scores.eliminate_zeros()
+        scores.sort_indices()
+
+        lengths = np.diff(scores.indptr)
+        nonempty = lengths > 0
+        row_ids = np.repeat(np.arange(n_queries), lengths)
+
+        row_max = np.zeros(n_queries)
+        if scores.nnz:
+            row_max[nonempty] = np.maximum.reduceat(scores.data, scores.indptr[:-1][nonempty])
+
+        # Column indices are sorted, so the first maximum per row is the lowest
+        # question index, matching np.argmax tie-breaking
+        max_positions = np.flatnonzero(scores.data >= row_max[row_ids])
+        rows, first = np.unique(row_ids[max_positions], return_index=True)
+        best_docs = np.full(n_queries, -1)
+        best_docs[rows] = scores.indices[max_positions[first]]
+        return best_docs, row_max
+
+    def best_match(self, query_vec):
+        """Return (question_index, score) of the best match, or (None, 0.0)"""
+        hits = self.top_k(query_vec, k=1)
+        if not hits:
+            return None, 0.0
+        return hits[0]
+
+
+class ExactMatchIndex:
+    """
+    Hash table from normalised question text to question index, consulted
+    before vectorisation so repeated exact questions are answered in O(1).
+    The table of a compiled index is stored as sorted 64-bit key hashes plus
+    rows, memory-mapped and binary-searched, so workers share it; questions
+    added at runtime go to a small per-process dict.
+    """
+
+    def __init__(self, questions=()):
+        self.table = {}
+        self.hits = 0
+        self.misses = 0
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._rows = np.zeros(0, dtype=np.int64)
+        self._questions = ()
+        for index, question in enumerate(questions):
+            self.add(question, index)
+
+    @staticmethod
+    def key_hash(key):
+        """64-bit hash of a normalised key, as stored in the compiled table"""
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+    @classmethod
+    def build_table(cls, questions):
+        """(hashes, rows) arrays for questions, sorted by hash; the lowest index per key wins"""
+        first = {}
+        for index, question in enumerate(questions):
+            key = normalize_text(question)
+            if key:
+                first.setdefault(key, index)
+        hashes = np.fromiter((cls.key_hash(key) for key in first), dtype=np.uint64, count=len(first))
+        rows = np.fromiter(first.values(), dtype=np.int64, count=len(first))
+        order = np.lexsort((rows, hashes))
+        return hashes[order], rows[order]
+
+    @classmethod
+    def from_table(cls, questions, hashes, rows):
+        """Index over a stored table; questions are used to tell apart keys whose hashes collide"""
+        index = cls()
+        index._hashes = hashes
+        index._rows = rows
+        index._questions = questions
+        return index
+
+    def _find_stored(self, key):
+        h = np.uint64(self.key_hash(key))
+        start = np.searchsorted(self._hashes, h, side="left")
+        end = np.searchsorted(self._hashes, h, side="right")
+        for position in range(start, end):
+            row = int(self._rows[position])
+            if normalize_text(self._questions[row]) == key:
+                return row
+        return None
+
+    def _find_key(self, key):
+        if not key:
+            return None
+        index = self._find_stored(key) if len(self._hashes) else None
+        return self.table.get(key) if index is None else index
+
+    def add(self, question, index):
+        """Register a question; the first (lowest) index for a normalised form wins"""
+        key = normalize_text(question)
+        if key and self._find_key(key) is None:
+            self.table[key] = index
+
+    def find(self, question):
+        """Question index for the normalised form of question, without touching the counters"""
+        return self._find_key(normalize_text(question))
+
+    def lookup(self, user_question):
+        """Return the question index for an exact normalised match, or None"""
+        index = self.find(user_question)
+        if index is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return index
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._hashes) + len(self.table),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+def test_top_k_ties():
+    """Ties at the k-th score go to the lowest question indexes, as np.argmax would pick"""
+    print("🧪 Testing top-k tie-breaking...")
+    rng = np.random.default_rng(0)
+    # Many duplicate rows, so most queries have ties at the cut-off
+    rows = rng.integers(0, 2, size=(40, 6)).astype(np.float64)
+    rows = np.vstack([rows[::-1], rows])
+    engine = SparseRetrievalEngine(rows)
+    dense = normalize(rows)
+
+    for query in rng.integers(0, 2, size=(200, 6)).astype(np.float64):
+        if not query.any():
+            continue
+        scores = dense @ (query / np.linalg.norm(query))
+        for k in (1, 3, 7):
+            expected = sorted(np.flatnonzero(scores > 0), key=lambda doc: (-round(scores[doc], 12), doc))[:k]
+            got = [doc for doc, _ in engine.top_k(query.reshape(1, -1), k=k)]
+            assert got == expected, (query, k, got, expected)
+        assert engine.best_match(query.reshape(1, -1))[0] == int(np.argmax(scores))
+
+    print("✅ Top-k tie-breaking test passed")
+
+
+if __name__ == "__main__":
+    test_top_k_ties()
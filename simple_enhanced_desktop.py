@@ -6,9 +6,10 @@ Simple Enhanced Desktop Chatbot - Guaranteed to Work
 import tkinter as tk
 from tkinter import scrolledtext, messagebox
 import threading
-from datetime import datetime
-import json
-import os
+from datetime import datetime, timedelta
+
+from assistant_data_io import migrate_desktop_data
+from assistant_repository import get_repository, normalize_expense_category
 
 # Try to import chatbot, fallback if not available
 try:
@@ -240,31 +241,21 @@ class SimpleEnhancedChatbot:
         self.send_message()
     
     def load_data(self):
-        """Load saved data"""
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-            else:
-                self.data = {
-                    'expenses': [],
-                    'schedule': [],
-                    'study_sessions': []
-                }
-        except:
-            self.data = {
-                'expenses': [],
-                'schedule': [],
-                'study_sessions': []
-            }
-    
-    def save_data(self):
-        """Save data to file"""
+        """Use the shared assistant database, moving any old desktop data file into it once"""
+        self.repository = get_repository()
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            reports = migrate_desktop_data(self.repository.db, self.data_file)
         except Exception as e:
-            print(f"Error saving data: {e}")
+            print(f"⚠️ Could not migrate {self.data_file}: {e}")
+            return
+        
+        if any(report.skipped for report in reports):
+            details = "\n".join(str(report) for report in reports)
+            messagebox.showwarning(
+                "Data Migration",
+                f"{self.data_file} was not moved into the assistant database because some "
+                f"records are invalid. Fix them and restart:\n\n{details}"
+            )
     
     def add_welcome_message(self):
         """Add welcome message"""
@@ -435,16 +426,7 @@ Click the 🎤 button to speak your message instead of typing!
                     description = ""
                 
                 # Save expense
-                expense = {
-                    'amount': amount,
-                    'category': category,
-                    'description': description,
-                    'date': datetime.now().strftime('%Y-%m-%d'),
-                    'time': datetime.now().strftime('%H:%M')
-                }
-                
-                self.data['expenses'].append(expense)
-                self.save_data()
+                self.repository.add_expense(amount, *normalize_expense_category(category, description))
                 
                 return f"✅ Expense added: ₹{amount} for {category}" + (f" - {description}" if description else "")
             else:
@@ -455,8 +437,8 @@ Click the 🎤 button to speak your message instead of typing!
     
     def handle_show_expenses(self):
         """Show today's expenses"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_expenses = [e for e in self.data['expenses'] if e['date'] == today]
+        today = datetime.now().date()
+        today_expenses = self.repository.expenses_between(today, today + timedelta(days=1))
         
         if not today_expenses:
             return "💰 No expenses recorded for today."
@@ -474,22 +456,15 @@ Click the 🎤 button to speak your message instead of typing!
     
     def handle_monthly_expenses(self):
         """Show monthly expense summary"""
-        current_month = datetime.now().strftime('%Y-%m')
-        month_expenses = [e for e in self.data['expenses'] if e['date'].startswith(current_month)]
+        categories = self.repository.monthly_expense_totals()
         
-        if not month_expenses:
+        if not categories:
             return "📊 No expenses recorded for this month."
         
-        total = sum(e['amount'] for e in month_expenses)
-        
-        # Category breakdown
-        categories = {}
-        for expense in month_expenses:
-            cat = expense['category']
-            categories[cat] = categories.get(cat, 0) + expense['amount']
+        total = sum(amount for _, amount in categories)
         
         result = f"📊 Monthly Expense Summary (₹{total}):\n\n"
-        for category, amount in sorted(categories.items(), key=lambda x: x[1], reverse=True):
+        for category, amount in categories:
             percentage = (amount / total * 100) if total > 0 else 0
             result += f"• {category.title()}: ₹{amount} ({percentage:.1f}%)\n"
         
@@ -499,24 +474,17 @@ Click the 🎤 button to speak your message instead of typing!
         """Handle add schedule command"""
         try:
             # Simple parsing for demo
-            schedule_item = {
-                'title': 'New Event',
-                'description': user_input,
-                'date': datetime.now().strftime('%Y-%m-%d'),
-                'time': datetime.now().strftime('%H:%M')
-            }
-            
-            self.data['schedule'].append(schedule_item)
-            self.save_data()
+            title = 'New Event'
+            self.repository.add_schedule(title, datetime.now(), description=user_input)
             
-            return f"📅 Schedule added: {schedule_item['title']}"
+            return f"📅 Schedule added: {title}"
         except:
             return "📅 Schedule feature available! Use: Add schedule: [event] on [date] [time]"
     
     def handle_show_schedule(self):
         """Show today's schedule"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_schedule = [s for s in self.data['schedule'] if s['date'] == today]
+        today = datetime.now().date()
+        today_schedule = self.repository.schedule_between(today, today + timedelta(days=1))
         
         if not today_schedule:
             return "📅 No schedule for today. You're free!"
@@ -530,29 +498,21 @@ Click the 🎤 button to speak your message instead of typing!
     def handle_log_study(self, user_input):
         """Handle log study command"""
         try:
-            study_session = {
-                'subject': 'Study Session',
-                'duration': '60 minutes',
-                'date': datetime.now().strftime('%Y-%m-%d'),
-                'time': datetime.now().strftime('%H:%M'),
-                'notes': user_input
-            }
-            
-            self.data['study_sessions'].append(study_session)
-            self.save_data()
+            subject, duration = 'Study Session', 60
+            self.repository.log_study_session(subject, duration, notes=user_input)
             
-            return f"📚 Study session logged: {study_session['subject']} for {study_session['duration']}"
+            return f"📚 Study session logged: {subject} for {duration} minutes"
         except:
             return "📚 Study logging available! Use: Log study: [subject] for [duration] - [notes]"
     
     def handle_study_stats(self):
         """Show study statistics"""
-        if not self.data['study_sessions']:
+        total_sessions = self.repository.study_session_count()
+        if not total_sessions:
             return "📚 No study sessions recorded yet."
         
-        total_sessions = len(self.data['study_sessions'])
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_sessions = [s for s in self.data['study_sessions'] if s['date'] == today]
+        today = datetime.now().date()
+        today_sessions = self.repository.study_sessions_between(today, today + timedelta(days=1))
         
         result = f"📚 Study Statistics:\n\n"
         result += f"📊 Total Sessions: {total_sessions}\n"
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Single Flight
+Request coalescing: while a computation for a key is running, callers asking
+for the same key wait for it and share its result instead of starting their
+own. SingleFlight is for threads, AsyncSingleFlight for asyncio, and
+ProcessKeyLock lets gunicorn workers take turns on a key so the second one
+finds the first one's answer in the shared response cache.
+"""
+
+import asyncio
+import functools
+import hashlib
+import os
+import threading
+import time
+import weakref
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: coalescing stays within the process
+
+
+class _Call:
+    """One in-flight computation and the callers waiting for it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key across threads"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, compute):
+        """Return compute(), or the result of the identical call already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Later callers start a fresh computation (results are not cached here)
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        return {'in_flight': len(self._calls), 'leaders': self.leaders, 'shared': self.shared}
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent coroutines with the same key on one event loop"""
+
+    def __init__(self):
+        # Futures belong to a loop, so each loop has its own table
+        self._calls = weakref.WeakKeyDictionary()
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key, compute):
+        """Await compute(), or the result of the identical coroutine already in flight"""
+        loop = asyncio.get_running_loop()
+        calls = self._calls.setdefault(loop, {})
+
+        task = calls.get(key)
+        if task is None:
+            task = calls[key] = loop.create_task(compute())
+            task.add_done_callback(lambda _: calls.pop(key, None))
+            self.leaders += 1
+        else:
+            self.shared += 1
+
+        # shield: a caller that gives up must not cancel the lookup for everyone else
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {
+            'in_flight': sum(len(calls) for calls in self._calls.values()),
+            'leaders': self.leaders,
+            'shared': self.shared
+        }
+
+
+class ProcessKeyLock:
+    """
+    Per-key exclusive lock shared by every process using the same lock file.
+    Each key maps to one byte of the file, locked with fcntl.lockf, so there
+    is a single file however many keys are seen. Without fcntl it never blocks.
+    """
+
+    def __init__(self, path, timeout=10.0, poll_interval=0.05):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _file(self):
+        # Record locks belong to the process, so a forked worker needs its own descriptor
+        with self._lock:
+            if self._fd is None or self._pid != os.getpid():
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                self._pid = os.getpid()
+            return self._fd
+
+    @staticmethod
+    def _offset(key):
+        digest = hashlib.blake2b(repr(key).encode('utf-8'), digest_size=4).digest()
+        return int.from_bytes(digest, 'big') & 0x7FFFFFFF
+
+    def acquire(self, key):
+        """Lock key; returns the offset to pass to release(), or None on timeout or error"""
+        if fcntl is None:
+            return None
+
+        try:
+            fd = self._file()
+        except OSError as e:
+            print(f"⚠️ Request lock file unavailable: {e}")
+            return None
+
+        offset = self._offset(key)
+        give_up_at = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset, os.SEEK_SET)
+                return offset
+            except OSError:
+                # Another worker is computing this key; past the timeout, compute it ourselves
+                if time.monotonic() >= give_up_at:
+                    return None
+                time.sleep(self.poll_interval)
+
+    def release(self, offset):
+        if offset is None:
+            return
+        try:
+            fcntl.lockf(self._file(), fcntl.LOCK_UN, 1, offset, os.SEEK_SET)
+        except OSError:
+            pass
+
+
+def coalesced(flights=None, key=None):
+    """
+    Decorator: concurrent calls of the function with equal arguments share one
+    execution. key(*args, **kwargs) picks the arguments that identify a call
+    (all of them by default; use method_key for methods).
+    """
+    flights = flights or SingleFlight()
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            call_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            return flights.do((fn.__qualname__, call_key), lambda: fn(*args, **kwargs))
+
+        wrapper.flights = flights
+        return wrapper
+
+    return decorator
+
+
+def method_key(self, *args, **kwargs):
+    """Key for methods whose result does not depend on the instance"""
+    return args, tuple(sorted(kwargs.items()))
+
+
+def test_single_flight():
+    """Concurrent identical calls run once; distinct keys and later calls run again"""
+    print("🧪 Testing single flight...")
+    flights = SingleFlight()
+    runs = []
+
+    def slow(value):
+        runs.append(value)
+        time.sleep(0.2)
+        return value.upper()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda v=value: results.append(flights.do(v, lambda: slow(v))))
+        for value in ["python"] * 8 + ["java"] * 4
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(runs) == ["java", "python"], runs
+    assert results.count("PYTHON") == 8 and results.count("JAVA") == 4, results
+    assert flights.do("python", lambda: slow("python")) == "PYTHON" and len(runs) == 3
+
+    async_flights = AsyncSingleFlight()
+
+    async def lookup():
+        runs.append("async")
+        await asyncio.sleep(0.1)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(async_flights.do("question", lookup) for _ in range(20)))
+
+    assert asyncio.run(main()) == ["answer"] * 20 and runs.count("async") == 1
+    print(f"✅ Single flight test passed: {flights.stats()}")
+
+
+if __name__ == "__main__":
+    test_single_flight()
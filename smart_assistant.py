@@ -6,12 +6,14 @@ Enhanced version with multiple daily life features
 
 import json
 import re
+import sys
 from datetime import datetime, timedelta
 import requests
 from typing import Dict, List, Any
-import sqlite3
 import os
 
+from assistant_repository import AssistantRepository, DatabaseManager, EXPENSE_CATEGORIES, get_repository
+
 class ContextManager:
     """Manages conversation context and user preferences"""
     
@@ -41,64 +43,11 @@ class ContextManager:
         """Set context value"""
         self.current_context[key] = value
 
-class DatabaseManager:
-    """Manages SQLite database for persistent storage"""
-    
-    def __init__(self, db_path="smart_assistant.db"):
-        self.db_path = db_path
-        self.init_database()
-    
-    def init_database(self):
-        """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Schedule table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS schedule (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                date_time DATETIME NOT NULL,
-                category TEXT,
-                priority INTEGER DEFAULT 1,
-                completed BOOLEAN DEFAULT FALSE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Expenses table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                amount REAL NOT NULL,
-                category TEXT NOT NULL,
-                description TEXT,
-                date DATE NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Study sessions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS study_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                subject TEXT NOT NULL,
-                duration INTEGER NOT NULL,
-                date DATE NOT NULL,
-                notes TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-
 class ScheduleManager:
     """Manages daily schedule and reminders"""
     
-    def __init__(self, db_manager: DatabaseManager):
-        self.db = db_manager
+    def __init__(self, repository: AssistantRepository):
+        self.repository = repository
     
     def add_schedule(self, title: str, date_time: str, description: str = "", category: str = "general"):
         """Add new schedule item"""
@@ -106,16 +55,7 @@ class ScheduleManager:
             # Parse date time
             dt = datetime.strptime(date_time, "%Y-%m-%d %H:%M")
             
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO schedule (title, description, date_time, category)
-                VALUES (?, ?, ?, ?)
-            ''', (title, description, dt, category))
-            
-            conn.commit()
-            conn.close()
+            self.repository.add_schedule(title, dt, description, category)
             
             return f"✅ Schedule added: {title} on {dt.strftime('%d %B %Y at %I:%M %p')}"
             
@@ -127,26 +67,17 @@ class ScheduleManager:
     def get_today_schedule(self):
         """Get today's schedule"""
         today = datetime.now().date()
+        tomorrow = today + timedelta(days=1)
         
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT title, description, date_time, category
-            FROM schedule
-            WHERE DATE(date_time) = ?
-            ORDER BY date_time
-        ''', (today,))
-        
-        results = cursor.fetchall()
-        conn.close()
+        results = self.repository.schedule_between(today, tomorrow)
         
         if not results:
             return "📅 No schedule for today. You're free!"
         
         schedule_text = "📅 **Today's Schedule:**\n\n"
-        for title, desc, dt_str, category in results:
-            dt = datetime.fromisoformat(dt_str)
+        for item in results:
+            title, desc, category = item['title'], item['description'], item['category']
+            dt = datetime.fromisoformat(item['date_time'])
             time_str = dt.strftime('%I:%M %p')
             schedule_text += f"🕐 **{time_str}** - {title}"
             if category != "general":
@@ -162,18 +93,7 @@ class ScheduleManager:
         start_date = datetime.now().date()
         end_date = start_date + timedelta(days=days)
         
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT title, description, date_time, category
-            FROM schedule
-            WHERE DATE(date_time) BETWEEN ? AND ?
-            ORDER BY date_time
-        ''', (start_date, end_date))
-        
-        results = cursor.fetchall()
-        conn.close()
+        results = self.repository.schedule_between(start_date, end_date + timedelta(days=1))
         
         if not results:
             return f"📅 No upcoming schedule for next {days} days."
@@ -181,8 +101,9 @@ class ScheduleManager:
         schedule_text = f"📅 **Upcoming Schedule (Next {days} days):**\n\n"
         current_date = None
         
-        for title, desc, dt_str, category in results:
-            dt = datetime.fromisoformat(dt_str)
+        for item in results:
+            title, category = item['title'], item['category']
+            dt = datetime.fromisoformat(item['date_time'])
             date_str = dt.strftime('%d %B %Y')
             time_str = dt.strftime('%I:%M %p')
             
@@ -200,12 +121,9 @@ class ScheduleManager:
 class ExpenseTracker:
     """Tracks daily expenses and provides insights"""
     
-    def __init__(self, db_manager: DatabaseManager):
-        self.db = db_manager
-        self.categories = [
-            "food", "transport", "entertainment", "study", 
-            "shopping", "bills", "health", "other"
-        ]
+    def __init__(self, repository: AssistantRepository):
+        self.repository = repository
+        self.categories = EXPENSE_CATEGORIES
     
     def add_expense(self, amount: float, category: str, description: str = ""):
         """Add new expense"""
@@ -213,18 +131,7 @@ class ExpenseTracker:
             if category.lower() not in self.categories:
                 return f"❌ Invalid category. Use: {', '.join(self.categories)}"
             
-            today = datetime.now().date()
-            
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO expenses (amount, category, description, date)
-                VALUES (?, ?, ?, ?)
-            ''', (amount, category.lower(), description, today))
-            
-            conn.commit()
-            conn.close()
+            self.repository.add_expense(amount, category.lower(), description)
             
             return f"💰 Expense added: ₹{amount} for {category}"
             
@@ -234,32 +141,17 @@ class ExpenseTracker:
     def get_today_expenses(self):
         """Get today's expenses"""
         today = datetime.now().date()
+        results = self.repository.expenses_between(today, today + timedelta(days=1), newest_first=True)
         
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT amount, category, description
-            FROM expenses
-            WHERE date = ?
-            ORDER BY created_at DESC
-        ''', (today,))
-        
-        results = cursor.fetchall()
-        
-        # Get total
-        cursor.execute('''
-            SELECT SUM(amount) FROM expenses WHERE date = ?
-        ''', (today,))
-        
-        total = cursor.fetchone()[0] or 0
-        conn.close()
+        # Total from the same rows instead of a second scan
+        total = sum(expense['amount'] for expense in results)
         
         if not results:
             return "💰 No expenses recorded for today."
         
         expense_text = f"💰 **Today's Expenses (Total: ₹{total}):**\n\n"
-        for amount, category, desc in results:
+        for expense in results:
+            amount, category, desc = expense['amount'], expense['category'], expense['description']
             expense_text += f"• ₹{amount} - {category.title()}"
             if desc:
                 expense_text += f" ({desc})"
@@ -269,31 +161,10 @@ class ExpenseTracker:
     
     def get_monthly_summary(self):
         """Get monthly expense summary"""
-        # Get current month data
-        now = datetime.now()
-        start_date = now.replace(day=1).date()
-        
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        
-        # Total this month
-        cursor.execute('''
-            SELECT SUM(amount) FROM expenses 
-            WHERE date >= ?
-        ''', (start_date,))
-        
-        total = cursor.fetchone()[0] or 0
+        # Category wise breakdown from the monthly rollup; the month total is the sum of the groups
+        categories = self.repository.monthly_expense_totals(datetime.now().strftime('%Y-%m'))
         
-        # Category wise breakdown
-        cursor.execute('''
-            SELECT category, SUM(amount) FROM expenses 
-            WHERE date >= ?
-            GROUP BY category
-            ORDER BY SUM(amount) DESC
-        ''', (start_date,))
-        
-        categories = cursor.fetchall()
-        conn.close()
+        total = sum(amount for _, amount in categories)
         
         summary = f"📊 **Monthly Expense Summary (₹{total}):**\n\n"
         
@@ -306,24 +177,13 @@ class ExpenseTracker:
 class StudyAssistant:
     """Manages study sessions and provides insights"""
     
-    def __init__(self, db_manager: DatabaseManager):
-        self.db = db_manager
+    def __init__(self, repository: AssistantRepository):
+        self.repository = repository
     
     def log_study_session(self, subject: str, duration: int, notes: str = ""):
         """Log a study session"""
         try:
-            today = datetime.now().date()
-            
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO study_sessions (subject, duration, date, notes)
-                VALUES (?, ?, ?, ?)
-            ''', (subject, duration, today, notes))
-            
-            conn.commit()
-            conn.close()
+            self.repository.log_study_session(subject, duration, notes)
             
             return f"📚 Study session logged: {subject} for {duration} minutes"
             
@@ -333,36 +193,13 @@ class StudyAssistant:
     def get_study_stats(self):
         """Get study statistics"""
         today = datetime.now().date()
+        tomorrow = today + timedelta(days=1)
         week_start = today - timedelta(days=7)
         
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        
-        # Today's study time
-        cursor.execute('''
-            SELECT SUM(duration) FROM study_sessions WHERE date = ?
-        ''', (today,))
-        
-        today_minutes = cursor.fetchone()[0] or 0
-        
-        # This week's study time
-        cursor.execute('''
-            SELECT SUM(duration) FROM study_sessions 
-            WHERE date >= ?
-        ''', (week_start,))
-        
-        week_minutes = cursor.fetchone()[0] or 0
-        
-        # Subject wise breakdown (this week)
-        cursor.execute('''
-            SELECT subject, SUM(duration) FROM study_sessions 
-            WHERE date >= ?
-            GROUP BY subject
-            ORDER BY SUM(duration) DESC
-        ''', (week_start,))
-        
-        subjects = cursor.fetchall()
-        conn.close()
+        # Per subject this week and today, from the daily rollup
+        subjects = [(subject, minutes) for subject, minutes, _ in self.repository.study_totals_between(week_start, tomorrow)]
+        today_minutes = sum(minutes for _, minutes, _ in self.repository.study_totals_between(today, tomorrow))
+        week_minutes = sum(minutes for _, minutes in subjects)
         
         stats = f"📚 **Study Statistics:**\n\n"
         stats += f"📅 Today: {today_minutes} minutes ({today_minutes//60}h {today_minutes%60}m)\n"
@@ -494,11 +331,12 @@ class SmartPersonalAssistant:
     """Main Smart Personal Assistant class"""
     
     def __init__(self):
-        self.db_manager = DatabaseManager()
+        self.repository = get_repository()
+        self.db_manager = self.repository.db
         self.context_manager = ContextManager()
-        self.schedule_manager = ScheduleManager(self.db_manager)
-        self.expense_tracker = ExpenseTracker(self.db_manager)
-        self.study_assistant = StudyAssistant(self.db_manager)
+        self.schedule_manager = ScheduleManager(self.repository)
+        self.expense_tracker = ExpenseTracker(self.repository)
+        self.study_assistant = StudyAssistant(self.repository)
         self.weather_service = WeatherService()
         self.mood_detector = MoodDetector()
         self.intent_classifier = IntentClassifier()
@@ -604,6 +442,10 @@ def get_smart_response(user_input: str):
     return get_smart_response.assistant.process_input(user_input)
 
 if __name__ == "__main__":
+    if "--rebuild-rollups" in sys.argv:
+        get_repository().db.rebuild_rollups()
+        sys.exit(0)
+    
     # Test the assistant
     assistant = SmartPersonalAssistant()
     
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for streamed Bedrock answers, run against the offline stub client (no AWS needed)
+"""
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from aws_bedrock_integration import (
+    BedrockEnhancedAssistant, BedrockStreamError, SemanticResponseCache, StubBedrockClient
+)
+
+REPLY = "Machine learning lets computers learn patterns from data."
+QUESTION = "What is machine learning?"
+
+
+class FailingStubClient(StubBedrockClient):
+    """Stub whose stream breaks after a few events, like a dropped connection"""
+
+    def __init__(self, fail_after: int = 4, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_after = fail_after
+
+    def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+        events = super().invoke_model_with_response_stream(modelId, body, **kwargs)['body']
+
+        def broken():
+            for position, event in enumerate(events):
+                if position == self.fail_after:
+                    raise ConnectionError("stream reset by peer")
+                yield event
+
+        return {'body': broken()}
+
+
+def make_assistant(client):
+    # A private cache, so the chatbot's dataset vectorizer is never loaded
+    vectorizer = TfidfVectorizer().fit([QUESTION, "explain machine learning", "what is the capital of france"])
+    cache = SemanticResponseCache(threshold=0.8, vectorizer=vectorizer)
+    return BedrockEnhancedAssistant(client=client, cache=cache, cache_scope="test")
+
+
+def test_tokens_are_yielded_in_order():
+    stub = StubBedrockClient(reply=REPLY, chunk_size=7)
+    assistant = make_assistant(stub)
+
+    chunks = list(assistant.stream_bedrock_response(QUESTION))
+
+    assert chunks == [REPLY[i:i + 7] for i in range(0, len(REPLY), 7)]
+    assert stub.calls == [('invoke_model_with_response_stream', assistant.current_model)]
+
+
+def test_full_reply_is_cached_and_remembered():
+    stub = StubBedrockClient(reply=REPLY)
+    assistant = make_assistant(stub)
+
+    assert ''.join(assistant.stream_bedrock_response(QUESTION)) == REPLY
+
+    assert assistant.conversation_history[-1]['user'] == QUESTION
+    assert assistant.conversation_history[-1]['assistant'] == REPLY
+    assert assistant.cache.get(QUESTION, assistant.cache_key(QUESTION, None)) == REPLY
+    # A second ask is answered from the cache in one piece
+    assert list(assistant.stream_bedrock_response(QUESTION)) == [REPLY]
+    assert len(stub.calls) == 1
+
+
+def test_stream_error_caches_nothing():
+    stub = FailingStubClient(reply=REPLY, fail_after=4)
+    assistant = make_assistant(stub)
+
+    chunks = []
+    with pytest.raises(BedrockStreamError):
+        for chunk in assistant.stream_bedrock_response(QUESTION):
+            chunks.append(chunk)
+
+    assert chunks and ''.join(chunks) != REPLY
+    assert assistant.cache.stats()['entries'] == 0
+    assert assistant.conversation_history == []
+
+
+def test_stream_error_before_any_token_yields_nothing():
+    stub = FailingStubClient(reply=REPLY, fail_after=0)
+    assistant = make_assistant(stub)
+
+    assert list(assistant.stream_bedrock_response(QUESTION)) == []
+    assert assistant.cache.stats()['entries'] == 0
+    assert assistant.conversation_history == []
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Text Normalizer
+Canonical form for user questions: lowercase, punctuation and whitespace
+collapsed, and common Hinglish spelling variants folded to one spelling.
+Cache and in-flight keys use the lighter normalize_cache_key instead.
+"""
+
+import re
+import unicodedata
+
+# Spelling variant -> canonical spelling (whole words only)
+HINGLISH_VARIANTS = {
+    # kya / kyun
+    "kia": "kya", "kyaa": "kya", "kyaaa": "kya",
+    "kyu": "kyun", "kyon": "kyun", "kiyu": "kyun", "kiyun": "kyun",
+    # hai / hain / hoon
+    "h": "hai", "hae": "hai", "haii": "hai", "hain": "hai", "hein": "hai",
+    "hu": "hoon", "hun": "hoon", "hoo": "hoon",
+    # kaun / kaha / kaise
+    "kon": "kaun", "kaon": "kaun", "koun": "kaun",
+    "kahan": "kaha", "kahaan": "kaha",
+    "kese": "kaise", "kaisay": "kaise", "kaisey": "kaise", "kaese": "kaise",
+    # nahi
+    "nhi": "nahi", "nahin": "nahi", "nahee": "nahi", "nai": "nahi",
+    # common verbs / words
+    "kr": "kar", "rha": "raha", "rhi": "rahi", "rhe": "rahe",
+    "mujhey": "mujhe", "mjhe": "mujhe", "muje": "mujhe",
+    "acha": "accha", "achha": "accha", "achcha": "accha",
+    "bohot": "bahut", "bahot": "bahut", "bhut": "bahut", "boht": "bahut",
+    "thik": "theek", "thk": "theek",
+    "parh": "padh", "padhaai": "padhai", "parhai": "padhai",
+    "btao": "batao", "bataao": "batao", "bta": "bata",
+    "ap": "aap",
+}
+
+_APOSTROPHES = re.compile(r"['\u2019`]")
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+def normalize_text(text):
+    """
+    Return the canonical form of text used for exact-match lookups against the
+    dataset. The variant folding is too aggressive for anything else: "ap" and
+    "aap" are the same Hinglish word but different web searches.
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).lower()
+    # "what's" and "whats" are the same word
+    text = _APOSTROPHES.sub("", text)
+    words = _NON_WORD.sub(" ", text).replace("_", " ").split()
+    return " ".join(HINGLISH_VARIANTS.get(word, word) for word in words)
+
+def normalize_cache_key(text):
+    """Case and whitespace folded text, used to key cached and in-flight web/AI answers"""
+    if not text:
+        return ""
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
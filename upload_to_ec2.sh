@@ -25,14 +25,30 @@ chmod 400 "$KEY_FILE"
 FILES=(
     "app_web.py"
     "enhanced_web_app.py"
+    "asgi_app.py"
     "chatbot.py"
     "dataset_bot.py"
     "dataset_trainer.py"
+    "retrieval_engine.py"
+    "text_normalizer.py"
+    "response_cache.py"
+    "single_flight.py"
+    "admin_api.py"
     "intent_to_dataset.py"
     "web_search_helper.py"
+    "async_web_search.py"
     "multi_api_assistant.py"
+    "aws_bedrock_integration.py"
+    "smart_assistant.py"
+    "assistant_repository.py"
+    "assistant_data_io.py"
+    "assistant_store.py"
+    "http_client.py"
+    "keyword_matcher.py"
+    "knowledge_base.py"
     "dataset.json"
     "intents.json"
+    "knowledge_base.json"
     "assistant_data.json"
     "requirements.txt"
 )
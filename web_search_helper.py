@@ -4,73 +4,156 @@ Enhanced Web Search Helper for 100% Accuracy
 Provides REAL web search functionality using multiple sources for guaranteed answers
 """
 
-import requests
+import http_client
 import json
 import random
 from datetime import datetime
 import re
+import threading
+import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
-def search_wikipedia_advanced(query):
-    """Advanced Wikipedia search with multiple attempts"""
+from response_cache import LRUTTLCache
+from knowledge_base import KnowledgeBase
+from single_flight import SingleFlight
+from text_normalizer import normalize_cache_key
+
+# Overall time budget for the network sources of one web search (seconds)
+WEB_SEARCH_DEADLINE = 6.0
+
+# Shared by every request; stragglers from one search must not starve the next,
+# so lookups run under the search deadline (see _run_until)
+_search_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="web-search")
+
+WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
+
+# Search term -> page titles and page title -> intro extract. Empty results are
+# cached too (as () and ""), so a concept costs at most one lookup per day
+WIKIPEDIA_CACHE_TTL = 24 * 60 * 60
+_wiki_titles = LRUTTLCache(maxsize=4096, ttl=WIKIPEDIA_CACHE_TTL)
+_wiki_extracts = LRUTTLCache(maxsize=4096, ttl=WIKIPEDIA_CACHE_TTL, max_bytes=8 * 1024 * 1024)
+
+# Request building and response parsing below are shared with async_web_search,
+# which performs the same lookups on asyncio instead of worker threads
+
+def _wikipedia_search_terms(query):
+    """Cleaned query variants to search, skipping ones that normalise to a term already listed"""
+    # Clean query for Wikipedia
+    clean_query = query.replace("what is ", "").replace("who is ", "").replace("tell me about ", "")
+    clean_query = clean_query.replace("kya hai", "").replace("kaun hai", "").strip()
+    
+    search_terms = []
+    seen = set()
+    for search_term in [clean_query, clean_query.replace(" ", "_"), clean_query.title(), clean_query.lower()]:
+        key = normalize_cache_key(search_term.replace("_", " "))
+        if key and key not in seen:
+            seen.add(key)
+            search_terms.append(search_term)
+    return search_terms
+
+def _wikipedia_search_params(search_term):
+    return {
+        'action': 'query',
+        'format': 'json',
+        'list': 'search',
+        'srsearch': search_term,
+        'srlimit': 3
+    }
+
+def _wikipedia_extract_params(titles):
+    return {
+        'action': 'query',
+        'format': 'json',
+        'titles': '|'.join(titles),
+        'prop': 'extracts',
+        'exintro': True,
+        'explaintext': True,
+        'exsectionformat': 'plain',
+        'exlimit': 'max'
+    }
+
+def _cache_wikipedia_titles(search_term, data):
+    """Store the titles from a search API response (an empty result is cached too)"""
+    titles = tuple(result['title'] for result in data.get('query', {}).get('search', []))
+    _wiki_titles.set(normalize_cache_key(search_term), titles)
+    return titles
+
+def _cached_wikipedia_extracts(titles):
+    """Split titles into ({title: cached extract}, [titles still to fetch])"""
+    extracts = {}
+    missing = []
+    for title in titles:
+        extract = _wiki_extracts.get(title)
+        if extract is None:
+            missing.append(title)
+        else:
+            extracts[title] = extract
+    return extracts, missing
+
+def _cache_wikipedia_extracts(titles, data):
+    """Store the extracts from an extracts API response ("" when too short to be useful)"""
+    pages = data.get('query', {}).get('pages', {})
+    fetched = {page_info.get('title'): (page_info.get('extract') or '').strip() for page_info in pages.values()}
+    extracts = {}
+    for title in titles:
+        extract = fetched.get(title, '')
+        if len(extract) <= 50:  # Not meaningful content
+            extract = ''
+        _wiki_extracts.set(title, extract)
+        extracts[title] = extract
+    return extracts
+
+def _wikipedia_answer(titles, extracts):
+    """Format the first search result with meaningful content, or None"""
+    for page_title in titles:
+        extract = extracts.get(page_title)
+        if extract:
+            # Limit to first 400 characters for better readability
+            if len(extract) > 400:
+                extract = extract[:400] + "..."
+            return f"📖 **Wikipedia ({page_title}):**\n{extract}"
+    return None
+
+def _wikipedia_titles(search_term):
+    """Titles of the top search results for search_term (cached, including empty results)"""
+    titles = _wiki_titles.get(normalize_cache_key(search_term))
+    if titles is not None:
+        return titles
+    
+    response = http_client.get(WIKIPEDIA_API, params=_wikipedia_search_params(search_term), timeout=8)
+    if response.status_code != 200:
+        return ()  # Possibly transient, so not cached
+    return _cache_wikipedia_titles(search_term, response.json())
+
+def _wikipedia_extracts(titles):
+    """Map each title to its intro extract, fetching all uncached titles in one call"""
+    extracts, missing = _cached_wikipedia_extracts(titles)
+    if missing:
+        response = http_client.get(WIKIPEDIA_API, params=_wikipedia_extract_params(missing), timeout=8)
+        if response.status_code == 200:
+            extracts.update(_cache_wikipedia_extracts(missing, response.json()))
+    return extracts
+
+def wikipedia_cache_stats():
+    """Hit rates of the Wikipedia title and extract caches"""
+    return {'titles': _wiki_titles.stats(), 'extracts': _wiki_extracts.stats()}
+
+def search_wikipedia_advanced(query, cancel_event=None):
+    """Advanced Wikipedia search with multiple attempts (stops early once cancel_event is set)"""
     try:
-        # Clean query for Wikipedia
-        clean_query = query.replace("what is ", "").replace("who is ", "").replace("tell me about ", "")
-        clean_query = clean_query.replace("kya hai", "").replace("kaun hai", "").strip()
-        
         # Try multiple search strategies
-        search_queries = [
-            clean_query,
-            clean_query.replace(" ", "_"),
-            clean_query.title(),
-            clean_query.lower()
-        ]
-        
-        for search_term in search_queries:
+        for search_term in _wikipedia_search_terms(query):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
             try:
-                # Wikipedia API search
-                search_api = "https://en.wikipedia.org/w/api.php"
-                search_params = {
-                    'action': 'query',
-                    'format': 'json',
-                    'list': 'search',
-                    'srsearch': search_term,
-                    'srlimit': 3
-                }
+                titles = _wikipedia_titles(search_term)
+                if not titles or (cancel_event is not None and cancel_event.is_set()):
+                    continue
                 
-                response = requests.get(search_api, params=search_params, timeout=8)
-                if response.status_code == 200:
-                    data = response.json()
-                    if 'query' in data and 'search' in data['query'] and data['query']['search']:
-                        
-                        # Try each search result
-                        for result in data['query']['search']:
-                            page_title = result['title']
-                            
-                            # Get page content
-                            content_params = {
-                                'action': 'query',
-                                'format': 'json',
-                                'titles': page_title,
-                                'prop': 'extracts',
-                                'exintro': True,
-                                'explaintext': True,
-                                'exsectionformat': 'plain'
-                            }
-                            
-                            content_response = requests.get(search_api, params=content_params, timeout=8)
-                            if content_response.status_code == 200:
-                                content_data = content_response.json()
-                                pages = content_data['query']['pages']
-                                
-                                for page_id, page_info in pages.items():
-                                    if 'extract' in page_info and page_info['extract']:
-                                        extract = page_info['extract'].strip()
-                                        if len(extract) > 50:  # Ensure meaningful content
-                                            # Limit to first 400 characters for better readability
-                                            if len(extract) > 400:
-                                                extract = extract[:400] + "..."
-                                            return f"📖 **Wikipedia ({page_title}):**\n{extract}"
+                answer = _wikipedia_answer(titles, _wikipedia_extracts(titles))
+                if answer:
+                    return answer
             except:
                 continue
         
@@ -80,70 +163,40 @@ def search_wikipedia_advanced(query):
         print(f"Wikipedia advanced search error: {e}")
         return None
 
+# Extra phrases the fallback pass in search_google_like_api checks for
+_KNOWLEDGE_GUARDS = ['prime minister', 'pm', 'india', 'president', 'einstein']
+
+# Static answers (sections: knowledge, comprehensive, enhanced) with their keyword index;
+# edits to knowledge_base.json are picked up without a restart
+knowledge_base = KnowledgeBase(extra_patterns={'knowledge': _KNOWLEDGE_GUARDS})
+
 def search_google_like_api(query):
     """Search using Google-like APIs for better results"""
     try:
-        # Clean and analyze query
-        query_lower = query.lower()
+        section = knowledge_base.section('knowledge')
         
-        # Enhanced knowledge responses with better matching
-        knowledge_responses = {
-            # Political Leaders - More specific matching with Hindi support
-            "prime minister india": "🇮🇳 **Prime Minister of India:** Narendra Modi has been serving as the Prime Minister of India since May 2014. He is the leader of the Bharatiya Janata Party (BJP) and previously served as Chief Minister of Gujarat from 2001 to 2014.",
-            "pm india": "🇮🇳 **Prime Minister of India:** Narendra Modi has been serving as the Prime Minister of India since May 2014. He is the leader of the Bharatiya Janata Party (BJP) and previously served as Chief Minister of Gujarat from 2001 to 2014.",
-            "pradhan mantri": "🇮🇳 **Prime Minister of India:** Narendra Modi has been serving as the Prime Minister of India since May 2014. He is the leader of the Bharatiya Janata Party (BJP) and previously served as Chief Minister of Gujarat from 2001 to 2014.",
-            "narendra modi": "🇮🇳 **Narendra Modi:** 14th Prime Minister of India since May 2014. Leader of Bharatiya Janata Party (BJP). Former Chief Minister of Gujarat (2001-2014). Known for economic reforms, digital initiatives, and international diplomacy.",
-            "president india": "🇮🇳 **President of India:** Droupadi Murmu is the 15th President of India, serving since July 2022. She is the first tribal woman to hold this office and previously served as Governor of Jharkhand.",
-            "rashtrapati": "🇮🇳 **President of India:** Droupadi Murmu is the 15th President of India, serving since July 2022. She is the first tribal woman to hold this office and previously served as Governor of Jharkhand.",
-            
-            # Science & Technology
-            "albert einstein": "🧠 **Albert Einstein (1879-1955):** German-born theoretical physicist who developed the theory of relativity (E=mc²). Won Nobel Prize in Physics in 1921. His work revolutionized understanding of space, time, and gravity. Considered one of the greatest scientists in history.",
-            "python programming": "🐍 **Python Programming:** Python is a high-level, interpreted programming language created by Guido van Rossum in 1991. Known for its simple, readable syntax and powerful libraries. Widely used in web development, data science, AI/ML, automation, and scientific computing.",
-            "artificial intelligence": "🤖 **Artificial Intelligence (AI):** AI is the simulation of human intelligence in machines programmed to think, learn, and problem-solve. Includes machine learning, natural language processing, computer vision, and robotics. Revolutionizing industries from healthcare to transportation.",
-            "machine learning": "🧠 **Machine Learning:** A subset of AI that enables computers to learn and improve from data without explicit programming. Uses algorithms to find patterns, make predictions, and automate decision-making. Powers recommendation systems, image recognition, and predictive analytics.",
-            "blockchain": "⛓️ **Blockchain:** A distributed ledger technology that maintains a continuously growing list of records (blocks) linked and secured using cryptography. Foundation of cryptocurrencies like Bitcoin, also used in supply chain, voting systems, and smart contracts.",
-            
-            # Programming Languages
-            "javascript": "⚡ **JavaScript:** JavaScript is a versatile programming language primarily used for web development. Created by Brendan Eich in 1995, it enables interactive web pages and runs in browsers and servers (Node.js). Essential for modern web applications.",
-            "java programming": "☕ **Java:** Object-oriented programming language developed by Sun Microsystems in 1995. Known for 'write once, run anywhere' philosophy. Widely used in enterprise applications, Android development, and web services.",
-            
-            # Countries & Geography
-            "india country": "🇮🇳 **India:** World's largest democracy and second-most populous country. Capital: New Delhi. Known for diverse culture, ancient history, IT industry, and economic growth. Home to 1.4+ billion people speaking 700+ languages.",
-            "usa america": "🇺🇸 **United States of America:** Federal republic of 50 states, world's largest economy and military power. Capital: Washington D.C. Known for technological innovation, Hollywood entertainment, and cultural influence globally.",
-            "china country": "🇨🇳 **China:** World's most populous country and second-largest economy. Capital: Beijing. Ancient civilization with 5000+ years of history. Major manufacturing hub and growing technological power.",
-            
-            # Famous People
-            "steve jobs": "💻 **Steve Jobs (1955-2011):** Co-founder and CEO of Apple Inc. Visionary entrepreneur who revolutionized personal computing, smartphones (iPhone), tablets (iPad), and digital entertainment (iPod, iTunes). Known for innovative design and marketing genius.",
-            "bill gates": "💼 **Bill Gates:** Co-founder of Microsoft Corporation, one of the world's richest people. Philanthropist through the Bill & Melinda Gates Foundation, focusing on global health, education, and poverty reduction. Pioneer in personal computer software.",
-            "elon musk": "🚀 **Elon Musk:** Entrepreneur and business magnate, CEO of Tesla (electric vehicles) and SpaceX (space exploration). Also founded PayPal, Neuralink, and The Boring Company. Known for ambitious goals like Mars colonization and sustainable energy.",
-            
-            # Science Concepts
-            "gravity physics": "🌍 **Gravity:** Fundamental force that attracts objects with mass toward each other. On Earth, acceleration due to gravity is 9.8 m/s². Described by Newton's law and later explained by Einstein's general relativity as curvature of spacetime.",
-            "photosynthesis": "🌱 **Photosynthesis:** Process by which plants convert sunlight, carbon dioxide, and water into glucose and oxygen. Formula: 6CO₂ + 6H₂O + light energy → C₆H₁₂O₆ + 6O₂. Essential for life on Earth as it produces oxygen and food.",
-            "dna genetics": "🧬 **DNA (Deoxyribonucleic Acid):** Molecule that carries genetic instructions for all living organisms. Double helix structure discovered by Watson and Crick. Contains four bases: A, T, G, C. Determines hereditary traits and biological functions.",
-        }
+        # One pass over the query finds every key word and guard phrase it contains
+        found = section.matcher.scan(query.lower())
         
-        # Enhanced matching - check for key phrases in query
-        for key, response in knowledge_responses.items():
-            # Split key into words and check if all words are in query
-            key_words = key.split()
-            if all(word in query_lower for word in key_words):
-                return response
+        # Enhanced matching - first entry whose key words are all in the query
+        index = section.matcher.first_all(found)
+        if index is not None:
+            return section.answers[index]
         
-        # Fallback matching - check if any key words match
-        for key, response in knowledge_responses.items():
-            key_words = key.split()
-            if any(word in query_lower for word in key_words):
-                # Additional validation for better matching
-                if "prime minister" in query_lower or "pm" in query_lower:
-                    if "india" in query_lower and "prime minister" in key:
-                        return response
-                elif "president" in query_lower and "president" in key:
-                    return response
-                elif "einstein" in query_lower and "einstein" in key:
-                    return response
-                elif len(key_words) > 1 and sum(1 for word in key_words if word in query_lower) >= len(key_words) // 2:
-                    return response
+        # Fallback matching - entries with any key word in the query, in priority order
+        for index in section.matcher.rules_with_any(found):
+            key_words = section.keywords[index]
+            key = ' '.join(key_words)
+            # Additional validation for better matching
+            if "prime minister" in found or "pm" in found:
+                if "india" in found and "prime minister" in key:
+                    return section.answers[index]
+            elif "president" in found and "president" in key:
+                return section.answers[index]
+            elif "einstein" in found and "einstein" in key:
+                return section.answers[index]
+            elif len(key_words) > 1 and sum(1 for word in key_words if word in found) >= len(key_words) // 2:
+                return section.answers[index]
         
         return None
         
@@ -154,55 +207,9 @@ def search_google_like_api(query):
 def search_comprehensive_knowledge(query):
     """Comprehensive knowledge search with guaranteed answers"""
     try:
-        query_lower = query.lower()
-        
-        # Programming & Technology
-        if any(word in query_lower for word in ['programming', 'coding', 'software', 'development']):
-            return "💻 **Programming:** The process of creating instructions for computers using programming languages like Python, Java, JavaScript, C++. Involves problem-solving, algorithm design, and building software applications, websites, and systems."
-        
-        if any(word in query_lower for word in ['computer', 'laptop', 'hardware']):
-            return "🖥️ **Computer:** Electronic device that processes data using binary code. Main components: CPU (processor), RAM (memory), storage (hard drive/SSD), motherboard, and input/output devices. Revolutionized communication, work, and entertainment."
-        
-        if any(word in query_lower for word in ['internet', 'web', 'website']):
-            return "🌐 **Internet:** Global network of interconnected computers that communicate using standardized protocols. Enables email, web browsing, social media, online shopping, and information sharing. Created from ARPANET in the 1960s."
-        
-        # Science & Nature
-        if any(word in query_lower for word in ['space', 'universe', 'galaxy', 'solar system']):
-            return "🌌 **Space/Universe:** The vast expanse containing all matter, energy, planets, stars, and galaxies. Our solar system has 8 planets orbiting the Sun. The universe is approximately 13.8 billion years old and constantly expanding."
-        
-        if any(word in query_lower for word in ['ocean', 'sea', 'water']):
-            return "🌊 **Ocean:** Large bodies of saltwater covering 71% of Earth's surface. Five major oceans: Pacific, Atlantic, Indian, Arctic, and Southern. Home to diverse marine life, regulates climate, and crucial for weather patterns."
-        
-        if any(word in query_lower for word in ['climate', 'weather', 'global warming']):
-            return "🌡️ **Climate:** Long-term weather patterns in a region. Global warming refers to rising Earth temperatures due to greenhouse gases from human activities. Causes include burning fossil fuels, deforestation, and industrial processes."
-        
-        # History & Culture
-        if any(word in query_lower for word in ['history', 'ancient', 'civilization']):
-            return "📜 **History:** Study of past events, civilizations, and human development. Ancient civilizations include Mesopotamia, Egypt, Indus Valley, Greece, and Rome. History helps us understand cultural evolution and learn from past experiences."
-        
-        if any(word in query_lower for word in ['culture', 'tradition', 'festival']):
-            return "🎭 **Culture:** Shared beliefs, customs, arts, and social behaviors of a group. Includes language, religion, food, music, and traditions. Cultural diversity enriches human experience and promotes understanding between communities."
-        
-        # Education & Learning
-        if any(word in query_lower for word in ['education', 'learning', 'study', 'school', 'college']):
-            return "📚 **Education:** Process of acquiring knowledge, skills, and values through teaching and learning. Includes formal education (schools, colleges) and informal learning. Essential for personal development and societal progress."
-        
-        if any(word in query_lower for word in ['mathematics', 'math', 'algebra', 'geometry']):
-            return "🔢 **Mathematics:** Study of numbers, shapes, patterns, and logical reasoning. Branches include arithmetic, algebra, geometry, calculus, and statistics. Foundation for science, engineering, economics, and technology."
-        
-        # Health & Medicine
-        if any(word in query_lower for word in ['health', 'medicine', 'doctor', 'hospital']):
-            return "🏥 **Health/Medicine:** Science of maintaining physical and mental well-being. Includes prevention, diagnosis, and treatment of diseases. Modern medicine uses advanced technology, pharmaceuticals, and evidence-based practices."
-        
-        if any(word in query_lower for word in ['exercise', 'fitness', 'sports']):
-            return "🏃 **Exercise/Fitness:** Physical activity that improves health, strength, and endurance. Benefits include better cardiovascular health, stronger muscles, improved mental health, and disease prevention. Recommended 150 minutes weekly."
-        
-        # Business & Economics
-        if any(word in query_lower for word in ['business', 'company', 'entrepreneur']):
-            return "💼 **Business:** Organization engaged in commercial activities to provide goods or services for profit. Entrepreneurship involves starting and managing businesses, taking risks, and creating value for customers and society."
-        
-        if any(word in query_lower for word in ['money', 'economy', 'finance', 'bank']):
-            return "💰 **Economy/Finance:** System of production, distribution, and consumption of goods and services. Money serves as medium of exchange. Banks provide financial services like loans, savings, and investment opportunities."
+        answer = knowledge_base.section('comprehensive').match(query.lower())
+        if answer:
+            return answer
         
         # Default comprehensive response
         return f"🤔 **About '{query}':** This is an interesting topic that involves multiple aspects and perspectives. For the most accurate and detailed information, I recommend checking reliable sources like educational websites, encyclopedias, or academic resources. If you have a more specific question about this topic, feel free to ask!"
@@ -211,38 +218,46 @@ def search_comprehensive_knowledge(query):
         print(f"Comprehensive knowledge search error: {e}")
         return None
 
-def search_duckduckgo(query):
+DUCKDUCKGO_API = "https://api.duckduckgo.com/"
+
+def _duckduckgo_params(query):
+    return {
+        'q': query,
+        'format': 'json',
+        'no_html': '1',
+        'skip_disambig': '1'
+    }
+
+def _duckduckgo_answer(data):
+    """Best instant answer in a DuckDuckGo response, or None"""
+    # Try abstract first
+    if data.get('Abstract'):
+        return f"🔍 **DuckDuckGo:** {data['Abstract']}"
+    
+    # Try definition
+    if data.get('Definition'):
+        return f"📚 **Definition:** {data['Definition']}"
+    
+    # Try answer
+    if data.get('Answer'):
+        return f"💡 **Answer:** {data['Answer']}"
+    
+    # Try related topics
+    if data.get('RelatedTopics') and len(data['RelatedTopics']) > 0:
+        first_topic = data['RelatedTopics'][0]
+        if 'Text' in first_topic:
+            return f"🔗 **Related:** {first_topic['Text']}"
+    
+    return None
+
+def search_duckduckgo(query, cancel_event=None):
     """Search using DuckDuckGo Instant Answer API"""
+    if cancel_event is not None and cancel_event.is_set():
+        return None
     try:
-        url = "https://api.duckduckgo.com/"
-        params = {
-            'q': query,
-            'format': 'json',
-            'no_html': '1',
-            'skip_disambig': '1'
-        }
-        
-        response = requests.get(url, params=params, timeout=5)
+        response = http_client.get(DUCKDUCKGO_API, params=_duckduckgo_params(query), timeout=5)
         if response.status_code == 200:
-            data = response.json()
-            
-            # Try abstract first
-            if data.get('Abstract'):
-                return f"🔍 **DuckDuckGo:** {data['Abstract']}"
-            
-            # Try definition
-            if data.get('Definition'):
-                return f"📚 **Definition:** {data['Definition']}"
-            
-            # Try answer
-            if data.get('Answer'):
-                return f"💡 **Answer:** {data['Answer']}"
-            
-            # Try related topics
-            if data.get('RelatedTopics') and len(data['RelatedTopics']) > 0:
-                first_topic = data['RelatedTopics'][0]
-                if 'Text' in first_topic:
-                    return f"🔗 **Related:** {first_topic['Text']}"
+            return _duckduckgo_answer(response.json())
         
         return None
         
@@ -250,46 +265,57 @@ def search_duckduckgo(query):
         print(f"DuckDuckGo search error: {e}")
         return None
 
-def search_rest_countries(query):
+def _country_url(query):
+    """REST Countries URL for a country question, or None if the query is not about one"""
+    if not any(word in query.lower() for word in ['country', 'capital', 'population', 'currency']):
+        return None
+    
+    # Extract country name
+    country_keywords = ['india', 'usa', 'america', 'china', 'japan', 'germany', 'france', 'uk', 'britain']
+    country = None
+    
+    for keyword in country_keywords:
+        if keyword in query.lower():
+            country = keyword
+            break
+    
+    if not country:
+        return None
+    if country == 'india':
+        # Use exact search for India
+        return "https://restcountries.com/v3.1/name/india?fullText=true"
+    if country in ['usa', 'america']:
+        country = 'united states'
+    elif country in ['uk', 'britain']:
+        country = 'united kingdom'
+    return f"https://restcountries.com/v3.1/name/{country}"
+
+def _country_answer(data):
+    """Format the first country in a REST Countries response"""
+    data = data[0]
+    
+    name = data['name']['common']
+    capital = data.get('capital', ['N/A'])[0]
+    population = data.get('population', 'N/A')
+    
+    currencies = data.get('currencies', {})
+    currency = 'N/A'
+    if currencies:
+        currency_code = list(currencies.keys())[0]
+        currency = f"{currencies[currency_code]['name']} ({currency_code})"
+    
+    return f"🌍 **{name}:**\n🏛️ Capital: {capital}\n👥 Population: {population:,}\n💰 Currency: {currency}"
+
+def search_rest_countries(query, cancel_event=None):
     """Search country information"""
+    if cancel_event is not None and cancel_event.is_set():
+        return None
     try:
-        if any(word in query.lower() for word in ['country', 'capital', 'population', 'currency']):
-            # Extract country name
-            country_keywords = ['india', 'usa', 'america', 'china', 'japan', 'germany', 'france', 'uk', 'britain']
-            country = None
-            
-            for keyword in country_keywords:
-                if keyword in query.lower():
-                    country = keyword
-                    break
-            
-            if country:
-                if country in ['usa', 'america']:
-                    country = 'united states'
-                elif country in ['uk', 'britain']:
-                    country = 'united kingdom'
-                elif country == 'india':
-                    # Use exact search for India
-                    url = "https://restcountries.com/v3.1/name/india?fullText=true"
-                else:
-                    url = f"https://restcountries.com/v3.1/name/{country}"
-                
-                response = requests.get(url, timeout=5)
-                
-                if response.status_code == 200:
-                    data = response.json()[0]
-                    
-                    name = data['name']['common']
-                    capital = data.get('capital', ['N/A'])[0]
-                    population = data.get('population', 'N/A')
-                    
-                    currencies = data.get('currencies', {})
-                    currency = 'N/A'
-                    if currencies:
-                        currency_code = list(currencies.keys())[0]
-                        currency = f"{currencies[currency_code]['name']} ({currency_code})"
-                    
-                    return f"🌍 **{name}:**\n🏛️ Capital: {capital}\n👥 Population: {population:,}\n💰 Currency: {currency}"
+        url = _country_url(query)
+        if url:
+            response = http_client.get(url, timeout=5)
+            if response.status_code == 200:
+                return _country_answer(response.json())
         
         return None
         
@@ -297,112 +323,93 @@ def search_rest_countries(query):
         print(f"Country search error: {e}")
         return None
 
+# Answer sources in priority order: (label, function, makes network calls)
+SEARCH_SOURCES = [
+    ("Wikipedia", search_wikipedia_advanced, True),           # most reliable
+    ("knowledge base", search_google_like_api, False),
+    ("DuckDuckGo", search_duckduckgo, True),
+    ("country information", search_rest_countries, True),
+    ("comprehensive knowledge", search_comprehensive_knowledge, False),
+]
+
+def resolve_web_answer(question, deadline=WEB_SEARCH_DEADLINE):
+    """
+    Query every source in SEARCH_SOURCES concurrently and return (label, answer)
+    from the highest-priority source that has one, or (None, None).
+    All network sources start at once; a lower-priority answer is only taken after
+    every source above it has come back empty or missed the deadline. Sources still
+    running when the answer is chosen are cancelled.
+    """
+    cancel_event = threading.Event()
+    expires_at = time.monotonic() + deadline
+    
+    print("⚡ Searching Wikipedia, DuckDuckGo and country information in parallel...")
+    futures = {
+        label: _search_pool.submit(_run_until, expires_at, source, question, cancel_event)
+        for label, source, network in SEARCH_SOURCES
+        if network
+    }
+    
+    try:
+        for label, source, network in SEARCH_SOURCES:
+            if not network:
+                result = source(question)
+            else:
+                try:
+                    result = futures[label].result(timeout=max(expires_at - time.monotonic(), 0))
+                except FutureTimeout:
+                    print(f"⏱️ {label} missed the {deadline:g}s deadline, skipping")
+                    continue
+                except Exception as e:
+                    print(f"{label} search error: {e}")
+                    continue
+            
+            if result:
+                return label, result
+        
+        return None, None
+    
+    finally:
+        # Stop stragglers: queued lookups never start, running ones bail out at their next check
+        cancel_event.set()
+        for future in futures.values():
+            future.cancel()
+
+def _run_until(expires_at, source, *args):
+    """Run a source in a pool thread; its requests and retries stop at expires_at"""
+    with http_client.deadline(expires_at):
+        return source(*args)
+
+# Concurrent searches for the same question share one run of the cascade
+_web_flights = SingleFlight()
+
 def search_web_answer(question):
     """
     Enhanced web search with 100% accuracy guarantee
     Uses multiple sources and fallbacks to ensure every question gets an answer
     """
-    question_lower = question.lower()
-    
+    return _web_flights.do(normalize_cache_key(question), lambda: _search_web_answer(question))
+
+def _search_web_answer(question):
     print(f"🔍 Searching for answer: {question}")
     
-    # Try Wikipedia first (most reliable)
-    print("📖 Searching Wikipedia...")
-    wiki_result = search_wikipedia_advanced(question)
-    if wiki_result:
-        print("✅ Found Wikipedia answer")
-        return wiki_result
-    
-    # Try Google-like knowledge base
-    print("🔍 Searching knowledge base...")
-    google_result = search_google_like_api(question)
-    if google_result:
-        print("✅ Found knowledge base answer")
-        return google_result
-    
-    # Try DuckDuckGo
-    print("🦆 Searching DuckDuckGo...")
-    ddg_result = search_duckduckgo(question)
-    if ddg_result:
-        print("✅ Found DuckDuckGo answer")
-        return ddg_result
-    
-    # Try country information
-    print("🌍 Searching country information...")
-    country_result = search_rest_countries(question)
-    if country_result:
-        print("✅ Found country information")
-        return country_result
+    label, result = resolve_web_answer(question)
+    if result:
+        print(f"✅ Found {label} answer")
+        return result
     
-    # Try comprehensive knowledge search
-    print("🧠 Searching comprehensive knowledge...")
-    comp_result = search_comprehensive_knowledge(question)
-    if comp_result:
-        print("✅ Found comprehensive answer")
-        return comp_result
+    return offline_answer(question)
+
+def offline_answer(question):
+    """Answer from the built-in knowledge alone, used when every search source came back empty"""
+    question_lower = question.lower()
     
     # Enhanced hardcoded knowledge base for 100% coverage
     print("💾 Checking enhanced knowledge base...")
     
-    # India-related questions (Enhanced with Hindi support)
-    if any(word in question_lower for word in ['prime minister', 'pm of india', 'narendra modi', 'pradhan mantri', 'pm india']):
-        return "🇮🇳 **Prime Minister of India:** Narendra Modi has been serving as the Prime Minister of India since May 2014. He is the leader of the Bharatiya Janata Party (BJP) and previously served as Chief Minister of Gujarat from 2001 to 2014."
-    
-    elif any(word in question_lower for word in ['president of india', 'president india', 'rashtrapati']):
-        return "🇮🇳 **President of India:** Droupadi Murmu is the 15th President of India, serving since July 2022. She is the first tribal woman to hold this office and previously served as Governor of Jharkhand."
-    
-    elif any(word in question_lower for word in ['capital of india', 'india capital']):
-        return "🏛️ **Capital of India:** New Delhi is the capital of India. It serves as the seat of all three branches of the Government of India - Executive, Legislature, and Judiciary. The city was designed by British architects Edwin Lutyens and Herbert Baker."
-    
-    # Technology questions
-    elif any(word in question_lower for word in ['python programming', 'what is python']):
-        return "🐍 **Python:** Python is a high-level, interpreted programming language created by Guido van Rossum in 1991. It's known for its simple syntax and is widely used in web development, data science, AI, automation, and scientific computing."
-    
-    elif any(word in question_lower for word in ['artificial intelligence', 'what is ai']):
-        return "🤖 **Artificial Intelligence:** AI is the simulation of human intelligence in machines programmed to think and learn. It includes machine learning, natural language processing, computer vision, and robotics. AI is revolutionizing industries from healthcare to transportation."
-    
-    elif any(word in question_lower for word in ['machine learning', 'what is ml']):
-        return "🧠 **Machine Learning:** ML is a subset of AI that enables computers to learn and improve from data without being explicitly programmed. It uses algorithms to find patterns in data and make predictions or decisions."
-    
-    # Science questions
-    elif any(word in question_lower for word in ['speed of light', 'light speed']):
-        return "💡 **Speed of Light:** The speed of light in vacuum is exactly 299,792,458 meters per second (approximately 300,000 km/s). It's a fundamental constant in physics and the maximum speed at which information can travel."
-    
-    elif any(word in question_lower for word in ['gravity', 'gravitational force']):
-        return "🌍 **Gravity:** Gravity is a fundamental force that attracts objects with mass toward each other. On Earth, it accelerates objects at 9.8 m/s². It was described by Newton and later explained by Einstein's general relativity."
-    
-    # Geography questions
-    elif any(word in question_lower for word in ['largest country', 'biggest country']):
-        return "🌍 **Largest Country:** Russia is the largest country in the world by land area, covering 17.1 million square kilometers (6.6 million square miles), spanning 11 time zones."
-    
-    elif any(word in question_lower for word in ['highest mountain', 'tallest mountain', 'mount everest']):
-        return "🏔️ **Highest Mountain:** Mount Everest is the highest mountain above sea level at 8,848.86 meters (29,031.7 feet). It's located in the Himalayas on the border between Nepal and Tibet."
-    
-    # Famous personalities
-    elif any(word in question_lower for word in ['albert einstein', 'einstein']):
-        return "🧠 **Albert Einstein (1879-1955):** German-born theoretical physicist who developed the theory of relativity. Famous for E=mc² equation. Won Nobel Prize in Physics in 1921. Considered one of the greatest scientists of all time."
-    
-    elif any(word in question_lower for word in ['mahatma gandhi', 'gandhi']):
-        return "🕊️ **Mahatma Gandhi (1869-1948):** Indian independence leader known for non-violent resistance. Led India's independence movement against British rule. Known as 'Father of the Nation' in India."
-    
-    elif any(word in question_lower for word in ['abdul kalam', 'apj abdul kalam']):
-        return "🚀 **Dr. APJ Abdul Kalam (1931-2015):** Indian aerospace scientist and 11th President of India. Known as 'Missile Man of India' for his work on ballistic missile and launch vehicle technology."
-    
-    elif any(word in question_lower for word in ['steve jobs', 'jobs']):
-        return "💻 **Steve Jobs (1955-2011):** Co-founder and CEO of Apple Inc. Revolutionary figure in personal computing, smartphones, and digital entertainment. Known for iPhone, iPad, and Mac computers."
-    
-    elif any(word in question_lower for word in ['bill gates', 'gates']):
-        return "💼 **Bill Gates:** Co-founder of Microsoft Corporation. One of the world's richest people and major philanthropist through the Bill & Melinda Gates Foundation, focusing on global health and education."
-    
-    # Programming questions
-    elif any(word in question_lower for word in ['javascript', 'what is javascript']):
-        return "⚡ **JavaScript:** JavaScript is a versatile programming language primarily used for web development. It enables interactive web pages and runs in browsers and servers (Node.js). Essential for modern web applications."
-    
-    elif any(word in question_lower for word in ['html', 'what is html']):
-        return "🌐 **HTML:** HyperText Markup Language (HTML) is the standard markup language for creating web pages. It describes the structure and content of web documents using tags and elements."
-    
-    elif any(word in question_lower for word in ['css', 'what is css']):
-        return "🎨 **CSS:** Cascading Style Sheets (CSS) is used to style and layout web pages. It controls colors, fonts, spacing, and positioning of HTML elements, making websites visually appealing."
+    answer = knowledge_base.section('enhanced').match(question_lower)
+    if answer:
+        return answer
     
     # GUARANTEED FALLBACK - This ensures 100% response rate
     print("🎯 Using guaranteed fallback response")